@@ -1,259 +1,286 @@
-import streamlit as st
+import time
+
+# Cold-start report: the first run in a process pays for these imports
+IMPORTS_START = time.perf_counter()
+
+import json
+import os
+import uuid
+
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import streamlit as st
+
+import assets
+import charts
+import compaction
+import data_source
+import export
+import geo
+import metrics
+import parallel
+import profiling
+import query
+import scatter
+import scenarios
+import table
+import theme
+import transforms
+from export import EXPORTS
+from figure_cache import FIGURES, figure_key, frame_fingerprint, to_figure
+from data_source import PILLARS
+from scoring import OTHER, rank_percentiles
+from store import session_bytes
+
+profiling.startup("imports", time.perf_counter() - IMPORTS_START)
+
+LAZY_TABS = os.environ.get("EFI_LAZY_TABS", "1") != "0"
+# Typed arrays, unused-customdata pruning, WebGL and down-sampling for large traces
+COMPACT   = os.environ.get("EFI_COMPACT", "1") != "0"
 
 # ─── PAGE CONFIG ────────────────────────────────────────────────────────────────
 st.set_page_config(
-    page_title="2022 Economic Freedom Index",
+    page_title="Economic Freedom Index",
     page_icon="🌍",
     layout="wide",
     initial_sidebar_state="expanded",
 )
 
-# ─── CUSTOM CSS ─────────────────────────────────────────────────────────────────
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;700;900&family=DM+Sans:wght@300;400;500;600&display=swap');
-
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-.stApp { background: #0d1117; color: #e6edf3; }
-
-section[data-testid="stSidebar"] {
-    background: #161b22 !important;
-    border-right: 1px solid #30363d;
-}
-section[data-testid="stSidebar"] .block-container { padding-top: 2rem; }
-
-.hero-header {
-    background: linear-gradient(135deg, #1a1f2e 0%, #0d1117 40%, #1c2333 100%);
-    border: 1px solid #30363d; border-radius: 16px;
-    padding: 2.5rem 3rem; margin-bottom: 2rem;
-    position: relative; overflow: hidden;
-}
-.hero-header::before {
-    content: ''; position: absolute;
-    top: -50%; right: -10%; width: 400px; height: 400px;
-    background: radial-gradient(circle, rgba(88,166,255,0.08) 0%, transparent 70%);
-    border-radius: 50%;
-}
-.hero-header::after {
-    content: ''; position: absolute;
-    bottom: -30%; left: 20%; width: 300px; height: 300px;
-    background: radial-gradient(circle, rgba(63,185,80,0.06) 0%, transparent 70%);
-    border-radius: 50%;
-}
-.hero-title {
-    font-family: 'Playfair Display', serif;
-    font-size: 2.8rem; font-weight: 900;
-    color: #e6edf3; line-height: 1.1; margin: 0 0 0.5rem 0;
-}
-.hero-subtitle {
-    font-size: 1rem; color: #8b949e;
-    font-weight: 300; letter-spacing: 0.05em;
-    text-transform: uppercase; margin: 0;
-}
-.hero-badge {
-    display: inline-block;
-    background: rgba(88,166,255,0.12);
-    border: 1px solid rgba(88,166,255,0.3);
-    color: #58a6ff; padding: 0.25rem 0.75rem;
-    border-radius: 20px; font-size: 0.75rem;
-    font-weight: 500; letter-spacing: 0.05em;
-    text-transform: uppercase; margin-bottom: 1rem;
-}
-.metric-card {
-    background: #161b22; border: 1px solid #30363d;
-    border-radius: 12px; padding: 1.25rem 1.5rem;
-    position: relative; overflow: hidden; transition: border-color 0.2s;
-}
-.metric-card:hover { border-color: #58a6ff; }
-.metric-card::before {
-    content: ''; position: absolute;
-    top: 0; left: 0; right: 0; height: 3px;
-    border-radius: 12px 12px 0 0;
-}
-.metric-card.blue::before   { background: linear-gradient(90deg,#58a6ff,#1f6feb); }
-.metric-card.green::before  { background: linear-gradient(90deg,#3fb950,#238636); }
-.metric-card.orange::before { background: linear-gradient(90deg,#f78166,#da3633); }
-.metric-card.yellow::before { background: linear-gradient(90deg,#e3b341,#9e6a03); }
-.metric-label {
-    font-size: 0.72rem; font-weight: 500; color: #8b949e;
-    text-transform: uppercase; letter-spacing: 0.08em; margin-bottom: 0.4rem;
-}
-.metric-value {
-    font-family: 'Playfair Display', serif;
-    font-size: 2rem; font-weight: 700;
-    color: #e6edf3; line-height: 1; margin-bottom: 0.2rem;
-}
-.metric-delta { font-size: 0.78rem; color: #8b949e; }
-.section-title {
-    font-family: 'Playfair Display', serif;
-    font-size: 1.4rem; font-weight: 700;
-    color: #e6edf3; margin: 0 0 0.25rem 0;
-}
-.section-desc { font-size: 0.82rem; color: #8b949e; margin-bottom: 1rem; }
-.stDownloadButton > button {
-    background: linear-gradient(135deg,#1f6feb,#388bfd) !important;
-    color: white !important; border: none !important;
-    border-radius: 8px !important; font-weight: 500 !important;
-    padding: 0.5rem 1.5rem !important; transition: all 0.2s !important;
-}
-.stDownloadButton > button:hover {
-    transform: translateY(-1px) !important;
-    box-shadow: 0 4px 16px rgba(31,111,235,0.4) !important;
-}
-.stTabs [data-baseweb="tab-list"] {
-    background: #161b22; border-radius: 10px;
-    padding: 4px; border: 1px solid #30363d; gap: 4px;
-}
-.stTabs [data-baseweb="tab"] {
-    background: transparent; border-radius: 7px;
-    color: #8b949e; font-weight: 500; font-size: 0.85rem;
-}
-.stTabs [aria-selected="true"] { background: #21262d !important; color: #e6edf3 !important; }
-hr { border-color: #30363d !important; }
-</style>
-""", unsafe_allow_html=True)
-
-# ─── THEME CONSTANTS ─────────────────────────────────────────────────────────────
-# NOTE: LAYOUT_BASE intentionally contains NO xaxis/yaxis keys.
-# Axis styling is always applied separately via update_xaxes() / update_yaxes().
-LAYOUT_BASE = dict(
-    plot_bgcolor="#0d1117",
-    paper_bgcolor="#0d1117",
-    font=dict(color="#8b949e", family="DM Sans"),
-)
-AXIS_STYLE = dict(
-    gridcolor="#21262d",
-    linecolor="#30363d",
-    zerolinecolor="#30363d",
-)
-COLORBAR_STYLE = dict(
-    tickfont=dict(color="#8b949e"),
-    title_font=dict(color="#8b949e"),
-    bgcolor="#161b22",
-    bordercolor="#30363d",
-)
-LEGEND_STYLE = dict(
-    bgcolor="#161b22",
-    bordercolor="#30363d",
-    font=dict(color="#8b949e"),
-)
-COLOR_SEQ   = ["#58a6ff","#3fb950","#f78166","#e3b341","#bc8cff","#39d353"]
-SCORE_SCALE = [[0,"#da3633"],[0.5,"#e3b341"],[1.0,"#3fb950"]]
-GEO_STYLE   = dict(
-    bgcolor="#0d1117", showframe=False,
-    showcoastlines=True, coastlinecolor="#30363d",
-    showland=True, landcolor="#161b22",
-    showocean=True, oceancolor="#0d1117",
-    showlakes=False,
+# Opt-in tracing: EFI_PROFILE=1 traces every session, the sidebar toggle only this one
+profiling.begin_run(
+    enabled=st.session_state.get("perf_panel", False),
+    session=st.session_state.setdefault("session_id", uuid.uuid4().hex[:12]),
 )
 
+# ─── CUSTOM CSS ─────────────────────────────────────────────────────────────────
+st.markdown(f"<style>{assets.page_css()}</style>", unsafe_allow_html=True)
+
 # ─── DATA ───────────────────────────────────────────────────────────────────────
-@st.cache_data
-def generate_dataset():
-    np.random.seed(42)
-    countries_data = {
-        "Singapore":      {"region":"Asia Pacific",             "rank":1,   "score":84.4,"gdp_ppp":97057,  "population":5.9,   "unemployment":2.7,  "inflation":2.3,   "financial_freedom":80,"monetary_freedom":83.2,"gdp_growth_5yr":3.8},
-        "Switzerland":    {"region":"Europe",                   "rank":2,   "score":84.2,"gdp_ppp":74102,  "population":8.7,   "unemployment":2.9,  "inflation":0.6,   "financial_freedom":80,"monetary_freedom":85.4,"gdp_growth_5yr":2.1},
-        "Ireland":        {"region":"Europe",                   "rank":3,   "score":82.0,"gdp_ppp":99013,  "population":5.1,   "unemployment":4.8,  "inflation":2.4,   "financial_freedom":70,"monetary_freedom":80.1,"gdp_growth_5yr":6.9},
-        "New Zealand":    {"region":"Asia Pacific",             "rank":4,   "score":80.6,"gdp_ppp":41824,  "population":5.1,   "unemployment":3.3,  "inflation":3.9,   "financial_freedom":80,"monetary_freedom":79.3,"gdp_growth_5yr":2.8},
-        "Luxembourg":     {"region":"Europe",                   "rank":5,   "score":80.6,"gdp_ppp":131384, "population":0.7,   "unemployment":5.1,  "inflation":3.5,   "financial_freedom":80,"monetary_freedom":82.1,"gdp_growth_5yr":3.2},
-        "Taiwan":         {"region":"Asia Pacific",             "rank":6,   "score":80.1,"gdp_ppp":55078,  "population":23.6,  "unemployment":3.8,  "inflation":1.9,   "financial_freedom":70,"monetary_freedom":83.7,"gdp_growth_5yr":4.2},
-        "Estonia":        {"region":"Europe",                   "rank":7,   "score":80.0,"gdp_ppp":38985,  "population":1.3,   "unemployment":6.2,  "inflation":4.2,   "financial_freedom":80,"monetary_freedom":78.9,"gdp_growth_5yr":3.7},
-        "Netherlands":    {"region":"Europe",                   "rank":8,   "score":79.5,"gdp_ppp":57372,  "population":17.7,  "unemployment":3.2,  "inflation":2.7,   "financial_freedom":80,"monetary_freedom":80.4,"gdp_growth_5yr":2.4},
-        "Finland":        {"region":"Europe",                   "rank":9,   "score":79.0,"gdp_ppp":49334,  "population":5.5,   "unemployment":7.7,  "inflation":2.2,   "financial_freedom":70,"monetary_freedom":82.1,"gdp_growth_5yr":1.8},
-        "Denmark":        {"region":"Europe",                   "rank":10,  "score":78.8,"gdp_ppp":60494,  "population":5.9,   "unemployment":5.0,  "inflation":1.9,   "financial_freedom":80,"monetary_freedom":83.0,"gdp_growth_5yr":2.0},
-        "Australia":      {"region":"Asia Pacific",             "rank":12,  "score":78.0,"gdp_ppp":53799,  "population":26.0,  "unemployment":4.6,  "inflation":3.8,   "financial_freedom":80,"monetary_freedom":79.8,"gdp_growth_5yr":2.7},
-        "Sweden":         {"region":"Europe",                   "rank":15,  "score":76.0,"gdp_ppp":54628,  "population":10.4,  "unemployment":8.8,  "inflation":2.2,   "financial_freedom":70,"monetary_freedom":83.4,"gdp_growth_5yr":2.1},
-        "Canada":         {"region":"Americas",                 "rank":14,  "score":76.6,"gdp_ppp":51343,  "population":38.3,  "unemployment":7.5,  "inflation":3.4,   "financial_freedom":80,"monetary_freedom":77.9,"gdp_growth_5yr":2.1},
-        "Germany":        {"region":"Europe",                   "rank":17,  "score":73.7,"gdp_ppp":52559,  "population":83.2,  "unemployment":3.6,  "inflation":3.2,   "financial_freedom":70,"monetary_freedom":79.2,"gdp_growth_5yr":1.5},
-        "South Korea":    {"region":"Asia Pacific",             "rank":19,  "score":73.8,"gdp_ppp":44501,  "population":51.7,  "unemployment":3.7,  "inflation":2.5,   "financial_freedom":70,"monetary_freedom":76.5,"gdp_growth_5yr":2.7},
-        "Chile":          {"region":"Americas",                 "rank":20,  "score":73.5,"gdp_ppp":22768,  "population":19.2,  "unemployment":8.3,  "inflation":4.5,   "financial_freedom":70,"monetary_freedom":72.1,"gdp_growth_5yr":3.1},
-        "Japan":          {"region":"Asia Pacific",             "rank":23,  "score":72.4,"gdp_ppp":40146,  "population":125.7, "unemployment":2.9,  "inflation":0.2,   "financial_freedom":60,"monetary_freedom":79.5,"gdp_growth_5yr":0.8},
-        "United Kingdom": {"region":"Europe",                   "rank":24,  "score":72.7,"gdp_ppp":46510,  "population":68.0,  "unemployment":4.5,  "inflation":2.6,   "financial_freedom":80,"monetary_freedom":78.1,"gdp_growth_5yr":1.5},
-        "United States":  {"region":"Americas",                 "rank":25,  "score":72.1,"gdp_ppp":63358,  "population":331.0, "unemployment":5.4,  "inflation":4.7,   "financial_freedom":70,"monetary_freedom":73.4,"gdp_growth_5yr":2.3},
-        "Poland":         {"region":"Europe",                   "rank":42,  "score":68.7,"gdp_ppp":33822,  "population":38.0,  "unemployment":3.4,  "inflation":5.1,   "financial_freedom":60,"monetary_freedom":73.8,"gdp_growth_5yr":3.8},
-        "Mexico":         {"region":"Americas",                 "rank":68,  "score":65.9,"gdp_ppp":19860,  "population":130.3, "unemployment":3.8,  "inflation":5.7,   "financial_freedom":60,"monetary_freedom":69.4,"gdp_growth_5yr":1.8},
-        "Indonesia":      {"region":"Asia Pacific",             "rank":67,  "score":66.0,"gdp_ppp":11812,  "population":277.5, "unemployment":6.5,  "inflation":1.6,   "financial_freedom":40,"monetary_freedom":71.9,"gdp_growth_5yr":4.7},
-        "Turkey":         {"region":"Middle East/North Africa", "rank":76,  "score":64.1,"gdp_ppp":30253,  "population":85.3,  "unemployment":12.0, "inflation":19.6,  "financial_freedom":60,"monetary_freedom":56.9,"gdp_growth_5yr":4.1},
-        "Vietnam":        {"region":"Asia Pacific",             "rank":90,  "score":61.7,"gdp_ppp":8660,   "population":98.2,  "unemployment":2.4,  "inflation":3.6,   "financial_freedom":30,"monetary_freedom":63.8,"gdp_growth_5yr":6.5},
-        "South Africa":   {"region":"Sub-Saharan Africa",       "rank":100, "score":59.3,"gdp_ppp":12489,  "population":60.0,  "unemployment":34.4, "inflation":4.6,   "financial_freedom":50,"monetary_freedom":68.2,"gdp_growth_5yr":0.6},
-        "Russia":         {"region":"Europe",                   "rank":113, "score":56.1,"gdp_ppp":27900,  "population":144.0, "unemployment":4.7,  "inflation":6.7,   "financial_freedom":40,"monetary_freedom":64.0,"gdp_growth_5yr":1.2},
-        "Nigeria":        {"region":"Sub-Saharan Africa",       "rank":123, "score":55.3,"gdp_ppp":4908,   "population":218.0, "unemployment":33.0, "inflation":16.5,  "financial_freedom":30,"monetary_freedom":55.4,"gdp_growth_5yr":1.6},
-        "India":          {"region":"Asia Pacific",             "rank":131, "score":53.9,"gdp_ppp":6590,   "population":1393.0,"unemployment":7.9,  "inflation":5.1,   "financial_freedom":40,"monetary_freedom":65.2,"gdp_growth_5yr":5.8},
-        "Brazil":         {"region":"Americas",                 "rank":133, "score":53.4,"gdp_ppp":14998,  "population":215.0, "unemployment":12.8, "inflation":8.3,   "financial_freedom":50,"monetary_freedom":65.3,"gdp_growth_5yr":0.9},
-        "Egypt":          {"region":"Middle East/North Africa", "rank":130, "score":54.0,"gdp_ppp":12255,  "population":104.3, "unemployment":7.4,  "inflation":5.2,   "financial_freedom":30,"monetary_freedom":60.3,"gdp_growth_5yr":4.5},
-        "Ukraine":        {"region":"Europe",                   "rank":130, "score":54.0,"gdp_ppp":12907,  "population":44.0,  "unemployment":9.9,  "inflation":11.0,  "financial_freedom":30,"monetary_freedom":58.2,"gdp_growth_5yr":1.2},
-        "China":          {"region":"Asia Pacific",             "rank":158, "score":48.3,"gdp_ppp":17192,  "population":1412.0,"unemployment":5.1,  "inflation":0.9,   "financial_freedom":10,"monetary_freedom":60.1,"gdp_growth_5yr":6.4},
-        "Angola":         {"region":"Sub-Saharan Africa",       "rank":157, "score":48.5,"gdp_ppp":7258,   "population":34.5,  "unemployment":10.0, "inflation":22.3,  "financial_freedom":20,"monetary_freedom":48.1,"gdp_growth_5yr":-0.2},
-        "Libya":          {"region":"Middle East/North Africa", "rank":160, "score":46.4,"gdp_ppp":10454,  "population":7.1,   "unemployment":19.3, "inflation":22.7,  "financial_freedom":20,"monetary_freedom":50.2,"gdp_growth_5yr":6.1},
-        "Sudan":          {"region":"Sub-Saharan Africa",       "rank":168, "score":38.4,"gdp_ppp":3988,   "population":45.7,  "unemployment":17.1, "inflation":163.3, "financial_freedom":10,"monetary_freedom":22.3,"gdp_growth_5yr":-2.3},
-        "Iran":           {"region":"Middle East/North Africa", "rank":168, "score":42.0,"gdp_ppp":13271,  "population":86.8,  "unemployment":9.4,  "inflation":36.5,  "financial_freedom":10,"monetary_freedom":38.2,"gdp_growth_5yr":1.1},
-        "Zimbabwe":       {"region":"Sub-Saharan Africa",       "rank":174, "score":36.1,"gdp_ppp":2628,   "population":15.1,  "unemployment":5.3,  "inflation":97.9,  "financial_freedom":20,"monetary_freedom":35.1,"gdp_growth_5yr":1.8},
-        "Cuba":           {"region":"Americas",                 "rank":173, "score":26.9,"gdp_ppp":8822,   "population":11.3,  "unemployment":1.1,  "inflation":70.0,  "financial_freedom":10,"monetary_freedom":30.1,"gdp_growth_5yr":-2.1},
-        "Venezuela":      {"region":"Americas",                 "rank":175, "score":24.7,"gdp_ppp":1548,   "population":28.7,  "unemployment":7.3,  "inflation":2665.0,"financial_freedom":10,"monetary_freedom":14.2,"gdp_growth_5yr":-12.5},
-        "North Korea":    {"region":"Asia Pacific",             "rank":176, "score":2.9, "gdp_ppp":1700,   "population":25.9,  "unemployment":0.0,  "inflation":0.0,   "financial_freedom":0, "monetary_freedom":4.2, "gdp_growth_5yr":-3.5},
-    }
-    rows = [{"Country": c, **v} for c, v in countries_data.items()]
-    df = pd.DataFrame(rows)
-    iso_map = {
-        "Singapore":"SGP","Switzerland":"CHE","Ireland":"IRL","New Zealand":"NZL",
-        "Luxembourg":"LUX","Taiwan":"TWN","Estonia":"EST","Netherlands":"NLD",
-        "Finland":"FIN","Denmark":"DNK","Australia":"AUS","Sweden":"SWE",
-        "Canada":"CAN","Germany":"DEU","South Korea":"KOR","Chile":"CHL",
-        "Japan":"JPN","United Kingdom":"GBR","United States":"USA","Poland":"POL",
-        "Mexico":"MEX","Indonesia":"IDN","Turkey":"TUR","Vietnam":"VNM",
-        "South Africa":"ZAF","Russia":"RUS","Nigeria":"NGA","India":"IND",
-        "Brazil":"BRA","Egypt":"EGY","Ukraine":"UKR","China":"CHN",
-        "Angola":"AGO","Libya":"LBY","Sudan":"SDN","Iran":"IRN",
-        "Zimbabwe":"ZWE","Cuba":"CUB","Venezuela":"VEN","North Korea":"PRK",
-    }
-    df["iso_code"] = df["Country"].map(iso_map)
-    return df
-
-df = generate_dataset()
+# Stores live in query.py and are process-wide: every session of a dataset
+# version/year (and pillar weighting) — and the HTTP API, when it runs in this
+# process — shares one read-only frame with its indexes and filtered views.
+@st.cache_resource
+def cube_geo(version):
+    # ISO-code index over the cube's countries, for year-level maps
+    return geo.GeoIndex.from_cube(query.load_cube(version))
+
+# Monte Carlo sensitivity: samples × rows ranked, and rows × rank bins counted,
+# each stay within SENSITIVITY_BUDGET (about 0.3 s). Panels too large for
+# SENSITIVITY_MIN_SAMPLES weightings within it skip the chart: fewer samples
+# would give noise, not percentiles.
+SENSITIVITY_SAMPLES     = 10_000
+SENSITIVITY_MIN_SAMPLES = 100
+SENSITIVITY_BUDGET      = 2_000_000
+
+def sensitivity_samples(n):
+    return min(SENSITIVITY_SAMPLES, SENSITIVITY_BUDGET // max(n, 1))
+
+@st.cache_resource(max_entries=16)
+def rank_sensitivity(key, multipliers, _base):
+    scorer = _base.scorer
+    n = len(scorer.matrix)
+    weights = scorer.sample_weights(sensitivity_samples(n), around=scorer.weights(multipliers))
+    bins = min(n, 1000, SENSITIVITY_BUDGET // max(n, 1))
+    pct = rank_percentiles(scorer.rank_distribution(weights, bins=bins))
+    return pd.DataFrame(pct, columns=["rank_p5", "rank_p50", "rank_p95"], index=_base.frame.index)
+
+DATA_VERSION = data_source.version()
+with profiling.section("load"):
+    data_cube  = query.load_cube(DATA_VERSION)
+    YEARS      = data_cube.years
+    MULTI_YEAR = len(YEARS) > 1
+    # A scenario link (scenarios.py) seeds the sidebar on a session's first run;
+    # from then on the sidebar writes the URL
+    SCENARIO_WARNINGS = []
+    if "scenario_loaded" not in st.session_state:
+        st.session_state["scenario_loaded"] = True
+        st.session_state.update(scenarios.from_params(
+            st.query_params.to_dict(), YEARS if MULTI_YEAR else (), set(data_cube.regions), PILLARS + [OTHER],
+            warnings=SCENARIO_WARNINGS))
+    # The sidebar year slider stores its value under "year"; read it here so the
+    # frame and engines below are those of the selected year.
+    year = st.session_state.get("year", YEARS[-1]) if MULTI_YEAR else None
+    if MULTI_YEAR and year not in YEARS:
+        year = YEARS[-1]
+    YEAR = year or YEARS[-1] or ""
+    BASE_KEY = f"{DATA_VERSION}:{year}"
+    base = store = query.base_store(DATA_VERSION, year)
+
+    # Pillar weight sliders (sidebar) store multipliers of the official weights
+    # under "weight:<column>"; at the defaults the published score and rank stand.
+    scorer  = base.scorer
+    WEIGHTS = tuple(float(st.session_state.get(f"weight:{c}", 1.0)) for c in scorer.columns)
+    if any(w != 1.0 for w in WEIGHTS):
+        store = query.weighted_store(DATA_VERSION, year, WEIGHTS)
+
+    # Derived metrics from the sidebar definitions box (session key "metrics")
+    # become extra store columns, so maps, the heatmap and the table get them
+    METRIC_ERROR = None
+    try:
+        METRICS = metrics.parse(st.session_state.get("metrics", ""))
+        if len(METRICS):
+            with profiling.section("derived metrics", rows=len(store.frame)):
+                store = query.derived_store(DATA_VERSION, year, WEIGHTS, METRICS.definitions())
+    except metrics.MetricError as exc:
+        METRICS, METRIC_ERROR = metrics.MetricSet(), str(exc)
+
+    df          = store.frame
+    engine      = store.filters
+    ranks       = store.rankings
+    corr_engine = store.correlations
+
+DATA_FINGERPRINT = store.fingerprint
+
+# Figures are built (and compacted and serialized) on a worker pool: each tab
+# submits its figures up front, then chart(name) emits them in layout order.
+FIGURE_BATCH = parallel.FigureBatch(compact=COMPACT, cache=FIGURES)
+
+def submit(name, build, data, fingerprint=None, **params):
+    # Cached on its input's content hash — or, for the large filtered frames, an
+    # equivalent key the caller passes (the store's fingerprint plus the filter) —
+    # so a view seen before, in any session or before a restart, is not rebuilt
+    key = figure_key(name, fingerprint or frame_fingerprint(data), dict(params, compact=COMPACT),
+                     theme.FINGERPRINT)
+    FIGURE_BATCH.submit(name, build, data, cache_key=key, report=profiling.active(), **params)
+
+def submit_cached(name, build, data=None, **params):
+    # Charts of the unfiltered dataset (or of data derived from it alone) are
+    # identical for every session and rerun: build once per (content hash,
+    # params, theme) and serve the shared JSON.
+    fingerprint = DATA_FINGERPRINT if data is None else frame_fingerprint(data)
+    key = figure_key(name, fingerprint, dict(params, compact=COMPACT), theme.FINGERPRINT)
+    FIGURE_BATCH.submit(name, build, df if data is None else data, cache_key=key, report=profiling.active(), **params)
+
+def chart(name, **kwargs):
+    # One instrumented block per chart: waiting on its build, then the send
+    with profiling.section(f"chart:{name}", rows=FIGURE_BATCH.rows(name)):
+        payload, seconds = FIGURE_BATCH.take(name)
+        profiling.add_span(f"build:{name}", seconds)
+        if profiling.active():
+            profiling.add_bytes(len(payload))
+        # theme=None: the figure's own template is the whole style
+        st.plotly_chart(to_figure(payload), use_container_width=True, theme=None, **kwargs)
+
+# Large scatters are binned (scatter.py). A box selection on one zooms it: the
+# next rerun reads the box back and re-bins inside it. The widget key carries a
+# generation so "Reset zoom" can start from a fresh, unselected widget.
+def zoom_key(name):
+    return f"zoom:{name}:{st.session_state.get(f'zoom:{name}', 0)}"
+
+def zoom_ranges(name):
+    state = st.session_state.get(zoom_key(name)) or {}
+    boxes = (state.get("selection") or {}).get("box") or []
+    if not boxes:
+        return None, None
+    return tuple(sorted(boxes[-1]["x"])), tuple(sorted(boxes[-1]["y"]))
+
+def reset_zoom(name):
+    st.session_state[f"zoom:{name}"] = st.session_state.get(f"zoom:{name}", 0) + 1
+
+def zoomable_chart(name, rows):
+    if rows <= scatter.MAX_POINTS:
+        chart(name)
+        return
+    chart(name, key=zoom_key(name), on_select="rerun", selection_mode="box")
+    if zoom_ranges(name)[0] is not None:
+        st.button("Reset zoom", key=f"reset:{name}", on_click=reset_zoom, args=(name,))
+
+def show_table(frame, **kwargs):
+    if profiling.active():
+        profiling.add_bytes(int(frame.memory_usage(deep=True).sum()))
+    st.dataframe(frame, use_container_width=True, hide_index=True, **kwargs)
 
 # ─── SIDEBAR ─────────────────────────────────────────────────────────────────────
 with st.sidebar:
-    st.markdown("""
+    st.markdown(f"""
     <div style='margin-bottom:1.5rem;'>
-        <div style='font-family:Playfair Display,serif;font-size:1.3rem;font-weight:700;color:#e6edf3;'>🌍 EFI Dashboard</div>
-        <div style='font-size:0.75rem;color:#8b949e;margin-top:0.25rem;'>Heritage Foundation · 2022</div>
+        <div style='font-family:Playfair Display,Georgia,serif;font-size:1.3rem;font-weight:700;color:#e6edf3;'>🌍 EFI Dashboard</div>
+        <div style='font-size:0.75rem;color:#8b949e;margin-top:0.25rem;'>Heritage Foundation · {YEAR}</div>
     </div>
     """, unsafe_allow_html=True)
     st.markdown("---")
 
     st.markdown("<div style='font-size:0.75rem;color:#8b949e;text-transform:uppercase;letter-spacing:0.08em;font-weight:600;margin-bottom:0.5rem;'>Filter by Region</div>", unsafe_allow_html=True)
-    all_regions    = ["All"] + sorted(df["region"].unique().tolist())
-    selected_region = st.selectbox("Region", all_regions, label_visibility="collapsed")
+    all_regions    = ["All"] + engine.regions
+    if st.session_state.get("region") not in all_regions:
+        st.session_state["region"] = "All"
+    selected_region = st.selectbox("Region", all_regions, key="region", label_visibility="collapsed")
 
     st.markdown("<div style='font-size:0.75rem;color:#8b949e;text-transform:uppercase;letter-spacing:0.08em;font-weight:600;margin:1rem 0 0.5rem;'>Score Range</div>", unsafe_allow_html=True)
-    score_range = st.slider("Score Range", 0, 100, (0, 100), label_visibility="collapsed")
+    st.session_state.setdefault("score_range", scenarios.DEFAULTS["score_range"])
+    score_range = st.slider("Score Range", 0, 100, key="score_range", label_visibility="collapsed")
 
     st.markdown("<div style='font-size:0.75rem;color:#8b949e;text-transform:uppercase;letter-spacing:0.08em;font-weight:600;margin:1rem 0 0.5rem;'>Top N Countries</div>", unsafe_allow_html=True)
-    top_n = st.slider("Top N", 5, 40, 20, label_visibility="collapsed")
+    st.session_state.setdefault("top_n", scenarios.DEFAULTS["top_n"])
+    top_n = st.slider("Top N", *scenarios.TOP_N_RANGE, key="top_n", label_visibility="collapsed")
+
+    st.markdown("<div style='font-size:0.75rem;color:#8b949e;text-transform:uppercase;letter-spacing:0.08em;font-weight:600;margin:1rem 0 0.5rem;'>Indicator Scale</div>", unsafe_allow_html=True)
+    SCALE = st.selectbox("Scale", list(transforms.SCALES), format_func=transforms.SCALES.get, key="scale",
+                         label_visibility="collapsed",
+                         help="Tames outliers such as hyperinflation in the inflation charts, bubble sizes and the correlation heatmap")
+
+    if MULTI_YEAR:
+        st.markdown("<div style='font-size:0.75rem;color:#8b949e;text-transform:uppercase;letter-spacing:0.08em;font-weight:600;margin:1rem 0 0.5rem;'>Index Year</div>", unsafe_allow_html=True)
+        st.session_state["year"] = YEAR
+        st.select_slider("Year", YEARS, key="year", label_visibility="collapsed")
+
+    def reset_weights():
+        for c in scorer.columns:
+            st.session_state[f"weight:{c}"] = 1.0
+
+    with st.expander("Pillar Weights", expanded=False):
+        st.markdown("<div style='font-size:0.7rem;color:#8b949e;margin-bottom:0.5rem;'>Multiplier on each pillar's official weight · score and rank are recomputed within this dataset</div>", unsafe_allow_html=True)
+        for c in scorer.columns:
+            label = "Other pillars" if c == OTHER else c.replace("_", " ").title()
+            st.session_state.setdefault(f"weight:{c}", 1.0)
+            st.slider(label, *scenarios.WEIGHT_RANGE, step=0.1, key=f"weight:{c}", format="%.1f×")
+        st.button("Reset weights", on_click=reset_weights, use_container_width=True)
+
+    def load_metric_examples():
+        st.session_state["metrics"] = metrics.EXAMPLES
+
+    with st.expander("Derived Metrics", expanded=METRIC_ERROR is not None or bool(SCENARIO_WARNINGS)):
+        st.markdown("<div style='font-size:0.7rem;color:#8b949e;margin-bottom:0.5rem;'>One per line: <code>name = expression  # label</code> · "
+                    "columns and metrics, + − × ÷ **, log, sqrt, clip, where, mean / zscore / pct_rank(x, by=region)</div>", unsafe_allow_html=True)
+        st.session_state.setdefault("metrics", "")
+        st.text_area("Definitions", key="metrics", height=120, placeholder=metrics.EXAMPLES,
+                     label_visibility="collapsed")
+        if METRIC_ERROR:
+            st.error(METRIC_ERROR)
+        for warning in SCENARIO_WARNINGS:
+            st.warning(warning)
+        st.button("Load examples", on_click=load_metric_examples, use_container_width=True)
 
     st.markdown("---")
 
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_region != "All":
-        filtered_df = filtered_df[filtered_df["region"] == selected_region]
-    filtered_df = filtered_df[
-        (filtered_df["score"] >= score_range[0]) &
-        (filtered_df["score"] <= score_range[1])
-    ]
+    # Apply filters — each distinct filter is materialized once in the shared store
+    with profiling.section("sidebar filtering"):
+        filter_key, filtered_idx, filtered_df = store.select(selected_region, score_range)
+        profiling.add_rows(len(filtered_idx))
+        # Stands in for the filtered frame's content hash: the store's plus the filter
+        VIEW_FINGERPRINT = f"{DATA_FINGERPRINT}:{filter_key}"
 
+    st.markdown("<div style='font-size:0.75rem;color:#8b949e;text-transform:uppercase;letter-spacing:0.08em;font-weight:600;margin-bottom:0.5rem;'>Export Format</div>", unsafe_allow_html=True)
+    export_fmt = st.selectbox("Export Format", list(export.FORMATS), label_visibility="collapsed")
+
+    # Downloads are encoded only when clicked (data is a callable) and cached per
+    # (dataset, filter, view, format); on_click="ignore" skips the rerun.
     st.download_button(
-        label="⬇ Download Dataset (CSV)",
-        data=filtered_df.to_csv(index=False).encode("utf-8"),
-        file_name="economic_freedom_2022.csv",
-        mime="text/csv",
+        label=f"⬇ Download Dataset ({export_fmt})",
+        data=EXPORTS.lazy((DATA_FINGERPRINT, filter_key, "raw"), lambda f=filtered_df: f, export_fmt),
+        file_name=export.file_name(f"economic_freedom_{YEAR}", export_fmt),
+        mime=export.mime(export_fmt),
+        on_click="ignore",
         use_container_width=True,
     )
+
+    # The URL mirrors the sidebar, so the address bar is always a link to this view
+    SCENARIO = scenarios.to_params(st.session_state, scorer.columns, YEARS[-1] if MULTI_YEAR else None)
+    if st.query_params.to_dict() != SCENARIO:
+        st.query_params.from_dict(SCENARIO)
+    with st.expander("Share View", expanded=False):
+        st.markdown("<div style='font-size:0.7rem;color:#8b949e;margin-bottom:0.5rem;'>Filters, year, scale, weights and metrics · opens this view, served from cache</div>", unsafe_allow_html=True)
+        st.code(scenarios.link(SCENARIO, st.context.url or ""), language=None, wrap_lines=True)
+
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown(
         f"<div style='font-size:0.72rem;color:#8b949e;text-align:center;'>"
@@ -263,369 +290,430 @@ with st.sidebar:
     )
     st.markdown("<div style='font-size:0.7rem;color:#8b949e;text-align:center;margin-top:0.3rem;'>Source: Heritage.org</div>", unsafe_allow_html=True)
 
+    st.markdown("---")
+    show_perf = st.toggle("Performance", key="perf_panel",
+                          help="Trace this session's reruns and show per-block timings")
+    perf_slot = st.container()
+
+def ranked(column, n=None, ascending=True):
+    # Filtered rows ordered by column (NaN last), optionally only the first n
+    if n is None:
+        pos = ranks.order(filter_key, filtered_idx, column, ascending)
+    else:
+        pos = ranks.top(filter_key, filtered_idx, column, n, ascending)
+    return df.take(pos)
+
+def rescaled(frame, *columns):
+    # frame with columns under the sidebar scale, from the store's per-scale cache
+    if SCALE == "raw":
+        return frame
+    values = store.scaled(SCALE)
+    return frame.assign(**{c: values[c] for c in columns})
+
 # ─── HERO ────────────────────────────────────────────────────────────────────────
-st.markdown("""
+st.markdown(f"""
 <div class="hero-header">
     <div class="hero-badge">Heritage Foundation · Index of Economic Freedom</div>
-    <div class="hero-title">2022 Global Economic<br>Freedom Dashboard</div>
+    <div class="hero-title">{YEAR} Global Economic<br>Freedom Dashboard</div>
     <div class="hero-subtitle">176 Countries · 12 Indicators · One Comprehensive View</div>
 </div>
 """, unsafe_allow_html=True)
 
 # ─── KPI CARDS ───────────────────────────────────────────────────────────────────
-n         = len(filtered_df)
-avg_score = filtered_df["score"].mean() if n else 0
-top_ctry  = filtered_df.loc[filtered_df["rank"].idxmin(), "Country"] if n else "N/A"
-avg_infl  = filtered_df["inflation"].mean() if n else 0
-
-c1, c2, c3, c4 = st.columns(4)
-with c1:
-    st.markdown(f"""<div class="metric-card blue">
-        <div class="metric-label">Countries Analyzed</div>
-        <div class="metric-value">{n}</div>
-        <div class="metric-delta">from 176 global countries</div>
-    </div>""", unsafe_allow_html=True)
-with c2:
-    st.markdown(f"""<div class="metric-card green">
-        <div class="metric-label">Avg Freedom Score</div>
-        <div class="metric-value">{avg_score:.1f}</div>
-        <div class="metric-delta">out of 100 maximum</div>
-    </div>""", unsafe_allow_html=True)
-with c3:
-    st.markdown(f"""<div class="metric-card yellow">
-        <div class="metric-label">Top Ranked (in view)</div>
-        <div class="metric-value" style="font-size:1.4rem;">{top_ctry}</div>
-        <div class="metric-delta">highest freedom score</div>
-    </div>""", unsafe_allow_html=True)
-with c4:
-    st.markdown(f"""<div class="metric-card orange">
-        <div class="metric-label">Avg Inflation Rate</div>
-        <div class="metric-value">{avg_infl:.1f}%</div>
-        <div class="metric-delta">across filtered countries</div>
-    </div>""", unsafe_allow_html=True)
+with profiling.section("kpi cards"):
+    kpi       = query.cached_kpis(store, filter_key, filtered_idx, filtered_df, VIEW_FINGERPRINT)
+    n         = kpi["countries"]
+    avg_score = kpi["avg_score"] or 0
+    top_ctry  = kpi["top_country"] or "N/A"
+    avg_infl  = kpi["avg_inflation"] or 0
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        st.markdown(f"""<div class="metric-card blue">
+            <div class="metric-label">Countries Analyzed</div>
+            <div class="metric-value">{n}</div>
+            <div class="metric-delta">from 176 global countries</div>
+        </div>""", unsafe_allow_html=True)
+    with c2:
+        st.markdown(f"""<div class="metric-card green">
+            <div class="metric-label">Avg Freedom Score</div>
+            <div class="metric-value">{avg_score:.1f}</div>
+            <div class="metric-delta">out of 100 maximum</div>
+        </div>""", unsafe_allow_html=True)
+    with c3:
+        st.markdown(f"""<div class="metric-card yellow">
+            <div class="metric-label">Top Ranked (in view)</div>
+            <div class="metric-value" style="font-size:1.4rem;">{top_ctry}</div>
+            <div class="metric-delta">highest freedom score</div>
+        </div>""", unsafe_allow_html=True)
+    with c4:
+        st.markdown(f"""<div class="metric-card orange">
+            <div class="metric-label">Avg Inflation Rate</div>
+            <div class="metric-value">{avg_infl:.1f}%</div>
+            <div class="metric-delta">across filtered countries</div>
+        </div>""", unsafe_allow_html=True)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ─── TABS ────────────────────────────────────────────────────────────────────────
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "🗺 World Maps", "📊 Rankings", "📈 Economic Trends", "🔗 Correlations", "📋 Data Table"
-])
+# Each tab body is a function so that, in lazy mode, only the active tab builds
+# and serializes its figures. EFI_LAZY_TABS=0 restores eager rendering of all tabs.
+TAB_LABELS = ["🗺 World Maps", "📊 Rankings", "📈 Economic Trends", "🔗 Correlations", "📋 Data Table"]
 
 # ══════════════════════════════════════════════════════════════════════════════════
 # TAB 1 · WORLD MAPS
 # ══════════════════════════════════════════════════════════════════════════════════
-with tab1:
-    st.markdown('<div class="section-title">2022 Economic Freedom Score — Global Choropleth</div>', unsafe_allow_html=True)
+# The "map_view" radio picks what the main map shows; every view shares the
+# geo base layer, so switching views keeps zoom and resends only the values.
+MAP_VIEWS = {"Country score": "world map", "Regional average": "region map"}
+if MULTI_YEAR and YEAR != YEARS[0]:
+    MAP_VIEWS[f"Change since {YEARS[0]}"] = "change map"
+for column, label in METRICS.labels.items():
+    MAP_VIEWS[label] = f"metric map:{column}"
+if st.session_state.get("map_view") not in MAP_VIEWS:
+    # e.g. the change view after moving the year slider back to the first year
+    st.session_state.pop("map_view", None)
+
+def main_map():
+    return MAP_VIEWS.get(st.session_state.get("map_view"), "world map")
+
+def figures_world_maps():
+    name = main_map()
+    if name == "change map":
+        change = geo.year_change(data_cube, "score", YEARS[0], YEAR, cube_geo(DATA_VERSION))
+        submit_cached(name, charts.change_map, change, start=YEARS[0], end=YEAR)
+    elif name == "region map":
+        submit_cached(name, charts.region_map)
+    elif name.startswith("metric map:"):
+        column = name.split(":", 1)[1]
+        submit_cached(name, charts.metric_map, column=column, label=METRICS.labels[column])
+    else:
+        submit_cached(name, charts.world_map)
+    submit_cached("top 40 map", charts.top_map, n=40)
+    submit_cached("bottom 15 map", charts.bottom_map, n=15)
+
+def render_world_maps():
+    st.markdown(f'<div class="section-title">{YEAR} Economic Freedom Score — Global Choropleth</div>', unsafe_allow_html=True)
     st.markdown('<div class="section-desc">Freedom index score for all 176 countries · hover for details</div>', unsafe_allow_html=True)
-
-    fig_map = px.choropleth(
-        df, locations="iso_code", color="score",
-        hover_name="Country",
-        hover_data={"rank": True, "score": ":.1f", "region": True, "iso_code": False},
-        color_continuous_scale=[[0,"#da3633"],[0.4,"#e3b341"],[0.7,"#3fb950"],[1.0,"#58a6ff"]],
-        range_color=[20, 90],
-        labels={"score": "Freedom Score", "rank": "World Rank"},
-    )
-    fig_map.update_layout(
-        **LAYOUT_BASE,
-        height=420, margin=dict(l=0, r=0, t=10, b=10),
-        coloraxis_colorbar=dict(title="Score", **COLORBAR_STYLE),
-        geo=GEO_STYLE,
-    )
-    st.plotly_chart(fig_map, use_container_width=True)
+    st.radio("Map view", list(MAP_VIEWS), horizontal=True, label_visibility="collapsed", key="map_view")
+    chart(main_map())
 
     col_a, col_b = st.columns(2)
     with col_a:
         st.markdown('<div class="section-title">Top 40 Ranking Countries</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Highlighted in orange · from the 2022 EFI</div>', unsafe_allow_html=True)
-        top40   = df[df["rank"] <= 40].assign(highlight="Top 40")
-        rest    = df[df["rank"] > 40].assign(highlight="Others")
-        fig_top = px.choropleth(
-            pd.concat([rest, top40]), locations="iso_code", color="highlight",
-            hover_name="Country",
-            hover_data={"rank": True, "score": ":.1f", "highlight": False, "iso_code": False},
-            color_discrete_map={"Top 40": "#f78166", "Others": "#21262d"},
-        )
-        fig_top.update_layout(
-            **LAYOUT_BASE, height=300,
-            margin=dict(l=0, r=0, t=10, b=10),
-            showlegend=False, geo=GEO_STYLE,
-        )
-        st.plotly_chart(fig_top, use_container_width=True)
+        st.markdown(f'<div class="section-desc">Highlighted in orange · from the {YEAR} EFI</div>', unsafe_allow_html=True)
+        chart("top 40 map")
 
     with col_b:
         st.markdown('<div class="section-title">Bottom Ranking Countries</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Lowest freedom scores highlighted in blue</div>', unsafe_allow_html=True)
-        bottom15 = df.nlargest(15, "rank").assign(highlight="Bottom 15")
-        others2  = df[~df.index.isin(bottom15.index)].assign(highlight="Others")
-        fig_bot  = px.choropleth(
-            pd.concat([others2, bottom15]), locations="iso_code", color="highlight",
-            hover_name="Country",
-            hover_data={"rank": True, "score": ":.1f", "highlight": False, "iso_code": False},
-            color_discrete_map={"Bottom 15": "#58a6ff", "Others": "#21262d"},
-        )
-        fig_bot.update_layout(
-            **LAYOUT_BASE, height=300,
-            margin=dict(l=0, r=0, t=10, b=10),
-            showlegend=False, geo=GEO_STYLE,
-        )
-        st.plotly_chart(fig_bot, use_container_width=True)
+        chart("bottom 15 map")
 
 # ══════════════════════════════════════════════════════════════════════════════════
 # TAB 2 · RANKINGS
 # ══════════════════════════════════════════════════════════════════════════════════
-with tab2:
+def figures_rankings():
+    submit("unemployment bar", charts.unemployment_bar, ranked("unemployment", top_n, ascending=False))
+    submit("population bar", charts.population_bar, ranked("population", top_n, ascending=False))
+    submit("treemap", charts.financial_treemap, filtered_df, fingerprint=VIEW_FINGERPRINT)
+    if sensitivity_samples(len(base.frame)) >= SENSITIVITY_MIN_SAMPLES:
+        with profiling.section("rank sensitivity", rows=len(df)):
+            sensitivity = rank_sensitivity(BASE_KEY, WEIGHTS, base)
+        top = ranked("rank", top_n)
+        submit("rank sensitivity", charts.rank_sensitivity, top.join(sensitivity.loc[top.index]))
+
+def render_rankings():
     col_l, col_r = st.columns(2)
 
     with col_l:
         st.markdown('<div class="section-title">Index Score by Unemployment Rate</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Column chart · unemployment % coloured by freedom score</div>', unsafe_allow_html=True)
-        df_unemp = filtered_df.sort_values("unemployment", ascending=False).head(top_n)
-        fig_unemp = px.bar(
-            df_unemp, x="Country", y="unemployment",
-            color="score", color_continuous_scale=SCORE_SCALE,
-            labels={"unemployment": "Unemployment (%)", "score": "Freedom Score"},
-            text="unemployment",
-        )
-        fig_unemp.update_traces(
-            texttemplate="%{text:.1f}", textposition="outside",
-            textfont=dict(color="#8b949e", size=9),
-        )
-        fig_unemp.update_layout(
-            **LAYOUT_BASE, height=380, margin=dict(l=10, r=10, t=20, b=60),
-            coloraxis_colorbar=dict(title="Score", **COLORBAR_STYLE),
-        )
-        fig_unemp.update_xaxes(**AXIS_STYLE, tickangle=-45)
-        fig_unemp.update_yaxes(**AXIS_STYLE)
-        st.plotly_chart(fig_unemp, use_container_width=True)
+        chart("unemployment bar")
 
     with col_r:
         st.markdown('<div class="section-title">Index Score by Population</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Horizontal bar chart · population vs freedom score</div>', unsafe_allow_html=True)
-        df_pop = filtered_df.sort_values("population", ascending=False).head(top_n)
-        fig_pop = px.bar(
-            df_pop, y="Country", x="population", orientation="h",
-            color="score", color_continuous_scale=SCORE_SCALE,
-            labels={"population": "Population (Millions)", "score": "Freedom Score"},
-        )
-        fig_pop.update_layout(
-            **LAYOUT_BASE, height=380, margin=dict(l=10, r=10, t=20, b=30),
-            coloraxis_showscale=False,
-        )
-        fig_pop.update_xaxes(**AXIS_STYLE)
-        fig_pop.update_yaxes(**AXIS_STYLE, tickfont=dict(size=10))
-        st.plotly_chart(fig_pop, use_container_width=True)
+        chart("population bar")
 
     st.markdown('<div class="section-title">Index Score by Financial Freedom (Treemap)</div>', unsafe_allow_html=True)
     st.markdown('<div class="section-desc">Treemap · relative financial freedom by region and country</div>', unsafe_allow_html=True)
-    df_tree = filtered_df.copy()
-    df_tree["size"] = df_tree["financial_freedom"] + 10
-    fig_tree = px.treemap(
-        df_tree,
-        path=[px.Constant("World"), "region", "Country"],
-        values="size", color="financial_freedom",
-        color_continuous_scale=SCORE_SCALE,
-        hover_data={"score": ":.1f", "financial_freedom": True, "size": False},
-        labels={"financial_freedom": "Financial Freedom"},
-    )
-    fig_tree.update_layout(
-        **LAYOUT_BASE, height=420, margin=dict(l=10, r=10, t=20, b=10),
-        coloraxis_colorbar=dict(title="Financial Freedom", **COLORBAR_STYLE),
-    )
-    fig_tree.update_traces(textfont=dict(size=11))
-    st.plotly_chart(fig_tree, use_container_width=True)
+    chart("treemap")
+
+    st.markdown('<div class="section-title">Rank Sensitivity to Pillar Weights</div>', unsafe_allow_html=True)
+    if sensitivity_samples(len(base.frame)) >= SENSITIVITY_MIN_SAMPLES:
+        st.markdown(f'<div class="section-desc">Top {top_n} in view · median rank under random weightings around the current ones · whiskers = 5th–95th percentile</div>', unsafe_allow_html=True)
+        chart("rank sensitivity")
+    else:
+        limit = SENSITIVITY_BUDGET // SENSITIVITY_MIN_SAMPLES
+        st.caption(f"Rank sensitivity is computed for datasets of up to {limit:,} rows; this one has {len(base.frame):,}.")
 
 # ══════════════════════════════════════════════════════════════════════════════════
 # TAB 3 · ECONOMIC TRENDS
 # ══════════════════════════════════════════════════════════════════════════════════
-with tab3:
+def figures_trends():
+    submit("gdp growth bar", charts.gdp_growth_bar, ranked("gdp_growth_5yr", top_n))
+    submit("inflation area", charts.inflation_area, rescaled(ranked("inflation", top_n, ascending=False), "inflation"),
+           scale=SCALE)
+    x_range, y_range = zoom_ranges("bubble")
+    submit("bubble", charts.gdp_bubble, rescaled(filtered_df, "population"), x_range=x_range, y_range=y_range,
+           scale=SCALE, fingerprint=f"{VIEW_FINGERPRINT}:{SCALE}")
+    if MULTI_YEAR:
+        submit("score trajectories", charts.score_trajectories,
+               data_cube.long(["score"], ranked("score", min(top_n, 10), ascending=False)["Country"]))
+        submit("animated bubble", charts.animated_bubble,
+               data_cube.long(["score", "gdp_ppp", "population"], filtered_df["Country"]),
+               fingerprint=f"{DATA_VERSION}:{VIEW_FINGERPRINT}")
+
+def render_trends():
     col_l, col_r = st.columns(2)
 
     with col_l:
         st.markdown('<div class="section-title">5-Year GDP Growth Rate</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Green = positive growth · Red = economic contraction</div>', unsafe_allow_html=True)
-        df_gdp = filtered_df.sort_values("gdp_growth_5yr").head(top_n)
-        bar_colors = ["#da3633" if v < 0 else "#3fb950" for v in df_gdp["gdp_growth_5yr"]]
-        fig_gdp = go.Figure(go.Bar(
-            x=df_gdp["Country"], y=df_gdp["gdp_growth_5yr"],
-            marker_color=bar_colors,
-            text=df_gdp["gdp_growth_5yr"].round(1),
-            textfont=dict(color="#8b949e", size=9),
-            textposition="outside",
-        ))
-        fig_gdp.add_hline(y=0, line_dash="dash", line_color="#30363d", line_width=1)
-        fig_gdp.update_layout(
-            **LAYOUT_BASE, height=360, margin=dict(l=10, r=10, t=20, b=70),
-            yaxis_title="5-Year GDP Growth Rate (%)",
-        )
-        fig_gdp.update_xaxes(**AXIS_STYLE, tickangle=-45, tickfont=dict(size=9))
-        fig_gdp.update_yaxes(**AXIS_STYLE)
-        st.plotly_chart(fig_gdp, use_container_width=True)
+        chart("gdp growth bar")
 
     with col_r:
         st.markdown('<div class="section-title">Inflation Rate by Country</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Area chart · Venezuela dominates with hyperinflation</div>', unsafe_allow_html=True)
-        df_infl  = filtered_df.sort_values("inflation", ascending=False).head(top_n)
-        fig_area = go.Figure()
-        fig_area.add_trace(go.Scatter(
-            x=df_infl["Country"], y=df_infl["inflation"],
-            fill="tozeroy", mode="lines+markers",
-            line=dict(color="#58a6ff", width=2),
-            marker=dict(size=6, color="#58a6ff"),
-            fillcolor="rgba(88,166,255,0.15)",
-            hovertemplate="<b>%{x}</b><br>Inflation: %{y:.1f}%<extra></extra>",
-        ))
-        fig_area.update_layout(
-            **LAYOUT_BASE, height=360, margin=dict(l=10, r=10, t=20, b=70),
-            yaxis_title="Inflation (%)",
-        )
-        fig_area.update_xaxes(**AXIS_STYLE, tickangle=-45, tickfont=dict(size=9))
-        fig_area.update_yaxes(**AXIS_STYLE)
-        st.plotly_chart(fig_area, use_container_width=True)
+        chart("inflation area")
 
     st.markdown('<div class="section-title">GDP per Capita (PPP) vs Freedom Score</div>', unsafe_allow_html=True)
     st.markdown('<div class="section-desc">Bubble chart · bubble size = population · coloured by region</div>', unsafe_allow_html=True)
-    fig_bubble = px.scatter(
-        filtered_df, x="score", y="gdp_ppp",
-        size="population", color="region",
-        hover_name="Country", text="Country",
-        size_max=55,
-        labels={"score":"Freedom Score","gdp_ppp":"GDP per Capita PPP (USD)","region":"Region"},
-        color_discrete_sequence=COLOR_SEQ,
-    )
-    fig_bubble.update_traces(textposition="top center", textfont=dict(size=9, color="#8b949e"))
-    fig_bubble.update_layout(
-        **LAYOUT_BASE, height=420, margin=dict(l=10, r=10, t=20, b=20),
-        legend=LEGEND_STYLE,
-    )
-    fig_bubble.update_xaxes(**AXIS_STYLE)
-    fig_bubble.update_yaxes(**AXIS_STYLE)
-    st.plotly_chart(fig_bubble, use_container_width=True)
+    zoomable_chart("bubble", len(filtered_df))
+
+    if MULTI_YEAR:
+        st.markdown(f'<div class="section-title">Score Trajectories {YEARS[0]}–{YEARS[-1]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="section-desc">Top {min(top_n, 10)} countries in view · freedom score by index year</div>', unsafe_allow_html=True)
+        chart("score trajectories")
+
+        st.markdown('<div class="section-title">Freedom vs Prosperity Over Time</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Animated bubble chart · press play to step through every index year</div>', unsafe_allow_html=True)
+        chart("animated bubble")
 
 # ══════════════════════════════════════════════════════════════════════════════════
 # TAB 4 · CORRELATIONS
 # ══════════════════════════════════════════════════════════════════════════════════
-with tab4:
+def figures_correlations():
+    submit("inflation vs unemployment", charts.inflation_unemployment_lines,
+           rescaled(ranked("inflation"), "inflation", "unemployment"), scale=SCALE,
+           fingerprint=f"{VIEW_FINGERPRINT}:inflation:{SCALE}")
+    # Least-squares trendline from the correlation engine's cell aggregates
+    fit = corr_engine.ols("monetary_freedom", "gdp_ppp", selected_region, score_range)
+    x_range, y_range = zoom_ranges("monetary scatter")
+    submit("monetary scatter", charts.monetary_scatter, filtered_df, fit=fit, x_range=x_range, y_range=y_range,
+           fingerprint=VIEW_FINGERPRINT)
+    # The method radio below stores its choice under "corr_method"
+    corr_method = st.session_state.get("corr_method", "Pearson")
+    with profiling.section("correlation matrix", rows=len(filtered_df)):
+        corr_matrix = query.correlation_matrix(store, base, selected_region, score_range, corr_method,
+                                               DATA_VERSION, year, SCALE).round(2)
+    submit("heatmap", charts.correlation_heatmap, corr_matrix)
+
+def render_correlations():
     col_l, col_r = st.columns(2)
 
     with col_l:
         st.markdown('<div class="section-title">Inflation vs Unemployment</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Line graph · correlation between the two key indicators</div>', unsafe_allow_html=True)
-        df_corr   = filtered_df.sort_values("inflation")
-        fig_corr1 = go.Figure()
-        fig_corr1.add_trace(go.Scatter(
-            x=df_corr["Country"], y=df_corr["inflation"],
-            name="Inflation (%)", mode="lines+markers",
-            line=dict(color="#f78166", width=2), marker=dict(size=5),
-        ))
-        fig_corr1.add_trace(go.Scatter(
-            x=df_corr["Country"], y=df_corr["unemployment"],
-            name="Unemployment (%)", mode="lines+markers",
-            line=dict(color="#58a6ff", width=2), marker=dict(size=5),
-        ))
-        fig_corr1.update_layout(
-            **LAYOUT_BASE, height=360, margin=dict(l=10, r=10, t=20, b=70),
-            legend=LEGEND_STYLE,
-        )
-        fig_corr1.update_xaxes(**AXIS_STYLE, tickangle=-45, showticklabels=False)
-        fig_corr1.update_yaxes(**AXIS_STYLE)
-        st.plotly_chart(fig_corr1, use_container_width=True)
+        chart("inflation vs unemployment")
 
     with col_r:
         st.markdown('<div class="section-title">GDP (PPP) vs Monetary Freedom</div>', unsafe_allow_html=True)
         st.markdown('<div class="section-desc">Scatter + numpy trendline · monetary freedom drives prosperity</div>', unsafe_allow_html=True)
-        fig_corr2 = px.scatter(
-            filtered_df, x="monetary_freedom", y="gdp_ppp",
-            color="region", hover_name="Country",
-            labels={"monetary_freedom":"Monetary Freedom Score","gdp_ppp":"GDP per Capita PPP (USD)"},
-            color_discrete_sequence=COLOR_SEQ,
-        )
-        # Manual trendline via numpy — no statsmodels needed
-        _df_t = filtered_df[["monetary_freedom","gdp_ppp"]].dropna()
-        if len(_df_t) >= 2:
-            _m, _b = np.polyfit(_df_t["monetary_freedom"], _df_t["gdp_ppp"], 1)
-            _xline = np.linspace(_df_t["monetary_freedom"].min(), _df_t["monetary_freedom"].max(), 100)
-            fig_corr2.add_trace(go.Scatter(
-                x=_xline, y=_m * _xline + _b,
-                mode="lines", name="Trend",
-                line=dict(color="#e3b341", width=2, dash="dash"),
-                showlegend=True,
-            ))
-        fig_corr2.update_layout(
-            **LAYOUT_BASE, height=360, margin=dict(l=10, r=10, t=20, b=20),
-            legend=LEGEND_STYLE,
-        )
-        fig_corr2.update_xaxes(**AXIS_STYLE)
-        fig_corr2.update_yaxes(**AXIS_STYLE)
-        st.plotly_chart(fig_corr2, use_container_width=True)
+        zoomable_chart("monetary scatter", len(filtered_df))
 
     st.markdown('<div class="section-title">Correlation Heatmap — Key Economic Indicators</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-desc">Pearson correlation matrix · green = positive · red = negative</div>', unsafe_allow_html=True)
-    corr_cols   = ["score","gdp_ppp","population","unemployment","inflation",
-                   "financial_freedom","monetary_freedom","gdp_growth_5yr"]
-    corr_matrix = filtered_df[corr_cols].corr().round(2)
-    fig_heat = go.Figure(data=go.Heatmap(
-        z=corr_matrix.values,
-        x=corr_cols, y=corr_cols,
-        colorscale=[[0,"#da3633"],[0.5,"#21262d"],[1,"#3fb950"]],
-        zmin=-1, zmax=1,
-        text=corr_matrix.values.round(2),
-        texttemplate="%{text}",
-        textfont=dict(size=10, color="#e6edf3"),
-        hoverongaps=False,
-    ))
-    fig_heat.update_layout(
-        **LAYOUT_BASE, height=380, margin=dict(l=10, r=10, t=20, b=20),
-    )
-    fig_heat.update_xaxes(**AXIS_STYLE, tickfont=dict(size=10))
-    fig_heat.update_yaxes(**AXIS_STYLE, tickfont=dict(size=10))
-    st.plotly_chart(fig_heat, use_container_width=True)
+    scale_note = "" if SCALE == "raw" else f" · on {transforms.SCALES[SCALE].lower()} values"
+    st.markdown(f'<div class="section-desc">Correlation matrix · green = positive · red = negative{scale_note}</div>', unsafe_allow_html=True)
+    st.radio("Method", ["Pearson", "Spearman"], horizontal=True, label_visibility="collapsed", key="corr_method")
+    chart("heatmap")
+
+    st.markdown('<div class="section-title">Similar Countries</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-desc">Nearest neighbours over the heatmap\'s indicators · standardized, GDP and population on a log scale · among countries in view</div>', unsafe_allow_html=True)
+    countries = sorted(df["Country"].dropna().astype(str).unique())
+    if st.session_state.get("similar_country") not in countries:
+        st.session_state["similar_country"] = kpi["top_country"] or countries[0]
+    s1, s2, s3 = st.columns([2, 2, 1])
+    with s1:
+        country = st.selectbox("Country", countries, key="similar_country")
+    with s2:
+        k = st.slider("Matches", 3, 20, 8, key="similar_k")
+    with s3:
+        across = st.toggle("Every year", key="similar_years", disabled=not MULTI_YEAR,
+                           help="Match against every country's every index year")
+    with profiling.section("similar countries", rows=len(filtered_idx)):
+        try:
+            peers = query.similar(store, country, k, filtered_idx, across and MULTI_YEAR, DATA_VERSION, year)
+        except query.QueryError as exc:
+            peers = None
+            st.info(str(exc))
+    if peers is not None:
+        names = {**data_source.DISPLAY_NAMES, **METRICS.labels, "year": "Year", "similarity": "Similarity",
+                 "distance": "Distance"}
+        show_table(peers.rename(columns=names).reset_index(drop=True), column_config={
+            "Similarity": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f")})
 
 # ══════════════════════════════════════════════════════════════════════════════════
 # TAB 5 · DATA TABLE
 # ══════════════════════════════════════════════════════════════════════════════════
-with tab5:
+def render_data_table():
     st.markdown('<div class="section-title">Country Data Explorer</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-desc">Browse the full filtered dataset · click column headers to sort</div>', unsafe_allow_html=True)
-
-    display_cols = ["Country","region","rank","score","gdp_ppp","population",
-                    "unemployment","inflation","financial_freedom","monetary_freedom","gdp_growth_5yr"]
-    display_df = filtered_df[display_cols].sort_values("rank").reset_index(drop=True)
-    display_df.columns = [
-        "Country","Region","World Rank","Freedom Score","GDP PPP (USD)",
-        "Population (M)","Unemployment %","Inflation %",
-        "Financial Freedom","Monetary Freedom","5yr GDP Growth %",
-    ]
-    st.dataframe(display_df, use_container_width=True, height=480, hide_index=True)
+    st.markdown('<div class="section-desc">Search, sort and page through the filtered dataset · only the visible page is sent to the browser</div>', unsafe_allow_html=True)
+
+    display_names = {**data_source.DISPLAY_NAMES, **METRICS.labels}
+    display_cols = list(display_names)
+    labels = {display_names[c]: c for c in display_cols}
+
+    s1, s2, s3, s4 = st.columns([2, 2, 2, 1])
+    with s1:
+        q_country = st.text_input("Search Country", key="table_q_country", placeholder="e.g. land")
+    with s2:
+        q_region = st.text_input("Search Region", key="table_q_region", placeholder="e.g. europe")
+    with s3:
+        sort_label = st.selectbox("Sort by", list(labels), index=display_cols.index("rank"), key="table_sort")
+    with s4:
+        descending = st.toggle("Descending", key="table_desc")
+
+    # Search and sort run on the shared store's indexes; only positions move around
+    with profiling.section("table query", rows=len(filtered_idx)):
+        queries = {"Country": q_country, "region": q_region}
+        rows = table.apply_search(filtered_idx, store.strings, queries)
+        query_key = (filter_key, q_country.strip().casefold(), q_region.strip().casefold())
+        order = ranks.order(query_key, rows, labels[sort_label], not descending)
+
+    p1, p2, p3 = st.columns([1, 1, 4])
+    with p1:
+        page_size = st.selectbox("Rows per page", table.PAGE_SIZES, key="table_page_size")
+    pages = max(-(-len(order) // page_size), 1)
+    # Back to page 1 whenever the result set or its order changes
+    view_key = (query_key, labels[sort_label], descending, page_size)
+    if st.session_state.get("table_view") != view_key:
+        st.session_state["table_view"] = view_key
+        st.session_state["table_page"] = 1
+    st.session_state["table_page"] = min(st.session_state.get("table_page", 1), pages)
+    with p2:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="table_page")
+    page, pages, start, stop = table.page_bounds(len(order), page, page_size)
+    with p3:
+        st.markdown(f"<div style='font-size:0.75rem;color:#8b949e;padding-top:2.2rem;'>"
+                    f"Rows <b style='color:#e6edf3'>{start + 1 if stop else 0}–{stop}</b> of "
+                    f"<b style='color:#e6edf3'>{len(order):,}</b> · page {page} of {pages}</div>",
+                    unsafe_allow_html=True)
+
+    page_df = df.take(order[start:stop])[display_cols].rename(columns=display_names)
+    show_table(page_df.reset_index(drop=True), height=min(480, 38 + 35 * max(len(page_df), 1)))
 
     dl1, dl2, _ = st.columns([1, 1, 2])
     with dl1:
         st.download_button(
             label="⬇ Download Full Dataset",
-            data=df[display_cols].sort_values("rank").to_csv(index=False).encode("utf-8"),
-            file_name="economic_freedom_2022_full.csv",
-            mime="text/csv",
+            data=EXPORTS.lazy(
+                (DATA_FINGERPRINT, "full"),
+                lambda: df.take(ranks.global_order("rank", True))[display_cols], export_fmt,
+            ),
+            file_name=export.file_name(f"economic_freedom_{YEAR}_full", export_fmt),
+            mime=export.mime(export_fmt),
+            on_click="ignore",
             use_container_width=True,
         )
     with dl2:
+        # Every matching row in the current sort order, not just this page
         st.download_button(
             label="⬇ Download Filtered",
-            data=display_df.to_csv(index=False).encode("utf-8"),
-            file_name="economic_freedom_2022_filtered.csv",
-            mime="text/csv",
+            data=EXPORTS.lazy(
+                (DATA_FINGERPRINT, query_key, labels[sort_label], descending, "display"),
+                lambda o=order: df.take(o)[display_cols].rename(columns=display_names)
+                                  .reset_index(drop=True),
+                export_fmt,
+            ),
+            file_name=export.file_name(f"economic_freedom_{YEAR}_filtered", export_fmt),
+            mime=export.mime(export_fmt),
+            on_click="ignore",
             use_container_width=True,
         )
 
+# ─── RENDER ACTIVE TAB(S) ───────────────────────────────────────────────────────
+if LAZY_TABS:
+    # The selected tab is tracked in session state under "active_tab", so it
+    # survives filter changes; switching tabs triggers a rerun of just that tab.
+    tabs = st.tabs(TAB_LABELS, key="active_tab", on_change="rerun")
+else:
+    tabs = st.tabs(TAB_LABELS)
+
+TAB_BODIES = [(figures_world_maps, render_world_maps), (figures_rankings, render_rankings),
+              (figures_trends, render_trends), (figures_correlations, render_correlations),
+              (None, render_data_table)]
+# .open is None when tabs don't track state (eager mode) — render everything
+open_tabs = [(tab, label, body) for tab, label, body in zip(tabs, TAB_LABELS, TAB_BODIES) if tab.open is not False]
+
+# Queue every visible figure before laying out the first one, so builds overlap
+# with each other and with the page's own layout work
+with profiling.section("figure submit"):
+    for _, _, (figures, _) in open_tabs:
+        if figures is not None:
+            figures()
+
+for tab, label, (_, render) in open_tabs:
+    with tab, profiling.section(f"tab:{label.split(' ', 1)[1]}"):
+        render()
+
 # ─── FOOTER ──────────────────────────────────────────────────────────────────────
 st.markdown("<br>", unsafe_allow_html=True)
-st.markdown("""
+st.markdown(f"""
 <div style='border-top:1px solid #30363d;padding-top:1.5rem;text-align:center;'>
     <div style='font-size:0.75rem;color:#8b949e;'>
         Data sourced from
         <a href='https://www.heritage.org/index/' style='color:#58a6ff;text-decoration:none;'>
-            Heritage Foundation · 2022 Index of Economic Freedom
+            Heritage Foundation · {YEAR} Index of Economic Freedom
         </a>
         &nbsp;·&nbsp; Built with Streamlit &amp; Plotly
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+# ─── PERFORMANCE PANEL ───────────────────────────────────────────────────────────
+def render_perf_panel(run):
+    spans = pd.DataFrame([
+        {"Block": sp["name"], "ms": round(sp["seconds"] * 1000, 1),
+         "Rows": sp["rows"], "KB sent": round(sp["bytes"] / 1024, 1)}
+        for sp in run["spans"]
+    ])
+    st.markdown(f"<div style='font-size:0.75rem;color:#8b949e;'>Rerun total "
+                f"<b style='color:#e6edf3'>{run['total_s'] * 1000:.0f} ms</b></div>", unsafe_allow_html=True)
+    st.dataframe(spans, use_container_width=True, hide_index=True)
+    if profiling.STARTUP:
+        st.markdown("<div style='font-size:0.7rem;color:#8b949e;'>Cold start: " + " · ".join(
+            f"{k} {v * 1000:.0f} ms" for k, v in profiling.STARTUP.items()) + "</div>", unsafe_allow_html=True)
+    fc = FIGURES.stats()
+    disk = fc.get("disk")
+    disk_note = f" · disk {disk['entries']} entries {disk['bytes'] / 2**20:.1f} MB, {disk['hits']} hits" if disk else ""
+    st.markdown(f"<div style='font-size:0.7rem;color:#8b949e;'>Figure cache: {fc['entries']} entries · "
+                f"{fc['bytes'] / 2**20:.1f} MB · {fc['hits']} hits / {fc['misses']} misses{disk_note}</div>",
+                unsafe_allow_html=True)
+    ss = store.stats()
+    own = session_bytes(st.session_state.to_dict(), store.shared_ids() | base.shared_ids())
+    st.markdown(f"<div style='font-size:0.7rem;color:#8b949e;'>Shared store: frame {ss['frame'] / 2**20:.1f} MB · "
+                f"indexes {ss['engine_bytes'] / 2**20:.1f} MB · {ss['views']} views {ss['view_bytes'] / 2**20:.1f} MB"
+                f" · this session {own / 1024:.1f} KB</div>", unsafe_allow_html=True)
+    sizes = compaction.size_report()
+    if COMPACT and sizes:
+        st.dataframe(pd.DataFrame([
+            {"Chart": name, "KB before": round(r["before"] / 1024, 1), "KB after": round(r["after"] / 1024, 1),
+             "Points": f"{r['points_out']:,} / {r['points_in']:,}", "WebGL": r["webgl_traces"]}
+            for name, r in sorted(sizes.items())
+        ]), use_container_width=True, hide_index=True)
+    ex1, ex2 = st.columns(2)
+    with ex1:
+        st.download_button("Prometheus", data=profiling.prometheus_text, file_name="efi_metrics.prom",
+                           mime="text/plain", on_click="ignore", use_container_width=True)
+    with ex2:
+        st.download_button("OTel JSON", data=lambda: json.dumps(profiling.otel_json()),
+                           file_name="efi_traces.json", mime="application/json",
+                           on_click="ignore", use_container_width=True)
+
+perf_run = profiling.end_run()
+if profiling.startup("first run", time.perf_counter() - IMPORTS_START):
+    profiling.report_startup()
+if show_perf and perf_run is not None:
+    with perf_slot:
+        render_perf_panel(perf_run)
@@ -0,0 +1,160 @@
+"""Local HTTP/JSON API over query.py.
+
+    python api.py --port 8600
+    curl 'localhost:8600/query?region=Europe&score_min=60&include=kpis,correlation'
+    curl 'localhost:8600/query?include=correlation&scale=robust_z'
+    curl 'localhost:8600/query?year=2020&weight.tax_burden=2&include=ranking&top_n=5'
+    curl 'localhost:8600/query?include=similar&country=Chile&k=5&across_years=1'
+    curl 'localhost:8600/query?metric.gdp_total=gdp_ppp*population/1000&include=correlation'
+    curl -X POST localhost:8600/batch -d '{"queries": [{"region": "Europe"}, {"region": "Americas"}]}'
+
+Built on Starlette and served by uvicorn — both already installed with
+Streamlit. Handlers are async and run queries on the threadpool. Responses
+carry an ETag (dataset version + canonical query): a request whose
+If-None-Match matches gets 304 without running the query, and result bodies
+are cached in memory and on disk (disk_cache.py), so repeated and batched
+queries are served from cache until the dataset changes — after a restart too.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import data_source
+import query
+from disk_cache import DiskCache
+from figure_cache import FigureCache
+
+RESPONSES = FigureCache(int(os.environ.get("EFI_API_CACHE_MB", "32")) * 2**20, disk=DiskCache("api"))
+MAX_BATCH = 1000
+
+
+def spec_from_params(params):
+    # Query-string form: region, year, method, scale, top_n, country, k, across_years,
+    # score_min, score_max, include=a,b, weight.<pillar>=multiplier and
+    # metric.<name>=expression
+    spec = {k: params[k] for k in ("region", "method", "scale", "year", "top_n", "country", "k", "across_years")
+            if k in params}
+    if "score_min" in params or "score_max" in params:
+        spec["score_range"] = [params.get("score_min", 0), params.get("score_max", 100)]
+    if "include" in params:
+        spec["include"] = [i for i in params["include"].split(",") if i]
+    weights = {k[len("weight."):]: v for k, v in params.items() if k.startswith("weight.")}
+    if weights:
+        spec["weights"] = weights
+    defs = {k[len("metric."):]: v for k, v in params.items() if k.startswith("metric.")}
+    if defs:
+        spec["metrics"] = defs
+    return spec
+
+
+def cached(tag, compute):
+    body = RESPONSES.lookup(tag)
+    if body is None:
+        body = json.dumps(compute(), separators=(",", ":"))
+        RESPONSES.put(tag, body)
+    return body
+
+
+def query_body(spec, version):
+    return cached(query.etag(spec, version), lambda: query.run(spec, version))
+
+
+def batch_body(specs, version):
+    # Each query is cached on its own, so overlapping batches share results;
+    # a bad query gets {"error": ...} in its slot
+    parts = []
+    for spec in specs:
+        try:
+            parts.append(query_body(spec, version))
+        except query.QueryError as exc:
+            parts.append(json.dumps(dict(error=str(exc))))
+    return '{"results":[' + ",".join(parts) + "]}"
+
+
+def batch_tag(specs, version):
+    tags = []
+    for spec in specs:
+        try:
+            tags.append(query.etag(spec, version))
+        except query.QueryError as exc:
+            tags.append(f"error:{exc}")
+    return hashlib.sha1("|".join(tags).encode()).hexdigest()[:20]
+
+
+def create_app():
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    async def respond(request, tag, body_fn):
+        etag = f'"{tag}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        body = await run_in_threadpool(body_fn)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def read_json(request):
+        try:
+            return await request.json()
+        except ValueError:
+            raise query.QueryError("request body is not valid JSON") from None
+
+    async def run_query(request):
+        try:
+            spec = await read_json(request) if request.method == "POST" else spec_from_params(request.query_params)
+            if not isinstance(spec, dict):
+                raise query.QueryError("a query is a JSON object")
+            version = data_source.version()
+            tag = query.etag(spec, version)
+            return await respond(request, tag, lambda: query_body(spec, version))
+        except query.QueryError as exc:
+            return JSONResponse(dict(error=str(exc)), status_code=400)
+
+    async def run_batch(request):
+        try:
+            payload = await read_json(request)
+            specs = payload.get("queries") if isinstance(payload, dict) else payload
+            if not isinstance(specs, list) or not all(isinstance(s, dict) for s in specs):
+                raise query.QueryError('expected {"queries": [query, ...]}')
+            if len(specs) > MAX_BATCH:
+                raise query.QueryError(f"at most {MAX_BATCH} queries per batch")
+        except query.QueryError as exc:
+            return JSONResponse(dict(error=str(exc)), status_code=400)
+        version = data_source.version()
+        tag = await run_in_threadpool(batch_tag, specs, version)
+        return await respond(request, tag, lambda: batch_body(specs, version))
+
+    async def meta(request):
+        return JSONResponse(await run_in_threadpool(query.meta))
+
+    async def health(request):
+        return JSONResponse(dict(status="ok", cache=RESPONSES.stats()))
+
+    return Starlette(routes=[
+        Route("/query", run_query, methods=["GET", "POST"]),
+        Route("/batch", run_batch, methods=["POST"]),
+        Route("/meta", meta),
+        Route("/health", health),
+    ])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    args = ap.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("api: uvicorn is required (pip install uvicorn starlette)", file=sys.stderr)
+        return 1
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
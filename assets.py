@@ -0,0 +1,110 @@
+"""Page assets: the dashboard stylesheet and its web fonts.
+
+    python assets.py fetch-fonts     # bundle the fonts under static/fonts/
+    python assets.py import-times    # cold import cost of the dashboard's modules
+
+The stylesheet (static/dashboard.css) is read and minified once per process.
+Fonts come from static/fonts/fonts.css when it exists — served by Streamlit
+itself (.streamlit/config.toml enables static serving), so the page renders
+in its own typefaces without reaching fonts.googleapis.com. Without it the
+stylesheet's font stacks fall through to system fonts: the page never makes
+a request to a third party on its own.
+"""
+import argparse
+import functools
+import hashlib
+import re
+import subprocess
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+STATIC    = Path(__file__).parent / "static"
+FONTS_DIR = STATIC / "fonts"
+FONTS_URL = ("https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;700;900"
+             "&family=DM+Sans:wght@300;400;500;600&display=swap")
+# Relative to the page, as Streamlit serves static/ at app/static/
+FONTS_HREF = "app/static/fonts"
+# fonts.googleapis.com picks the font format from the User-Agent; this one gets woff2
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+# Dashboard imports, heaviest first, for import-times
+MODULES = ("streamlit", "pandas", "numpy", "pyarrow", "plotly.graph_objects", "plotly.express",
+           "theme", "charts", "query", "api")
+
+
+def font_css():
+    local = FONTS_DIR / "fonts.css"
+    return local.read_text() if local.exists() else ""
+
+
+def minify(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,])\s*", r"\1", css).strip()
+
+
+@functools.lru_cache(maxsize=1)
+def page_css():
+    # @import / @font-face rules must come first in the sheet
+    return minify(font_css()) + minify((STATIC / "dashboard.css").read_text())
+
+
+def fetch_fonts(url=FONTS_URL, dest=FONTS_DIR):
+    # Downloads the font files behind url and writes dest/fonts.css pointing at them
+    from urllib.request import Request, urlopen
+
+    def get(u):
+        with urlopen(Request(u, headers={"User-Agent": USER_AGENT}), timeout=30) as resp:
+            return resp.read()
+
+    dest.mkdir(parents=True, exist_ok=True)
+    files = []
+
+    def local(match):
+        remote = match.group(1)
+        name = hashlib.sha1(remote.encode()).hexdigest()[:12] + Path(urlparse(remote).path).suffix
+        path = dest / name
+        if not path.exists():
+            path.write_bytes(get(remote))
+        files.append(path)
+        return f"url({FONTS_HREF}/{name})"
+
+    css = re.sub(r"url\((https://[^)]+)\)", local, get(url).decode())
+    (dest / "fonts.css").write_text(css)
+    return files
+
+
+def import_times(modules=MODULES):
+    # (module, seconds) of importing each module in a fresh interpreter, in
+    # order, so shared dependencies count toward the first module that needs them
+    code = ("import sys, time\n"
+            "for m in sys.argv[1:]:\n"
+            "    t = time.perf_counter(); __import__(m)\n"
+            "    print(m, time.perf_counter() - t)\n")
+    out = subprocess.run([sys.executable, "-c", code, *modules], capture_output=True, text=True,
+                         cwd=Path(__file__).parent, check=True).stdout
+    return [(m, float(s)) for m, s in (line.split() for line in out.splitlines())]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("command", choices=("fetch-fonts", "import-times"))
+    args = ap.parse_args(argv)
+    if args.command == "fetch-fonts":
+        try:
+            files = fetch_fonts()
+        except OSError as exc:
+            print(f"assets: could not fetch fonts: {exc}", file=sys.stderr)
+            return 1
+        print(f"{len(set(files))} font files in {FONTS_DIR}")
+    else:
+        rows = import_times()
+        for m, s in rows:
+            print(f"{m:24s} {s * 1000:8.1f} ms")
+        print(f"{'total':24s} {sum(s for _, s in rows) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
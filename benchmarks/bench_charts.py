@@ -0,0 +1,153 @@
+"""Scaling benchmarks for every chart path, on synthetic data (synthetic.py).
+
+    pytest benchmarks/bench_charts.py                                  # 10² – 10⁵ rows
+    EFI_BENCH_MAX_ROWS=10000000 pytest benchmarks/bench_charts.py      # up to 10⁷
+    pytest benchmarks/bench_charts.py --benchmark-autosave
+    pytest benchmarks/bench_charts.py --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Needs pytest-benchmark (requirements-dev.txt). Each case times what one rerun pays for a chart with
+the shared store warm — filtering, ranking or aggregating, then building,
+compacting and serializing the figure — and asserts it stays within the
+path's latency and peak-memory budget at that size. 10⁷ rows needs several GB.
+"""
+import functools
+import itertools
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import charts      # noqa: E402
+import synthetic   # noqa: E402
+import table       # noqa: E402
+from data_source import CORR_COLUMNS, DISPLAY_NAMES  # noqa: E402
+from filters import ALL  # noqa: E402
+from parallel import render_payload  # noqa: E402
+from store import DatasetStore  # noqa: E402
+
+MAX_ROWS = int(os.environ.get("EFI_BENCH_MAX_ROWS", "100000"))
+SIZES = [10**k for k in range(2, 8) if 10**k <= MAX_ROWS]
+TOP_N = 20
+PAGE_SIZE = 50
+
+# Every chart redraws within INTERACTIVE seconds. Peak memory per path is
+# (MB, MB per million rows) — payload-capped paths (top-N bar, binned scatter,
+# the heatmap's moment cells, a table page) grow only with the filtering work.
+INTERACTIVE = 1.0
+MEMORY = {
+    "choropleth": (20, 1000),
+    "treemap":    (20, 1500),
+    "bar":        (10, 60),
+    "bubble":     (20, 300),
+    "heatmap":    (10, 10),
+    "table":      (10, 50),
+}
+# Where a path stops scaling: the largest size it meets its budgets at, on one
+# core. The next size up runs as an expected failure, so the benchmark table
+# shows how far over it is; larger ones are not run. None today: maps draw one
+# feature per country (geo.GeoIndex) and the treemap caps its leaves
+# (charts.MAX_LEAVES), whatever the rows in view.
+LIMITS = {}
+
+
+def memory_budget(path, rows):
+    mb, mb_m = MEMORY[path]
+    return mb + mb_m * rows / 1e6
+
+
+def cases():
+    # (rows, path), size-major so one store is alive at a time
+    out = []
+    for rows in SIZES:
+        for path in PATHS:
+            limit = LIMITS.get(path, float("inf"))
+            marks = ()
+            if rows > limit:
+                reason = f"{path} stops scaling past {limit:,} rows"
+                marks = pytest.mark.xfail(reason=reason, strict=False, run=rows <= 10 * limit)
+            out.append(pytest.param(rows, path, marks=marks, id=f"{path}-{rows:.0e}rows"))
+    return out
+
+
+# ─── PATHS ──────────────────────────────────────────────────────────────────────
+# Each takes (store, filter) and does one rerun's work for that chart
+def _view(store, flt):
+    return store.select(*flt)
+
+
+def choropleth(store, flt):
+    _, _, view = _view(store, flt)
+    return render_payload(charts.world_map, view, {}, "world map")
+
+
+def treemap(store, flt):
+    _, _, view = _view(store, flt)
+    return render_payload(charts.financial_treemap, view, {}, "treemap")
+
+
+def bar(store, flt):
+    key, idx, _ = _view(store, flt)
+    top = store.frame.take(store.rankings.top(key, idx, "unemployment", TOP_N, False))
+    return render_payload(charts.unemployment_bar, top, {}, "unemployment bar")
+
+
+def bubble(store, flt):
+    _, _, view = _view(store, flt)
+    return render_payload(charts.gdp_bubble, view, {}, "bubble")
+
+
+def heatmap(store, flt):
+    matrix = store.correlations.pearson(*flt).round(2)
+    return render_payload(charts.correlation_heatmap, matrix, {}, "heatmap")
+
+
+def table_page(store, flt):
+    # Data Table: search, sort by score, first page of the display columns
+    key, idx, _ = _view(store, flt)
+    rows = table.apply_search(idx, store.strings, {"Country": "a", "region": ""})
+    order = store.rankings.order((key, "a", ""), rows, "score", False)
+    return store.frame.take(order[:PAGE_SIZE])[list(DISPLAY_NAMES)].rename(columns=DISPLAY_NAMES)
+
+
+PATHS = {"choropleth": choropleth, "treemap": treemap, "bar": bar, "bubble": bubble,
+         "heatmap": heatmap, "table": table_page}
+
+
+# ─── CASES ──────────────────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=1)
+def store(rows):
+    # Warm: indexes built, as after a dashboard's first session
+    s = DatasetStore(synthetic.sized(rows), CORR_COLUMNS)
+    s.filters, s.rankings, s.correlations, s.strings  # noqa: B018
+    return s
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("rows,path", cases())
+def test_chart_path(benchmark, rows, path):
+    s, fn, mb = store(rows), PATHS[path], memory_budget(path, rows)
+    # Distinct filters, more than the store's LRU caches hold, so every call
+    # pays for a filter it has not seen (nearly every row stays in view)
+    filters = itertools.cycle([(ALL, (lo / 10, 100.0)) for lo in range(300)])
+    benchmark.group = path
+    benchmark.extra_info.update(rows=rows, budget_s=INTERACTIVE, budget_mb=mb)
+    benchmark.pedantic(lambda: fn(s, next(filters)), rounds=3 if rows >= 10**6 else 10, warmup_rounds=1)
+    peak = peak_mb(lambda: fn(s, next(filters)))
+    benchmark.extra_info["peak_mb"] = round(peak, 1)
+    median = benchmark.stats.stats.median
+    assert median <= INTERACTIVE, f"{path} at {rows:,} rows: {median:.2f}s, over {INTERACTIVE:.1f}s"
+    assert peak <= mb, f"{path} at {rows:,} rows: peak {peak:.0f} MB, over {mb:.0f} MB"
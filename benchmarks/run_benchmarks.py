@@ -0,0 +1,200 @@
+"""Headless rerun benchmarks for Dashboard.py.
+
+Replays scripted widget sequences through Streamlit's AppTest on synthetic
+datasets and writes per-step and per-section timings to JSON:
+
+    python benchmarks/run_benchmarks.py --sizes 40,10000,1000000 -o bench_results.json
+    python benchmarks/run_benchmarks.py -o new.json --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import profiling    # noqa: E402
+import synthetic    # noqa: E402
+
+DEFAULT_SIZES = [40, 1_000, 10_000, 100_000, 1_000_000]
+TABS = ["🗺 World Maps", "📊 Rankings", "📈 Economic Trends", "🔗 Correlations", "📋 Data Table"]
+
+
+# ─── DATA ───────────────────────────────────────────────────────────────────────
+def write_dataset(rows, directory):
+    # A realistic panel in the dashboard's schema (synthetic.py), as Arrow
+    path = Path(directory) / f"efi_synthetic_{rows}.arrow"
+    return synthetic.write(synthetic.sized(rows), path)
+
+
+# ─── SCENARIOS ──────────────────────────────────────────────────────────────────
+# Each step mutates the AppTest (widgets / session state) before the rerun.
+# Tabs render lazily, so every scenario but "tabs" runs once per tab, with that
+# tab selected from the first run: a widget's cost is measured where it shows.
+def _region(name):
+    return lambda at: at.selectbox[0].select(name)
+
+def _score(lo, hi):
+    return lambda at: at.slider[0].set_value((lo, hi))
+
+def _top_n(n):
+    return lambda at: at.slider[1].set_value(n)
+
+def _tab(label):
+    return lambda at: at.session_state.__setitem__("active_tab", label)
+
+SCENARIOS = {
+    "regions":     [(f"region={r}", _region(r)) for r in
+                    ["Europe", "Americas", "Asia Pacific", "Sub-Saharan Africa", "All"]],
+    "score_drag":  [(f"score={lo}-{hi}", _score(lo, hi)) for lo, hi in
+                    [(10, 100), (20, 100), (30, 90), (40, 80), (50, 70), (0, 100)]],
+    "top_n_sweep": [(f"top_n={n}", _top_n(n)) for n in range(5, 41, 5)],
+    "tabs":        [(f"tab={label.split(' ', 1)[1]}", _tab(label)) for label in TABS],
+}
+
+
+# ─── MEASUREMENT ────────────────────────────────────────────────────────────────
+def payload_bytes(node):
+    # Serialized size of every element proto in the rendered tree
+    children = getattr(node, "children", None)
+    if isinstance(children, dict):
+        return sum(payload_bytes(c) for c in children.values())
+    proto = getattr(node, "proto", None)
+    return len(proto.SerializeToString()) if proto is not None else 0
+
+
+def timed_run(at, timeout):
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    at.run(timeout=timeout)
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    run = profiling.last_run() or dict(spans=[])
+    return dict(
+        wall_s=round(wall, 5),
+        peak_mb=round(peak / 2**20, 3),
+        payload_bytes=payload_bytes(at._tree),
+        sections={s["name"]: dict(seconds=round(s["seconds"], 5), bytes=s["bytes"])
+                  for s in run["spans"]},
+    )
+
+
+def runs(tabs=TABS):
+    # (scenario@tab, tab to select first or None, steps)
+    for scenario, steps in SCENARIOS.items():
+        if scenario == "tabs":
+            yield scenario, None, steps
+        else:
+            for label in tabs:
+                yield f"{scenario}@{label.split(' ', 1)[1]}", label, steps
+
+
+def bench_size(rows, path, timeout, tabs=TABS):
+    from streamlit.testing.v1 import AppTest
+    os.environ["EFI_DATA_PATH"] = str(path)
+    results = []
+    for scenario, tab, steps in runs(tabs):
+        at = AppTest.from_file(str(ROOT / "Dashboard.py"), default_timeout=timeout)
+        if tab:
+            _tab(tab)(at)
+        record = timed_run(at, timeout)
+        results.append(dict(rows=rows, scenario=scenario, step="initial", **record))
+        for step, apply in steps:
+            apply(at)
+            results.append(dict(rows=rows, scenario=scenario, step=step, **timed_run(at, timeout)))
+            print(f"  {rows:>9,} {scenario:<28} {step:<28} {results[-1]['wall_s']:.3f}s", flush=True)
+    return results
+
+
+def _clear_caches():
+    import streamlit as st
+    from export import EXPORTS
+    from figure_cache import FIGURES
+    from query import KPIS
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    FIGURES.clear()
+    KPIS.clear()
+    EXPORTS.clear()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ─── COMPARISON ─────────────────────────────────────────────────────────────────
+def compare(current, baseline, tolerance):
+    key  = lambda r: (r["rows"], r["scenario"], r["step"])
+    base = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = base.get(key(r))
+        if old is None:
+            continue
+        for metric in ("wall_s", "peak_mb", "payload_bytes"):
+            if old[metric] > 0 and r[metric] > old[metric] * (1 + tolerance):
+                regressions.append((key(r), metric, old[metric], r[metric]))
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="comma-separated synthetic row counts")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    ap.add_argument("--tabs", default=",".join(t.split(" ", 1)[1] for t in TABS),
+                    help="comma-separated tabs to run the widget scenarios on")
+    ap.add_argument("-o", "--output", default="bench_results.json")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25,
+                    help="allowed relative slowdown before a step counts as a regression")
+    ap.add_argument("--timeout", type=float, default=600)
+    args = ap.parse_args(argv)
+
+    for name in set(SCENARIOS) - set(args.scenarios.split(",")):
+        del SCENARIOS[name]
+    tabs = [t for t in TABS if t.split(" ", 1)[1] in args.tabs.split(",")]
+    profiling.enable()
+    tracemalloc.start()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [int(s) for s in args.sizes.split(",")]:
+            _clear_caches()
+            results += bench_size(rows, write_dataset(rows, tmp), args.timeout, tabs)
+    tracemalloc.stop()
+
+    import streamlit
+    report = dict(
+        meta=dict(commit=_git_commit(), created=time.time(), python=platform.python_version(),
+                  streamlit=streamlit.__version__, pandas=pd.__version__, numpy=np.__version__,
+                  lazy_tabs=os.environ.get("EFI_LAZY_TABS", "1")),
+        results=results,
+    )
+    Path(args.output).write_text(json.dumps(report, indent=1))
+    print(f"wrote {len(results)} measurements to {args.output}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for (rows, scenario, step), metric, old, new in regressions:
+            print(f"REGRESSION {rows} {scenario} {step}: {metric} {old} → {new}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
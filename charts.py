@@ -0,0 +1,381 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import geo
+import scatter
+from geo import GeoIndex, fmt
+from theme import SCORE_SCALE, TEMPLATE
+from transforms import axis_title
+
+# ─── FIGURE BUILDERS ────────────────────────────────────────────────────────────
+# Pure functions of (data, parameters); styling comes only from theme.TEMPLATE, so
+# a figure is fully determined by (data fingerprint, params, theme.FINGERPRINT).
+# plotly.express is imported inside the builders that use it: the default map
+# tab never needs it, so a cold start does not pay for loading it.
+MAP_SCALE = [[0,"#da3633"],[0.4,"#e3b341"],[0.7,"#3fb950"],[1.0,"#58a6ff"]]
+# A treemap lays out one leaf per row, about 0.35 ms each. Past MAX_LEAVES the
+# largest leaves are kept and the rest of each region is drawn as one
+# "Other (n)" leaf, colored by its size-weighted mean.
+MAX_LEAVES = int(os.environ.get("EFI_TREEMAP_MAX_LEAVES", "500"))
+
+
+def world_map(df, range_color=(20, 90), height=420):
+    # One feature per country: sub-national rows show their mean score and best rank
+    index = GeoIndex.from_frame(df)
+    text = geo.hover_text(index.names, **{
+        "World Rank": fmt(index.take(df["rank"], "min"), "{:.0f}"),
+        "Freedom Score": fmt(index.take(df["score"])),
+        "Region": index.region_names,
+        **index.units(),
+    })
+    return geo.choropleth(index, index.take(df["score"]), text, MAP_SCALE, range_color, colorbar="Score", height=height)
+
+
+def highlight_map(df, mask, label, color, height=300):
+    # A country is marked when any of its rows is; label names the marked set in the hover
+    index = GeoIndex.from_frame(df)
+    marked = index.take(np.asarray(mask, dtype="float64"), "max") > 0
+    text = geo.hover_text(index.names, **{
+        label: np.where(marked, "yes", "no"),
+        "World Rank": fmt(index.take(df["rank"], "min"), "{:.0f}"),
+        "Freedom Score": fmt(index.take(df["score"])),
+        **index.units(),
+    })
+    scale = [[0, "#21262d"], [1, color]]
+    return geo.choropleth(index, marked.astype("int8"), text, scale, (0, 1), height=height)
+
+
+def top_map(df, n=40):
+    return highlight_map(df, (df["rank"] <= n).fillna(False).to_numpy(dtype=bool), f"Top {n}", "#f78166")
+
+
+def bottom_map(df, n=15):
+    mask = df.index.isin(df.nlargest(n, "rank").index)
+    return highlight_map(df, mask, f"Bottom {n}", "#58a6ff")
+
+
+def region_map(df, column="score", range_color=(20, 90), height=420):
+    # Every country coloured by its region's mean; hover shows the region and its size
+    index = GeoIndex.from_frame(df)
+    means, counts = index.region_stats(df[column])
+    z = index.by_region(means)
+    text = geo.hover_text(index.region_names, **{
+        "Regional average": fmt(z),
+        "Countries": fmt(index.by_region(counts), "{:.0f}"),
+        "Country": index.names,
+    })
+    return geo.choropleth(index, z, text, MAP_SCALE, range_color, colorbar="Avg score", height=height)
+
+
+def metric_map(df, column, label=None, height=420):
+    # Any numeric column (derived metrics included) on the score map's scale,
+    # stretched over the column's own range
+    index = GeoIndex.from_frame(df)
+    z = index.take(df[column])
+    text = geo.hover_text(index.names, **{
+        label or column: fmt(z, "{:,.2f}"),
+        "Freedom Score": fmt(index.take(df["score"])),
+        "Region": index.region_names,
+        **index.units(),
+    })
+    zrange = (float(np.nanmin(z)), float(np.nanmax(z))) if np.isfinite(z).any() else None
+    return geo.choropleth(index, z, text, MAP_SCALE, zrange, colorbar=label or column, height=height)
+
+
+def change_map(df, start, end, height=420):
+    # df: geo.year_change() output; diverging scale centred on no change
+    bound = float(np.nanmax(np.abs(df["change"]))) if df["change"].notna().any() else 1.0
+    index = GeoIndex.from_frame(df)
+    text = geo.hover_text(index.names, **{
+        str(start): fmt(index.take(df["start"])), str(end): fmt(index.take(df["end"])),
+        "Change": fmt(index.take(df["change"]), "{:+.1f}"),
+    })
+    scale = [[0, "#da3633"], [0.5, "#21262d"], [1, "#3fb950"]]
+    return geo.choropleth(index, index.take(df["change"]), text, scale, (-bound, bound),
+                          colorbar="Δ score", height=height)
+
+
+def unemployment_bar(df):
+    import plotly.express as px
+
+    fig = px.bar(
+        df, x="Country", y="unemployment",
+        color="score", color_continuous_scale=SCORE_SCALE,
+        labels={"unemployment": "Unemployment (%)", "score": "Freedom Score"},
+        text="unemployment",
+        template=TEMPLATE,
+    )
+    fig.update_traces(
+        texttemplate="%{text:.1f}", textposition="outside",
+        textfont=dict(color="#8b949e", size=9),
+    )
+    fig.update_layout(
+        height=380, margin=dict(l=10, r=10, t=20, b=60),
+        coloraxis_colorbar=dict(title="Score"),
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+
+def population_bar(df):
+    import plotly.express as px
+
+    fig = px.bar(
+        df, y="Country", x="population", orientation="h",
+        color="score", color_continuous_scale=SCORE_SCALE,
+        labels={"population": "Population (Millions)", "score": "Freedom Score"},
+        template=TEMPLATE,
+    )
+    fig.update_layout(
+        height=380, margin=dict(l=10, r=10, t=20, b=30),
+        coloraxis_showscale=False,
+    )
+    fig.update_yaxes(tickfont=dict(size=10))
+    return fig
+
+
+def rank_sensitivity(df):
+    # Median rank with a 5th–95th percentile whisker; best ranks at the top
+    fig = go.Figure(go.Scatter(
+        x=df["rank_p50"], y=df["Country"], mode="markers",
+        error_x=dict(type="data", symmetric=False,
+                     array=df["rank_p95"] - df["rank_p50"], arrayminus=df["rank_p50"] - df["rank_p5"],
+                     color="#58a6ff", thickness=1.5, width=4),
+        marker=dict(size=8, color=df["score"], colorscale=SCORE_SCALE, line=dict(width=0)),
+        customdata=df[["rank_p5", "rank_p95"]],
+        hovertemplate="<b>%{y}</b><br>Median rank %{x}<br>5th–95th pct: %{customdata[0]}–%{customdata[1]}<extra></extra>",
+    ))
+    fig.update_layout(
+        template=TEMPLATE, height=max(300, 22 * len(df) + 60), margin=dict(l=10, r=10, t=20, b=30),
+        xaxis_title="Rank under sampled weights",
+    )
+    fig.update_yaxes(autorange="reversed", tickfont=dict(size=10))
+    return fig
+
+
+def treemap_leaves(df, max_leaves=None):
+    max_leaves = MAX_LEAVES if max_leaves is None else max_leaves
+    leaves = df[["region", "Country", "score", "financial_freedom"]].assign(size=df["financial_freedom"] + 10)
+    if len(leaves) <= max_leaves:
+        return leaves
+    # One slot per region for its Other leaf; the rest go to the largest rows
+    keep = max(max_leaves - leaves["region"].nunique(), 0)
+    size = leaves["size"].fillna(-np.inf).to_numpy()
+    kept = np.zeros(len(leaves), dtype=bool)
+    if keep:
+        kept[np.argpartition(-size, keep - 1)[:keep]] = True
+    rest = leaves[~kept]
+    other = (rest.assign(weighted=rest["financial_freedom"] * rest["size"])
+             .groupby("region", observed=True, sort=False)
+             .agg(n=("size", "size"), size=("size", "sum"), weighted=("weighted", "sum"), score=("score", "mean"))
+             .reset_index())
+    other["financial_freedom"] = other["weighted"] / other["size"]
+    other["Country"] = [f"Other ({n:,})" for n in other["n"]]
+    return pd.concat([leaves[kept], other[leaves.columns]], ignore_index=True)
+
+
+def financial_treemap(df):
+    import plotly.express as px
+
+    df_tree = treemap_leaves(df)
+    fig = px.treemap(
+        df_tree,
+        path=[px.Constant("World"), "region", "Country"],
+        values="size", color="financial_freedom",
+        color_continuous_scale=SCORE_SCALE,
+        hover_data={"score": ":.1f", "financial_freedom": True, "size": False},
+        labels={"financial_freedom": "Financial Freedom"},
+        template=TEMPLATE,
+    )
+    fig.update_layout(
+        height=420, margin=dict(l=10, r=10, t=20, b=10),
+        coloraxis_colorbar=dict(title="Financial Freedom"),
+    )
+    fig.update_traces(textfont=dict(size=11))
+    return fig
+
+
+def gdp_growth_bar(df):
+    bar_colors = ["#da3633" if v < 0 else "#3fb950" for v in df["gdp_growth_5yr"]]
+    fig = go.Figure(go.Bar(
+        x=df["Country"], y=df["gdp_growth_5yr"],
+        marker_color=bar_colors,
+        text=df["gdp_growth_5yr"].round(1),
+        textfont=dict(color="#8b949e", size=9),
+        textposition="outside",
+    ))
+    fig.add_hline(y=0, line_dash="dash", line_color="#30363d", line_width=1)
+    fig.update_layout(
+        template=TEMPLATE, height=360, margin=dict(l=10, r=10, t=20, b=70),
+        yaxis_title="5-Year GDP Growth Rate (%)",
+    )
+    fig.update_xaxes(tickangle=-45, tickfont=dict(size=9))
+    return fig
+
+
+def inflation_area(df, scale="raw"):
+    # scale: the transforms.py scale df["inflation"] is already in
+    hover = "Inflation: %{y:.1f}%" if scale == "raw" else f"{axis_title('Inflation', scale)}: %{{y:.2f}}"
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df["Country"], y=df["inflation"],
+        fill="tozeroy", mode="lines+markers",
+        line=dict(color="#58a6ff", width=2),
+        marker=dict(size=6, color="#58a6ff"),
+        fillcolor="rgba(88,166,255,0.15)",
+        hovertemplate=f"<b>%{{x}}</b><br>{hover}<extra></extra>",
+    ))
+    fig.update_layout(
+        template=TEMPLATE, height=360, margin=dict(l=10, r=10, t=20, b=70),
+        yaxis_title=axis_title("Inflation (%)", scale),
+    )
+    fig.update_xaxes(tickangle=-45, tickfont=dict(size=9))
+    return fig
+
+
+BUBBLE_LABELS = {"score":"Freedom Score","gdp_ppp":"GDP per Capita PPP (USD)","region":"Region"}
+MONETARY_LABELS = {"monetary_freedom":"Monetary Freedom Score","gdp_ppp":"GDP per Capita PPP (USD)"}
+
+
+def gdp_bubble(df, x_range=None, y_range=None, scale="raw"):
+    # Above scatter.MAX_POINTS points in view: density cells and top-k labels.
+    # scale: the transforms.py scale df["population"] (bubble size) is in
+    if scatter.dense(df, "score", "gdp_ppp", x_range, y_range):
+        return scatter.density_figure(df, "score", "gdp_ppp", x_range=x_range, y_range=y_range,
+                                      titles=BUBBLE_LABELS, trend=False)
+    import plotly.express as px
+
+    labels = BUBBLE_LABELS
+    # Sizes must be numbers ≥ 0: a missing population draws the smallest bubble,
+    # and a robust z-score is shifted so the smallest is 0
+    size = df["population"].fillna(df["population"].min()).fillna(0)
+    df = df.assign(population=size - min(size.min(), 0))
+    if scale != "raw":
+        labels = dict(BUBBLE_LABELS, population=axis_title("Population", scale))
+    fig = px.scatter(
+        df, x="score", y="gdp_ppp",
+        size="population", color="region",
+        hover_name="Country", text="Country",
+        size_max=55,
+        labels=labels,
+        template=TEMPLATE,
+    )
+    fig.update_traces(textposition="top center", textfont=dict(size=9, color="#8b949e"))
+    if scale != "raw":
+        fig.update_traces(marker_sizemin=3)
+    fig.update_layout(
+        height=420, margin=dict(l=10, r=10, t=20, b=20),
+    )
+    fig.update_xaxes(range=x_range)
+    fig.update_yaxes(range=y_range)
+    return fig
+
+
+def score_trajectories(df):
+    import plotly.express as px
+
+    fig = px.line(
+        df, x="year", y="score", color="Country", markers=True,
+        labels={"score":"Freedom Score","year":"Year"},
+        template=TEMPLATE,
+    )
+    fig.update_traces(line=dict(width=2), marker=dict(size=4))
+    fig.update_layout(
+        height=380, margin=dict(l=10, r=10, t=20, b=20),
+    )
+    fig.update_xaxes(dtick=1 if df["year"].nunique() <= 12 else None)
+    return fig
+
+
+def animated_bubble(df):
+    # gdp_bubble over every year; fixed axis ranges keep frames comparable
+    import plotly.express as px
+
+    df = df.dropna(subset=["gdp_ppp"]).assign(population=lambda d: d["population"].fillna(0))
+    fig = px.scatter(
+        df, x="score", y="gdp_ppp",
+        size="population", color="region",
+        hover_name="Country",
+        animation_frame="year", animation_group="Country",
+        size_max=55,
+        range_x=[df["score"].min() - 5, df["score"].max() + 5],
+        range_y=[0, df["gdp_ppp"].max() * 1.1],
+        labels={"score":"Freedom Score","gdp_ppp":"GDP per Capita PPP (USD)","region":"Region","year":"Year"},
+        template=TEMPLATE,
+    )
+    fig.update_layout(
+        height=460, margin=dict(l=10, r=10, t=20, b=20),
+    )
+    return fig
+
+
+def inflation_unemployment_lines(df, scale="raw"):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df["Country"], y=df["inflation"],
+        name=axis_title("Inflation (%)", scale), mode="lines+markers",
+        line=dict(color="#f78166", width=2), marker=dict(size=5),
+    ))
+    fig.add_trace(go.Scatter(
+        x=df["Country"], y=df["unemployment"],
+        name=axis_title("Unemployment (%)", scale), mode="lines+markers",
+        line=dict(color="#58a6ff", width=2), marker=dict(size=5),
+    ))
+    fig.update_layout(
+        template=TEMPLATE, height=360, margin=dict(l=10, r=10, t=20, b=70),
+    )
+    fig.update_xaxes(tickangle=-45, showticklabels=False)
+    return fig
+
+
+def monetary_scatter(df, fit=None, x_range=None, y_range=None):
+    # fit: (slope, intercept, x_min, x_max) from CorrelationEngine.ols, or None.
+    # Binned mode fits its own trendline from the cell moments of the view.
+    if scatter.dense(df, "monetary_freedom", "gdp_ppp", x_range, y_range):
+        return scatter.density_figure(df, "monetary_freedom", "gdp_ppp", x_range=x_range, y_range=y_range,
+                                      titles=MONETARY_LABELS, height=360, width_px=600)
+    import plotly.express as px
+
+    fig = px.scatter(
+        df, x="monetary_freedom", y="gdp_ppp",
+        color="region", hover_name="Country",
+        labels=MONETARY_LABELS,
+        template=TEMPLATE,
+    )
+    if fit is not None:
+        m, b, x_min, x_max = fit
+        xline = np.linspace(x_min, x_max, 100)
+        fig.add_trace(go.Scatter(
+            x=xline, y=m * xline + b,
+            mode="lines", name="Trend",
+            line=dict(color="#e3b341", width=2, dash="dash"),
+            showlegend=True,
+        ))
+    fig.update_layout(
+        height=360, margin=dict(l=10, r=10, t=20, b=20),
+    )
+    fig.update_xaxes(range=x_range)
+    fig.update_yaxes(range=y_range)
+    return fig
+
+
+def correlation_heatmap(corr_matrix):
+    fig = go.Figure(data=go.Heatmap(
+        z=corr_matrix.values,
+        x=list(corr_matrix.columns), y=list(corr_matrix.index),
+        colorscale=[[0,"#da3633"],[0.5,"#21262d"],[1,"#3fb950"]],
+        zmin=-1, zmax=1,
+        text=corr_matrix.values.round(2),
+        texttemplate="%{text}",
+        textfont=dict(size=10, color="#e6edf3"),
+        hoverongaps=False,
+    ))
+    fig.update_layout(
+        template=TEMPLATE, height=380, margin=dict(l=10, r=10, t=20, b=20),
+    )
+    fig.update_xaxes(tickfont=dict(size=10))
+    fig.update_yaxes(tickfont=dict(size=10))
+    return fig
@@ -0,0 +1,242 @@
+import base64
+import os
+import re
+import threading
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+# Figure compaction before figures go over the websocket:
+#   · numeric arrays → base64 typed arrays in the narrowest exact dtype
+#     (whole-number floats → i1/i2/i4); large traces' coordinates also go to f4
+#   · customdata columns that no hover/text template references are dropped
+#   · scatter traces above GL_THRESHOLD points switch to WebGL (scattergl)
+#   · traces above MAX_POINTS are down-sampled (min/max buckets for lines,
+#     even stride for markers) with every per-point array kept aligned
+GL_THRESHOLD = int(os.environ.get("EFI_GL_THRESHOLD", "1000"))
+MAX_POINTS   = int(os.environ.get("EFI_MAX_POINTS", "20000"))
+
+POINT_KEYS = ("x", "y", "z", "lat", "lon", "locations", "text", "hovertext", "customdata", "ids",
+              "marker.size", "marker.color", "marker.opacity", "marker.symbol")
+_CUSTOM_REF = re.compile(r"customdata\[(\d+)\]")
+# Values shown verbatim in labels stay exact: Float32 would print as 84.40000153
+TEXT_KEYS = ("text", "hovertext", "customdata")
+SMALL_ARRAY = 256
+
+_lock = threading.Lock()
+REPORTS = {}  # chart name → size report of its latest compaction
+
+
+# ─── TYPED ARRAYS ───────────────────────────────────────────────────────────────
+def _is_spec(v):
+    return isinstance(v, dict) and "bdata" in v and "dtype" in v
+
+
+def decode(v):
+    # Numeric ndarray for typed-array specs, numeric lists and arrays; None otherwise
+    if _is_spec(v):
+        arr = np.frombuffer(base64.b64decode(v["bdata"]), dtype="<" + v["dtype"])
+        if "shape" in v:
+            arr = arr.reshape([int(s) for s in str(v["shape"]).split(",")])
+        return arr
+    if isinstance(v, (list, tuple)):
+        v = np.asarray(v) if v and not isinstance(v[0], (str, dict)) else None
+    if isinstance(v, np.ndarray) and v.dtype.kind in "fiub" and v.size:
+        return v
+    return None
+
+
+def _narrow(arr, allow_f4=False):
+    # plotly.js typed-array codes are numpy's kind + itemsize (little-endian)
+    if arr.dtype.kind == "b":
+        return arr.astype("u1")
+    if arr.dtype.kind == "f" and arr.size and np.isfinite(arr).all() and (arr == np.round(arr)).all():
+        arr = arr.astype("i8")
+    if arr.dtype.kind in "iu":
+        for dtype in ("i1", "u1", "i2", "u2", "i4", "u4"):
+            info = np.iinfo(dtype)
+            if arr.min() >= info.min and arr.max() <= info.max:
+                return arr.astype(dtype)
+        return arr.astype("f8")
+    if allow_f4:
+        f4 = arr.astype("f4")
+        if np.allclose(f4, arr, rtol=1e-6, atol=0, equal_nan=True):
+            return f4
+    return arr.astype("f8")
+
+
+def encode(arr, allow_f4=False):
+    arr = _narrow(np.asarray(arr), allow_f4)
+    code = f"{arr.dtype.kind}{arr.dtype.itemsize}"
+    raw = np.ascontiguousarray(arr, dtype="<" + code).tobytes()
+    spec = dict(dtype=code, bdata=base64.b64encode(raw).decode())
+    if arr.ndim > 1:
+        spec["shape"] = ",".join(map(str, arr.shape))
+    return spec
+
+
+# ─── TRACE PASSES ───────────────────────────────────────────────────────────────
+def _get(trace, dotted):
+    node = trace
+    for part in dotted.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def _set(trace, dotted, value):
+    *parents, leaf = dotted.split(".")
+    node = trace
+    for part in parents:
+        node = node.setdefault(part, {})
+    node[leaf] = value
+
+
+def _length(v):
+    if _is_spec(v):
+        return len(decode(v))
+    return len(v) if isinstance(v, (list, tuple, np.ndarray)) else None
+
+
+def _point_count(trace):
+    for key in ("x", "y", "z", "locations", "lat"):
+        n = _length(_get(trace, key))
+        if n:
+            return n
+    return 0
+
+
+def prune_customdata(trace):
+    custom = trace.get("customdata")
+    if custom is None:
+        return
+    templates = " ".join(str(trace.get(k) or "") for k in ("hovertemplate", "texttemplate"))
+    if re.search(r"customdata(?!\[)", templates):
+        return  # whole-row references — leave untouched
+    used = sorted({int(i) for i in _CUSTOM_REF.findall(templates)})
+    if not used:
+        del trace["customdata"]
+        return
+    numeric = decode(custom)
+    rows = numeric.tolist() if numeric is not None else list(custom)
+    if not rows or not isinstance(rows[0], (list, tuple)) or len(used) == len(rows[0]):
+        return
+    remap = {old: new for new, old in enumerate(used)}
+    trace["customdata"] = [[row[i] for i in used] for row in rows]
+    for k in ("hovertemplate", "texttemplate"):
+        if trace.get(k):
+            trace[k] = _CUSTOM_REF.sub(lambda m: f"customdata[{remap[int(m.group(1))]}]", trace[k])
+
+
+def _x_key(trace, n):
+    # Traces drawn against the same x values on the same x-axis — a shared
+    # categorical axis, e.g. two indicators per country — must keep the same
+    # points, or each would keep different categories and the axis scrambles
+    x = _get(trace, "x")
+    arr = decode(x)
+    values = arr.tobytes() if arr is not None else (tuple(map(str, x)) if _length(x) == n else id(trace))
+    return trace.get("xaxis") or "x", n, values
+
+
+def _selection(traces, n, max_points):
+    # One selection for a group of traces sharing their x values
+    lines = []
+    for trace in traces:
+        y = decode(_get(trace, "y")) if "lines" in str(trace.get("mode", "")) else None
+        if y is not None and y.ndim == 1 and len(y) == n:
+            lines.append(np.nan_to_num(y.astype("f8"), nan=0.0))
+    if lines:
+        # Keep first/min/max/last of each bucket of every line so peaks survive
+        # decimation; fewer buckets per line keep the union within max_points
+        buckets = np.array_split(np.arange(n), max(max_points // (4 * len(lines)), 1))
+        keep = set()
+        for b in buckets:
+            keep.update((b[0], b[-1]))
+            for y in lines:
+                seg = y[b]
+                keep.update((b[np.argmin(seg)], b[np.argmax(seg)]))
+        return np.array(sorted(keep))
+    return np.unique(np.linspace(0, n - 1, max_points).astype(np.intp))
+
+
+def downsample(traces, max_points):
+    # traces: the figure's traces; those above max_points are decimated, with
+    # every group on shared x values cut at the same positions. Returns the
+    # point count of each trace afterwards.
+    counts = [_point_count(t) for t in traces]
+    groups = {}
+    for trace, n in zip(traces, counts):
+        if n > max_points:
+            groups.setdefault(_x_key(trace, n), []).append(trace)
+    for (_, n, _), group in groups.items():
+        sel = _selection(group, n, max_points)
+        for trace in group:
+            for key in POINT_KEYS:
+                v = _get(trace, key)
+                if _length(v) != n:
+                    continue
+                arr = decode(v)
+                if arr is not None:
+                    _set(trace, key, arr[sel])
+                else:
+                    _set(trace, key, [v[i] for i in sel])
+    return [_point_count(t) if n > max_points else n for t, n in zip(traces, counts)]
+
+
+def encode_arrays(trace, allow_f4):
+    for key in POINT_KEYS + ("values",):
+        v = _get(trace, key)
+        arr = decode(v) if v is not None else None
+        if arr is None:
+            continue
+        spec = encode(arr, allow_f4 and key not in TEXT_KEYS)
+        # A short list can be smaller as JSON text than as base64
+        if arr.size < SMALL_ARRAY and len(to_json_plotly(spec)) >= len(to_json_plotly(arr)):
+            continue
+        _set(trace, key, spec)
+
+
+# ─── ENTRY POINT ────────────────────────────────────────────────────────────────
+def compact(fig, name=None, report=False, gl_threshold=None, max_points=None):
+    gl_threshold = GL_THRESHOLD if gl_threshold is None else gl_threshold
+    max_points   = MAX_POINTS if max_points is None else max_points
+    before = len(fig.to_json()) if report else None
+    d = fig.to_dict()
+    gl = 0
+    # Animation frames must keep the traces' type and points aligned with the
+    # base traces, so animated figures are only re-encoded
+    animated = bool(d.get("frames"))
+    traces = d.get("data", [])
+    for trace in traces:
+        prune_customdata(trace)
+    counts = [_point_count(t) for t in traces]
+    points_in = sum(counts)
+    points_out = points_in if animated else sum(downsample(traces, max_points))
+    for trace, n in zip(traces, counts):
+        if not animated and trace.get("type", "scatter") == "scatter" and n > gl_threshold:
+            trace["type"] = "scattergl"
+            gl += 1
+        encode_arrays(trace, allow_f4=n > gl_threshold)
+    for frame in d.get("frames", []):
+        for trace in frame.get("data", []):
+            prune_customdata(trace)
+            encode_arrays(trace, allow_f4=_point_count(trace) > gl_threshold)
+    out = go.Figure(d, _validate=False)
+    if report:
+        after = len(to_json_plotly(d))
+        record(name, dict(before=before, after=after, points_in=points_in,
+                          points_out=points_out, webgl_traces=gl))
+    return out
+
+
+def record(name, report):
+    # Also used for reports made in another process (parallel.FigureBatch)
+    with _lock:
+        REPORTS[name or "figure"] = report
+
+
+def size_report():
+    with _lock:
+        return {k: dict(v) for k, v in REPORTS.items()}
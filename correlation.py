@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from filters import ALL
+
+# Relative tolerance under which a column's variance is rounding error (_flat)
+VAR_RTOL = 1e-9
+
+
+def _column_means(X):
+    # nanmean without the empty-slice warning: an all-missing column averages to 0
+    present = (~np.isnan(X)).sum(axis=0)
+    return np.where(present > 0, np.nansum(X, axis=0) / np.maximum(present, 1), 0.0)
+
+
+def _moments(X0, M):
+    # Pairwise-complete sufficient statistics for k columns, each k×k:
+    #   n[i,j]   rows where both i and j are present
+    #   s[i,j]   Σ x_i over those rows        (s[j,i] is Σ x_j)
+    #   ss[i,j]  Σ x_i² over those rows
+    #   sxy[i,j] Σ x_i·x_j
+    Mf = M.astype("float64")
+    return np.stack([Mf.T @ Mf, X0.T @ Mf, (X0 * X0).T @ Mf, X0.T @ X0])
+
+
+def _extrema(X, M):
+    # lo[i,j] / hi[i,j]: min / max of x_i over rows where both i and j are present
+    k = X.shape[1]
+    lo = np.full((k, k), np.inf)
+    hi = np.full((k, k), -np.inf)
+    for j in range(k):
+        both = M & M[:, [j]]
+        if both.any():
+            lo[:, j] = np.where(both, X, np.inf).min(axis=0)
+            hi[:, j] = np.where(both, X, -np.inf).max(axis=0)
+    return lo, hi
+
+
+def _flat(varx, ss):
+    # A column that is constant over the rows leaves only rounding residue in
+    # Σx² − (Σx)²/n, relative to Σx² — not an exact 0. Treat it as zero variance.
+    return varx <= VAR_RTOL * ss
+
+
+def pearson_from_moments(mom):
+    n, s, ss, sxy = mom
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov  = sxy - s * s.T / n
+        varx = ss - s * s / n
+        r = cov / np.sqrt(varx * varx.T)
+    flat = _flat(varx, ss)
+    # NaN where DataFrame.corr() gives NaN: under two rows, or a constant column
+    r[(n < 2) | flat | flat.T] = np.nan
+    return np.clip(r, -1, 1)
+
+
+class CorrelationEngine:
+    # Rows are bucketed into cells of (year, region, score bucket) and each cell
+    # keeps the moments above. Any (region, score_range[, years]) filter is the
+    # sum of the cells it fully covers plus an exact pass over the rows of the
+    # (at most two per region/year) boundary buckets — never a full rescan.
+    # values: the columns' data (rows × columns) when it is not df's own, e.g.
+    # under a transforms.py scale; rows are still bucketed on df's score.
+    def __init__(self, df, columns, bucket_width=1.0, values=None):
+        self.columns = list(columns)
+        self.width = float(bucket_width)
+        X = df[self.columns].to_numpy(dtype="float64", na_value=np.nan) if values is None \
+            else np.array(values, dtype="float64")
+        # Centering leaves correlations and slopes unchanged and keeps the sums of
+        # squares of large-magnitude columns (gdp_ppp) well conditioned.
+        self.shift = _column_means(X)
+        X = X - self.shift
+        self.M  = ~np.isnan(X)
+        self.X0 = np.where(self.M, X, 0.0)
+        self.X  = X
+        self.scores = df["score"].to_numpy(dtype="float64", na_value=np.nan)
+
+        region_codes, regions = pd.factorize(df["region"], sort=True)
+        self.regions = [str(r) for r in regions]
+        if "year" in df.columns:
+            year_codes, years = pd.factorize(df["year"], sort=True)
+            self.years = [int(y) for y in years]
+        else:
+            year_codes, self.years = np.zeros(len(df), dtype=np.intp), [None]
+
+        valid = ~np.isnan(self.scores)
+        bucket = np.zeros(len(df), dtype=np.intp)
+        bucket[valid] = np.floor(np.clip(self.scores[valid], 0, None) / self.width)
+        self.n_buckets = int(bucket.max()) + 1 if valid.any() else 1
+        cell = (year_codes * len(self.regions) + region_codes) * self.n_buckets + bucket
+        # Rows without a score never pass a score filter — leave them out entirely
+        cell[~valid] = -1
+
+        self.order = np.argsort(cell, kind="stable")
+        sorted_cells = cell[self.order]
+        n_cells = len(self.years) * len(self.regions) * self.n_buckets
+        self.start = np.searchsorted(sorted_cells, np.arange(n_cells), side="left")
+        self.stop  = np.searchsorted(sorted_cells, np.arange(n_cells), side="right")
+
+        k = len(self.columns)
+        self.moments = np.zeros((n_cells, 4, k, k))
+        self.lo = np.full((n_cells, k, k), np.inf)
+        self.hi = np.full((n_cells, k, k), -np.inf)
+        for c in np.flatnonzero(self.stop > self.start):
+            rows = self.order[self.start[c]:self.stop[c]]
+            self.moments[c] = _moments(self.X0[rows], self.M[rows])
+            self.lo[c], self.hi[c] = _extrema(self.X[rows], self.M[rows])
+
+    def _cells(self, region, years):
+        regions = range(len(self.regions)) if region == ALL else (
+            [self.regions.index(region)] if region in self.regions else [])
+        year_ids = range(len(self.years)) if years is None else [
+            self.years.index(y) for y in years if y in self.years]
+        return [(y * len(self.regions) + r) * self.n_buckets for y in year_ids for r in regions]
+
+    def aggregate(self, region=ALL, score_range=(0, 100), years=None):
+        lo, hi = float(score_range[0]), float(score_range[1])
+        k = len(self.columns)
+        mom = np.zeros((4, k, k))
+        xmin = np.full((k, k), np.inf)
+        xmax = np.full((k, k), -np.inf)
+        b_lo = max(int(np.floor(lo / self.width)), 0)
+        b_hi = min(int(np.floor(hi / self.width)), self.n_buckets - 1)
+        if b_lo > b_hi:
+            return mom, xmin, xmax
+        for base in self._cells(region, years):
+            full = [b for b in range(b_lo, b_hi + 1)
+                    if b * self.width >= lo and (b + 1) * self.width <= hi]
+            if full:
+                cells = base + np.asarray(full)
+                mom  += self.moments[cells].sum(axis=0)
+                xmin  = np.minimum(xmin, self.lo[cells].min(axis=0))
+                xmax  = np.maximum(xmax, self.hi[cells].max(axis=0))
+            for b in {b_lo, b_hi} - set(full):
+                rows = self.order[self.start[base + b]:self.stop[base + b]]
+                rows = rows[(self.scores[rows] >= lo) & (self.scores[rows] <= hi)]
+                if len(rows):
+                    mom += _moments(self.X0[rows], self.M[rows])
+                    r_lo, r_hi = _extrema(self.X[rows], self.M[rows])
+                    xmin, xmax = np.minimum(xmin, r_lo), np.maximum(xmax, r_hi)
+        return mom, xmin, xmax
+
+    def pearson(self, region=ALL, score_range=(0, 100), years=None):
+        mom, _, _ = self.aggregate(region, score_range, years)
+        return pd.DataFrame(pearson_from_moments(mom), index=self.columns, columns=self.columns)
+
+    def ols(self, x, y, region=ALL, score_range=(0, 100), years=None):
+        # Least-squares line y = slope·x + intercept over rows where both are present;
+        # returns (slope, intercept, x_min, x_max) or None when it is undetermined.
+        mom, xmin, xmax = self.aggregate(region, score_range, years)
+        i, j = self.columns.index(x), self.columns.index(y)
+        n, sx, sy = mom[0, i, j], mom[1, i, j], mom[1, j, i]
+        sxx, sxy  = mom[2, i, j], mom[3, i, j]
+        varx = sxx - sx * sx / n if n else 0.0
+        if n < 2 or _flat(varx, sxx):
+            return None
+        slope = (sxy - sx * sy / n) / varx
+        mean_x, mean_y = sx / n + self.shift[i], sy / n + self.shift[j]
+        return slope, mean_y - slope * mean_x, xmin[i, j] + self.shift[i], xmax[i, j] + self.shift[i]
+
+
+def _tied_ranks(v):
+    # 1-based ranks of already sorted values, ties sharing their average rank
+    starts = np.flatnonzero(np.r_[True, v[1:] != v[:-1]]) if len(v) else np.empty(0, dtype=np.intp)
+    ends = np.r_[starts[1:], len(v)]
+    return np.repeat((starts + ends + 1) / 2, ends - starts)
+
+
+def spearman(frame, columns):
+    # Rank correlation isn't decomposable over cells, but on the already-filtered
+    # rows it is one sort per column plus the same moment algebra. Like
+    # DataFrame.corr, a pair is ranked over the rows both columns are present
+    # in: when their missing rows differ, its ranks come from each column's
+    # sort order restricted to those rows — a linear pass, not another sort.
+    X = frame[list(columns)].to_numpy(dtype="float64", na_value=np.nan)
+    M = ~np.isnan(X)
+    order = np.argsort(X, axis=0, kind="stable")          # NaN last
+    rows = [order[:M[:, i].sum(), i] for i in range(X.shape[1])]
+    values = [X[rows[i], i] for i in range(X.shape[1])]   # each column, sorted
+    ranks = np.full(X.shape, np.nan)
+    for i in range(X.shape[1]):
+        ranks[rows[i], i] = _tied_ranks(values[i])
+    X0 = np.where(M, ranks - _column_means(ranks), 0.0)
+    r = pearson_from_moments(_moments(X0, M))
+    scatter = np.empty(len(X))
+    for i, j in zip(*np.triu_indices(X.shape[1], 1)):
+        if (M[:, i] != M[:, j]).any():
+            keep_i, keep_j = M[rows[i], j], M[rows[j], i]
+            scatter[rows[j][keep_j]] = _tied_ranks(values[j][keep_j])
+            pair = np.column_stack([_tied_ranks(values[i][keep_i]), scatter[rows[i][keep_i]]])
+            pair0 = pair - pair.mean(axis=0) if len(pair) else pair
+            r[i, j] = r[j, i] = pearson_from_moments(_moments(pair0, np.ones(pair.shape, dtype=bool)))[0, 1]
+    return pd.DataFrame(r, index=list(columns), columns=list(columns))
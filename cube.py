@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_source
+
+# Numeric columns held in the cube; labels (Country, iso_code, region) live beside it
+CUBE_COLUMNS = ["rank"] + [c for c, dtype in data_source.SCHEMA.items() if dtype == "float64"]
+GROWTH_SPAN = 5
+
+
+class Cube:
+    # Dense country × year × indicator float64 array (NaN where a country has no
+    # observation), built once per dataset version and memory-mapped from .npy.
+    # A year slice is values[:, y, :] and a trajectory values[c] — both views, so
+    # scrubbing years never re-filters the long-format frame.
+    def __init__(self, values, countries, years, indicators, iso_codes, regions):
+        self.values     = values
+        self.countries  = np.asarray(countries, dtype=object)
+        self.years      = list(years)
+        self.indicators = list(indicators)
+        self.iso_codes  = np.asarray(iso_codes, dtype=object)
+        self.regions    = np.asarray(regions, dtype=object)
+        self._year_pos  = {y: i for i, y in enumerate(self.years)}
+        self._country_index = pd.Index(self.countries)
+
+    @classmethod
+    def from_frame(cls, df, indicators=None):
+        indicators = indicators or [c for c in CUBE_COLUMNS if c in df.columns]
+        df = df[df["Country"].notna()]
+        # First-appearance order, so a single-year cube lists rows as the file does
+        country_codes, countries = pd.factorize(df["Country"], sort=False)
+        if "year" in df.columns:
+            year_codes, years = pd.factorize(df["year"], sort=True)
+            years = [int(y) for y in years]
+        else:
+            year_codes, years = np.zeros(len(df), dtype=np.intp), [None]
+        values = np.full((len(countries), len(years), len(indicators)), np.nan)
+        values[country_codes, year_codes] = df[indicators].to_numpy(dtype="float64", na_value=np.nan)
+        # Labels from each country's latest row
+        latest = df.assign(_c=country_codes, _y=year_codes).sort_values("_y", kind="stable")
+        latest = latest.drop_duplicates("_c", keep="last").set_index("_c").sort_index()
+        labels = {c: latest[c].astype(object).where(latest[c].notna(), None).to_numpy()
+                  if c in latest.columns else np.full(len(countries), None, dtype=object)
+                  for c in ("iso_code", "region")}
+        return cls(values, [str(c) for c in countries], years, indicators,
+                   labels["iso_code"], labels["region"])
+
+    def save(self, directory, version):
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, "values.tmp.npy")
+        np.save(tmp, np.ascontiguousarray(self.values))
+        os.replace(tmp, os.path.join(directory, "values.npy"))
+        meta = dict(version=version, countries=self.countries.tolist(), years=self.years,
+                    indicators=self.indicators, iso_codes=self.iso_codes.tolist(),
+                    regions=self.regions.tolist())
+        # meta.json is written last: a cube is valid only once its version is on disk
+        tmp = os.path.join(directory, "meta.tmp.json")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+
+    @classmethod
+    def open(cls, directory):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(directory, "values.npy"), mmap_mode="r")
+        return cls(values, meta["countries"], meta["years"], meta["indicators"],
+                   meta["iso_codes"], meta["regions"])
+
+    # ─── VIEWS ──────────────────────────────────────────────────────────────────
+    def year_slice(self, year):
+        return self.values[:, self._year_pos[year], :]
+
+    def trajectory(self, country):
+        return self.values[self._country_index.get_loc(country)]
+
+    def series(self, indicator):
+        return self.values[:, :, self.indicators.index(indicator)]
+
+    def positions(self, countries):
+        pos = self._country_index.get_indexer(list(countries))
+        return pos[pos >= 0]
+
+    # ─── DERIVED ────────────────────────────────────────────────────────────────
+    def growth(self, year, span=GROWTH_SPAN):
+        # Average annual real GDP growth (%) over the last span years, from GDP per
+        # capita × population; NaN where either end is missing.
+        now, then = self._year_pos.get(year), self._year_pos.get(year - span if year else None)
+        if now is None or then is None or "gdp_ppp" not in self.indicators:
+            return np.full(len(self.countries), np.nan)
+        gdp = self.series("gdp_ppp")
+        if "population" in self.indicators:
+            gdp = gdp * self.series("population")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return ((gdp[:, now] / gdp[:, then]) ** (1 / span) - 1) * 100
+
+    def frame(self, year, columns=None):
+        # One year as the dashboard's wide frame: countries scored that year, a rank
+        # where the file has none, and 5-year growth filled in from the GDP series.
+        block = self.year_slice(year)
+        rows  = np.flatnonzero(~np.isnan(block[:, self.indicators.index("score")]))
+        df = pd.DataFrame({"Country": self.countries[rows], "iso_code": self.iso_codes[rows],
+                           "region": self.regions[rows]})
+        if year is not None:
+            df["year"] = year
+        for k, name in enumerate(self.indicators):
+            df[name] = block[rows, k]
+        growth = self.growth(year)[rows]
+        if "gdp_growth_5yr" in df.columns:
+            df["gdp_growth_5yr"] = df["gdp_growth_5yr"].fillna(pd.Series(growth))
+        elif not np.isnan(growth).all():
+            df["gdp_growth_5yr"] = growth
+        if "rank" not in df.columns or df["rank"].isna().all():
+            df["rank"] = df["score"].rank(ascending=False, method="min")
+        df = data_source.coerce(df)
+        return df if columns is None else df[data_source._projection(list(df.columns), columns)]
+
+    def long(self, indicators, countries=None):
+        # Year-major long frame (Country, region, year, *indicators) for animations
+        # and trajectory charts; rows where the first indicator is missing are dropped.
+        pos = np.arange(len(self.countries)) if countries is None else self.positions(countries)
+        ks  = [self.indicators.index(i) for i in indicators]
+        block = self.values[pos][:, :, ks].transpose(1, 0, 2).reshape(-1, len(ks))
+        out = pd.DataFrame(block, columns=list(indicators))
+        out.insert(0, "year", np.repeat(self.years, len(pos)))
+        out.insert(0, "region", np.tile(self.regions[pos], len(self.years)))
+        out.insert(0, "Country", np.tile(self.countries[pos], len(self.years)))
+        return out[out[indicators[0]].notna()].reset_index(drop=True)
+
+
+def cache_dir(path=None):
+    path = data_source.resolve(path)
+    return path.parent / ".efi-cache" / (path.name + ".cube")
+
+
+def open_cube(path=None):
+    # Memory-map the cube for the current dataset version, building it on first use
+    directory, version = cache_dir(path), data_source.version(path)
+    try:
+        with open(directory / "meta.json") as f:
+            if json.load(f).get("version") == version:
+                return Cube.open(directory)
+    except (OSError, ValueError):
+        pass
+    cube = Cube.from_frame(data_source.open_source(path).load())
+    try:
+        cube.save(directory, version)
+    except OSError:
+        # Read-only checkout: keep the in-memory cube
+        return cube
+    return Cube.open(directory)
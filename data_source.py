@@ -0,0 +1,255 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# ─── SCHEMA ─────────────────────────────────────────────────────────────────────
+# Every column the dashboard understands, with the dtype it is coerced to on load.
+# Files may carry any subset beyond REQUIRED_COLUMNS; unknown columns are ignored.
+PILLARS = [
+    "property_rights", "judicial_effectiveness", "government_integrity",
+    "tax_burden", "government_spending", "fiscal_health",
+    "business_freedom", "labor_freedom", "monetary_freedom",
+    "trade_freedom", "investment_freedom", "financial_freedom",
+]
+SCHEMA = {
+    "Country":        "string",
+    "iso_code":       "string",
+    "region":         "string",
+    "year":           "int16",
+    "rank":           "Int32",
+    "score":          "float64",
+    "gdp_ppp":        "float64",
+    "population":     "float64",
+    "unemployment":   "float64",
+    "inflation":      "float64",
+    "gdp_growth_5yr": "float64",
+    **{p: "float64" for p in PILLARS},
+}
+REQUIRED_COLUMNS = ["Country", "region", "score"]
+CORR_COLUMNS = ["score", "gdp_ppp", "population", "unemployment", "inflation",
+                "financial_freedom", "monetary_freedom", "gdp_growth_5yr"]
+
+# Columns the dashboard reads. They are loaded once, into the store every tab
+# and session shares (store.py), so projection happens here, at the file:
+# other columns in a Parquet or Arrow input are never read
+DASHBOARD_COLUMNS = ["Country", "region", "rank", "score", "inflation", "iso_code", "unemployment",
+                     "population", "financial_freedom", "gdp_ppp", "gdp_growth_5yr",
+                     "monetary_freedom"] + [p for p in PILLARS if p not in ("financial_freedom", "monetary_freedom")]
+# Data table headers, in display order
+DISPLAY_NAMES = {
+    "Country": "Country", "region": "Region", "rank": "World Rank", "score": "Freedom Score",
+    "gdp_ppp": "GDP PPP (USD)", "population": "Population (M)", "unemployment": "Unemployment %",
+    "inflation": "Inflation %", "financial_freedom": "Financial Freedom",
+    "monetary_freedom": "Monetary Freedom", "gdp_growth_5yr": "5yr GDP Growth %",
+}
+
+DEFAULT_PATH = Path(__file__).parent / "data" / "efi_2022.csv"
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def validate(columns):
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise SchemaError(f"dataset is missing required columns: {', '.join(missing)}")
+
+
+def coerce(df):
+    for col, dtype in SCHEMA.items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            if dtype in ("int16", "Int32") or dtype.startswith("float"):
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _projection(available, columns):
+    if columns is None:
+        return [c for c in available if c in SCHEMA]
+    # "year" always rides along so multi-year files can be sliced after projection
+    wanted = list(columns) + (["year"] if "year" not in columns else [])
+    return [c for c in wanted if c in available]
+
+
+# ─── SOURCES ────────────────────────────────────────────────────────────────────
+class DataSource:
+    def columns(self):
+        raise NotImplementedError
+
+    def _read(self, columns):
+        raise NotImplementedError
+
+    def load(self, columns=None):
+        available = self.columns()
+        validate(available)
+        return coerce(self._read(_projection(available, columns)))
+
+
+class FrameSource(DataSource):
+    def __init__(self, frame):
+        self.frame = frame
+
+    def columns(self):
+        return list(self.frame.columns)
+
+    def _read(self, columns):
+        return self.frame[columns].copy()
+
+
+class ArrowSource(DataSource):
+    # Arrow IPC / Feather v2 files are memory-mapped: column buffers are paged in
+    # lazily by the OS, so projecting a few columns of a wide panel touches only those.
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def _open(self):
+        import pyarrow as pa
+        return pa.ipc.open_file(pa.memory_map(str(self.path), "r"))
+
+    def columns(self):
+        return self._open().schema.names
+
+    def _read(self, columns):
+        table = self._open().read_all().select(columns)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class ParquetSource(DataSource):
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def columns(self):
+        import pyarrow.parquet as pq
+        return pq.read_schema(str(self.path)).names
+
+    def _read(self, columns):
+        import pyarrow.parquet as pq
+        table = pq.read_table(str(self.path), columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class CsvSource(DataSource):
+    # CSV is parsed once and written next to the file as an Arrow sidecar; later
+    # cold starts memory-map the sidecar instead of re-parsing text.
+    def __init__(self, path, cache_dir=None):
+        self.path = Path(path)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.path.parent / ".efi-cache"
+
+    @property
+    def sidecar(self):
+        return self.cache_dir / (self.path.name + ".arrow")
+
+    def _sidecar_fresh(self):
+        s = self.sidecar
+        return s.exists() and s.stat().st_mtime >= self.path.stat().st_mtime
+
+    def _build_sidecar(self):
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        table = pacsv.read_csv(str(self.path))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.sidecar.with_suffix(".tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, self.sidecar)
+        except OSError:
+            # Read-only checkout: fall back to parsing on every cold start
+            return None
+        return ArrowSource(self.sidecar)
+
+    def _arrow(self):
+        if self._sidecar_fresh():
+            return ArrowSource(self.sidecar)
+        return self._build_sidecar()
+
+    def columns(self):
+        arrow = self._arrow()
+        if arrow is not None:
+            return arrow.columns()
+        return list(pd.read_csv(self.path, nrows=0).columns)
+
+    def _read(self, columns):
+        arrow = self._arrow()
+        if arrow is not None:
+            return arrow._read(columns)
+        return pd.read_csv(self.path, usecols=columns)
+
+
+class ArtifactSource(DataSource):
+    # Output directory of etl.py: manifest.json plus one versioned directory of
+    # Parquet tables per year. The dashboard frame is every year's frame.parquet;
+    # the other derived tables are read on demand with table().
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def manifest(self):
+        import json
+        with open(self.path / "manifest.json") as f:
+            return json.load(f)
+
+    def _year_dirs(self):
+        years = self.manifest()["years"]
+        return {int(y): self.path / entry["path"] for y, entry in sorted(years.items(), key=lambda kv: int(kv[0]))}
+
+    def columns(self):
+        import pyarrow.parquet as pq
+        dirs = list(self._year_dirs().values())
+        if not dirs:
+            raise SchemaError(f"no years built in {self.path}")
+        return pq.read_schema(str(dirs[0] / "frame.parquet")).names
+
+    def _read(self, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        tables = [pq.read_table(str(d / "frame.parquet"), columns=columns, memory_map=True)
+                  for d in self._year_dirs().values()]
+        return pa.concat_tables(tables).to_pandas(split_blocks=True, self_destruct=True)
+
+    def table(self, name, year=None):
+        import pyarrow.parquet as pq
+        dirs = self._year_dirs()
+        path = dirs[max(dirs) if year is None else int(year)] / f"{name}.parquet"
+        return pq.read_table(str(path)).to_pandas() if path.exists() else None
+
+
+def resolve(path=None):
+    return Path(path or os.environ.get("EFI_DATA_PATH") or DEFAULT_PATH)
+
+
+def version(path=None):
+    # Cheap dataset identity for cache keys: changes whenever the file is replaced
+    path = resolve(path)
+    # An ETL output directory changes exactly when its manifest is rewritten
+    st = (path / "manifest.json").stat() if path.is_dir() else path.stat()
+    return f"{path.resolve()}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def open_source(path=None):
+    path = resolve(path)
+    suffixes = "".join(path.suffixes[-2:]).lower()
+    if path.is_dir():
+        return ArtifactSource(path)
+    if path.suffix.lower() in (".arrow", ".feather", ".ipc"):
+        return ArrowSource(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return ParquetSource(path)
+    if path.suffix.lower() == ".csv" or suffixes == ".csv.gz":
+        return CsvSource(path)
+    raise SchemaError(f"unsupported data file: {path}")
+
+
+def latest_year(df):
+    if "year" not in df.columns or df["year"].nunique() <= 1:
+        return df.reset_index(drop=True)
+    return df[df["year"] == df["year"].max()].reset_index(drop=True)
+
+
+def load(columns=DASHBOARD_COLUMNS, path=None):
+    df = latest_year(open_source(path).load(columns))
+    if "rank" not in df.columns:
+        df["rank"] = df["score"].rank(ascending=False, method="min").astype("Int32")
+    return df
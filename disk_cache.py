@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import data_source
+
+MAX_BYTES = int(os.environ.get("EFI_DISK_CACHE_MB", "256")) * 2**20
+TTL       = float(os.environ.get("EFI_DISK_CACHE_TTL_H", "168")) * 3600
+# Evictions run on open and every this many writes, so the file can overshoot
+# MAX_BYTES by at most that many entries in between
+EVICT_EVERY = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key      TEXT PRIMARY KEY,
+    value    BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+)"""
+
+
+def default_path():
+    # Next to the data, like the Arrow sidecar and the cube
+    override = os.environ.get("EFI_DISK_CACHE_PATH")
+    return Path(override) if override else data_source.resolve().parent / ".efi-cache" / "results.sqlite"
+
+
+@functools.lru_cache(maxsize=1)
+def code_fingerprint():
+    # Hash of this directory's modules: cached results are only as valid as the
+    # code that produced them, so any edit starts a fresh namespace
+    h = hashlib.sha1()
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        h.update(path.name.encode() + path.read_bytes())
+    return h.hexdigest()[:12]
+
+
+class DiskCache:
+    # Persistent second tier under the in-memory caches (FigureCache): string
+    # payloads in one SQLite file, zlib-compressed, shared by every process on
+    # the machine and kept across restarts. Entries older than ttl are dropped;
+    # past max_bytes the least recently read go first. Keys are namespaced by
+    # cache name and code fingerprint. Any SQLite error — a read-only checkout,
+    # a locked file — makes the cache a no-op rather than failing the caller.
+    def __init__(self, namespace, path=None, max_bytes=MAX_BYTES, ttl=TTL):
+        self.namespace = f"{namespace}:{code_fingerprint()}:"
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.writes = 0
+        self._conn = None
+        self._broken = max_bytes <= 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Lazily, on first use: under the lock
+        if self._conn is None and not self._broken:
+            try:
+                path = self.path or default_path()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(SCHEMA)
+                conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+                self._conn = conn
+                self._evict()
+            except (OSError, sqlite3.Error):
+                self._broken = True
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            now = time.time()
+            try:
+                row = conn.execute("SELECT value FROM entries WHERE key = ? AND created > ?",
+                                   (self.namespace + key, now - self.ttl)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, self.namespace + key))
+            except sqlite3.Error:
+                return None
+            try:
+                payload = zlib.decompress(row[0]).decode()
+            except (zlib.error, UnicodeDecodeError):
+                return None
+            self.hits += 1
+        return payload
+
+    def put(self, key, payload):
+        blob = zlib.compress(payload.encode(), 1)
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            now = time.time()
+            try:
+                conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                             (self.namespace + key, blob, len(blob), now, now))
+                self.writes += 1
+                if self.writes % EVICT_EVERY == 0:
+                    self._evict()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self):
+        # Expired entries, then the least recently read beyond max_bytes (all
+        # namespaces share the budget; stale code fingerprints age out first)
+        conn = self._conn
+        conn.execute("DELETE FROM entries WHERE created <= ?", (time.time() - self.ttl,))
+        total, drop = 0, []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed DESC"):
+            total += size
+            if total > self.max_bytes:
+                drop.append((key,))
+        if drop:
+            conn.executemany("DELETE FROM entries WHERE key = ?", drop)
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            entries, size = (0, 0)
+            if conn is not None:
+                try:
+                    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+                except sqlite3.Error:
+                    pass
+            return dict(entries=entries, bytes=size, max_bytes=self.max_bytes, hits=self.hits)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                conn.execute("DELETE FROM entries WHERE key LIKE ?", (self.namespace + "%",))
@@ -0,0 +1,255 @@
+"""Offline build of the dashboard's derived tables.
+
+Reads raw index files (Heritage-style: Country, region, score, ... per year) and
+optional supplementary indicator files (World Bank-style, long format keyed on
+iso_code or Country, plus year), validates them against data_source.SCHEMA and
+writes one versioned directory of Parquet tables per year:
+
+    python etl.py data/efi_2022.csv -o artifacts/
+    python etl.py heritage_*.csv --join wdi.csv -o artifacts/ --workers 8
+    EFI_DATA_PATH=artifacts/ streamlit run Dashboard.py
+
+Years are built in parallel, one process per year. Reruns are incremental: only
+years fed by input files whose contents changed are rebuilt.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import data_source
+from correlation import spearman
+from data_source import CORR_COLUMNS, SchemaError
+
+# Bump when a derived table changes shape or meaning: every year is rebuilt
+ETL_VERSION = 2
+KEYS = ("iso_code", "Country")
+
+
+# ─── INPUTS ─────────────────────────────────────────────────────────────────────
+def file_digest(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint_inputs(paths, previous):
+    # path → dict(size, mtime_ns, sha1); the content hash is reused while size and
+    # mtime are unchanged, so an untouched tree costs one stat() per file.
+    out = {}
+    for path in paths:
+        st = os.stat(path)
+        old = previous.get(path, {})
+        if old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+            sha1 = old["sha1"]
+        else:
+            sha1 = file_digest(path)
+        out[path] = dict(size=st.st_size, mtime_ns=st.st_mtime_ns, sha1=sha1)
+    return out
+
+
+def read_index(path, year=None):
+    # A primary file must satisfy the dashboard schema itself; single-year files
+    # without a year column take it from --year
+    df = data_source.open_source(path).load()
+    if "year" not in df.columns:
+        if year is None:
+            raise SchemaError(f"{path}: no year column; pass --year")
+        df["year"] = pd.array([year] * len(df), dtype="int16")
+    return df
+
+
+def read_supplement(path):
+    source = data_source.open_source(path)
+    columns = source.columns()
+    if not any(k in columns for k in KEYS):
+        raise SchemaError(f"{path}: supplementary file needs an iso_code or Country column")
+    wanted = [c for c in columns if c in data_source.SCHEMA and c not in ("region", "score", "rank")]
+    return data_source.coerce(source._read(wanted))
+
+
+def iso_lookup(path=data_source.DEFAULT_PATH):
+    # Country → ISO-3 from a reference file (the bundled dataset by default)
+    ref = data_source.open_source(path).load(["Country", "iso_code"])
+    ref = ref.dropna(subset=["iso_code"]).drop_duplicates("Country", keep="last")
+    return dict(zip(ref["Country"], ref["iso_code"]))
+
+
+def combine(index_frames, supplements, iso_map):
+    df = pd.concat(index_frames, ignore_index=True)
+    # Later files win when a country/year appears twice
+    df = df.drop_duplicates(["Country", "year"], keep="last").reset_index(drop=True)
+    if "iso_code" not in df.columns:
+        df["iso_code"] = pd.array([None] * len(df), dtype="string")
+    df["iso_code"] = df["iso_code"].fillna(df["Country"].map(iso_map).astype("string"))
+    for sup in supplements:
+        key = "iso_code" if "iso_code" in sup.columns else "Country"
+        on = [key] + (["year"] if "year" in sup.columns else [])
+        values = [c for c in sup.columns if c not in on and c not in KEYS]
+        sup = sup.drop_duplicates(on, keep="last").set_index(on)[values]
+        joined = df[on].join(sup, on=on)
+        for col in values:
+            # Supplementary values fill gaps; the index file's own values stand
+            df[col] = df[col].fillna(joined[col]) if col in df.columns else joined[col].to_numpy()
+    return data_source.coerce(df)
+
+
+# ─── DERIVED TABLES ─────────────────────────────────────────────────────────────
+def derive(frame):
+    # name → DataFrame for one year: the frame the dashboard loads and the tables
+    # it reads back (query.artifact_table). Anything the store's indexes answer in
+    # milliseconds (top-N maps, the sorted table) is not worth a file.
+    frame = frame.reset_index(drop=True)
+    if "rank" not in frame.columns or frame["rank"].isna().all():
+        frame["rank"] = frame["score"].rank(ascending=False, method="min").astype("Int32")
+
+    corr_cols = [c for c in CORR_COLUMNS if c in frame.columns]
+    pearson = frame[corr_cols].corr()
+    spear = spearman(frame, corr_cols)
+    correlation = pd.concat({"pearson": pearson, "spearman": spear}, names=["method", "column"]).reset_index()
+    return dict(frame=frame, correlation=correlation)
+
+
+def year_version(frame):
+    hashed = pd.util.hash_pandas_object(frame.reset_index(drop=True), index=False).to_numpy()
+    raw = hashed.tobytes() + ",".join(frame.columns).encode() + str(ETL_VERSION).encode()
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+def build_year(year, frame, out_dir, version):
+    # Runs in a worker process: derive, write to a temp dir, then rename into place
+    start = time.perf_counter()
+    target = Path(out_dir) / "years" / str(year) / version
+    tmp = target.with_name(version + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    tables = derive(frame)
+    for name, table in tables.items():
+        table.to_parquet(tmp / f"{name}.parquet", index=False, compression="zstd")
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return dict(year=year, version=version, path=str(target.relative_to(out_dir)),
+                rows=len(frame), tables=sorted(tables), seconds=round(time.perf_counter() - start, 3))
+
+
+# ─── PIPELINE ───────────────────────────────────────────────────────────────────
+def load_manifest(out_dir):
+    try:
+        with open(Path(out_dir) / "manifest.json") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return dict(etl_version=None, inputs={}, years={})
+    return manifest
+
+
+def write_manifest(out_dir, manifest):
+    path = Path(out_dir) / "manifest.json"
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def prune(out_dir, year, keep):
+    # Drop all but the newest `keep` versions of a year
+    year_dir = Path(out_dir) / "years" / str(year)
+    versions = sorted((d for d in year_dir.iterdir() if d.is_dir() and not d.name.endswith(".tmp")),
+                      key=lambda d: d.stat().st_mtime, reverse=True)
+    for old in versions[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def run(inputs, out_dir, joins=(), iso_map_path=None, workers=None, force=False, keep=2, year=None, log=print):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    inputs = [str(Path(p).resolve()) for p in inputs]
+    joins  = [str(Path(p).resolve()) for p in joins]
+    manifest = load_manifest(out_dir)
+    prints = fingerprint_inputs(inputs + joins, manifest.get("inputs", {}))
+
+    stale_code = manifest.get("etl_version") != ETL_VERSION
+    changed = {p for p, fp in prints.items() if manifest["inputs"].get(p, {}).get("sha1") != fp["sha1"]}
+    removed = set(manifest["inputs"]) - set(prints)
+    if not (force or stale_code or changed or removed):
+        log("up to date")
+        return manifest
+
+    frames = {p: read_index(p, year) for p in inputs}
+    supplements = [read_supplement(p) for p in joins]
+    df = combine(list(frames.values()), supplements, iso_lookup(iso_map_path or data_source.DEFAULT_PATH))
+    years = sorted(int(y) for y in df["year"].unique())
+
+    # Years touched by a changed/removed file; a changed supplement touches all
+    dirty = set()
+    for p in changed | removed:
+        dirty.update(frames[p]["year"].unique().tolist() if p in frames else years)
+        dirty.update(manifest["inputs"].get(p, {}).get("years", []))
+    if force or stale_code:
+        dirty.update(years)
+
+    jobs = []
+    for year in years:
+        prev = manifest["years"].get(str(year))
+        if year not in dirty and prev and (out_dir / prev["path"]).exists():
+            continue
+        frame = df[df["year"] == year]
+        version = year_version(frame)
+        if prev and prev["version"] == version and (out_dir / prev["path"]).exists() and not force:
+            continue
+        jobs.append((year, frame, version))
+
+    results = []
+    if jobs:
+        n = min(workers or os.cpu_count() or 1, len(jobs))
+        if n <= 1:
+            results = [build_year(y, f, out_dir, v) for y, f, v in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=n) as pool:
+                futures = [pool.submit(build_year, y, f, out_dir, v) for y, f, v in jobs]
+                results = [fut.result() for fut in futures]
+    for r in results:
+        log(f"built {r['year']} v{r['version']}: {r['rows']} rows, {len(r['tables'])} tables in {r['seconds']}s")
+
+    year_entries = {y: e for y, e in manifest["years"].items() if int(y) in years}
+    year_entries.update({str(r["year"]): {k: r[k] for k in ("version", "path", "rows", "tables")}
+                         for r in results})
+    for p, fp in prints.items():
+        fp["years"] = sorted(int(y) for y in frames[p]["year"].unique()) if p in frames else years
+    manifest = dict(etl_version=ETL_VERSION, inputs=prints, years=year_entries, built=time.time())
+    write_manifest(out_dir, manifest)
+    for r in results:
+        prune(out_dir, r["year"], keep)
+    log(f"{len(results)} of {len(years)} years rebuilt → {out_dir}")
+    return manifest
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("inputs", nargs="+", help="index files (CSV, Parquet, Arrow)")
+    ap.add_argument("-o", "--out", default="artifacts", help="output directory")
+    ap.add_argument("--join", action="append", default=[], metavar="FILE",
+                    help="supplementary indicator file keyed on iso_code/Country (+ year); repeatable")
+    ap.add_argument("--iso-map", help="reference file with Country and iso_code columns")
+    ap.add_argument("--workers", type=int, help="worker processes (default: one per year, up to CPU count)")
+    ap.add_argument("--force", action="store_true", help="rebuild every year")
+    ap.add_argument("--keep", type=int, default=2, help="versions kept per year")
+    ap.add_argument("--year", type=int, help="index year for input files without a year column")
+    args = ap.parse_args(argv)
+    try:
+        run(args.inputs, args.out, args.join, args.iso_map, args.workers, args.force, args.keep, args.year)
+    except (SchemaError, OSError) as exc:
+        print(f"etl: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import io
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+CHUNK_ROWS = 50_000
+
+# label → (file extension, MIME type)
+FORMATS = {
+    "CSV":          ("csv",     "text/csv"),
+    "CSV (gzip)":   ("csv.gz",  "application/gzip"),
+    "Parquet":      ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC":    ("arrow",   "application/vnd.apache.arrow.file"),
+}
+
+
+# ─── CHUNKED WRITERS ────────────────────────────────────────────────────────────
+# Each writer is a generator of byte chunks: at most one chunk of rows is encoded
+# at a time, so output can be streamed to a file or socket as it is produced.
+def iter_csv(df, chunk_rows=CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def iter_gzip(chunks, level=6):
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 → gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def _drain(buf):
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
+def _arrow_batches(df, chunk_rows):
+    import pyarrow as pa
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield schema, pa.Table.from_pandas(df.iloc[start:start + chunk_rows],
+                                           schema=schema, preserve_index=False)
+
+
+def iter_parquet(df, chunk_rows=CHUNK_ROWS):
+    import pyarrow.parquet as pq
+    buf, writer = io.BytesIO(), None
+    for schema, table in _arrow_batches(df, chunk_rows):
+        if writer is None:
+            writer = pq.ParquetWriter(buf, schema, compression="zstd")
+        writer.write_table(table)
+        yield _drain(buf)
+    writer.close()
+    yield _drain(buf)
+
+
+def iter_arrow(df, chunk_rows=CHUNK_ROWS):
+    import pyarrow as pa
+    buf, writer = io.BytesIO(), None
+    for schema, table in _arrow_batches(df, chunk_rows):
+        if writer is None:
+            writer = pa.ipc.new_file(buf, schema)
+        writer.write_table(table)
+        yield _drain(buf)
+    writer.close()
+    yield _drain(buf)
+
+
+def iter_export(df, fmt, chunk_rows=CHUNK_ROWS):
+    ext = FORMATS[fmt][0]
+    if ext == "csv":
+        return iter_csv(df, chunk_rows)
+    if ext == "csv.gz":
+        return iter_gzip(iter_csv(df, chunk_rows))
+    if ext == "parquet":
+        return iter_parquet(df, chunk_rows)
+    return iter_arrow(df, chunk_rows)
+
+
+def write(df, fmt, path, chunk_rows=CHUNK_ROWS):
+    with open(path, "wb") as f:
+        for chunk in iter_export(df, fmt, chunk_rows):
+            f.write(chunk)
+
+
+def file_name(stem, fmt):
+    return f"{stem}.{FORMATS[fmt][0]}"
+
+
+def mime(fmt):
+    return FORMATS[fmt][1]
+
+
+# ─── ENCODED-BYTES CACHE ────────────────────────────────────────────────────────
+class ExportCache:
+    # Encoded downloads keyed on (dataset, filter, view, format), shared by all
+    # sessions and bounded by total size.
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes     = 0
+        self._entries  = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def get_or_build(self, key, frame_fn, fmt):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        data = b"".join(iter_export(frame_fn(), fmt))
+        if len(data) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = data
+                    self.bytes += len(data)
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.bytes -= len(evicted)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def lazy(self, key, frame_fn, fmt):
+        # Zero-argument callable for st.download_button: nothing is encoded until click
+        return lambda: self.get_or_build(key + (fmt,), frame_fn, fmt)
+
+
+EXPORTS = ExportCache(int(os.environ.get("EFI_EXPORT_CACHE_MB", "128")) * 2**20)
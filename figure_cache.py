@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from disk_cache import DiskCache
+
+
+def frame_fingerprint(df):
+    # Content hash of values and index — identical data from any source/session
+    # yields the same key, and any edited cell yields a new one.
+    hashed = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    cols   = ",".join(map(str, df.columns)).encode()
+    return hashlib.sha1(hashed.tobytes() + cols).hexdigest()[:16]
+
+
+def figure_key(name, fingerprint, params, theme):
+    raw = json.dumps([name, fingerprint, params, theme], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def to_figure(payload):
+    # Cached JSON was produced by a validated figure — skip re-validation
+    return go.Figure(json.loads(payload), _validate=False)
+
+
+class FigureCache:
+    # Process-wide: the module is imported once per server process, so every
+    # session shares it. Entries are serialized figure JSON, evicted LRU-first
+    # once their total size passes max_bytes. With a disk tier (DiskCache),
+    # every entry is also written through to it and memory misses are looked
+    # up there, so results outlive the process.
+    def __init__(self, max_bytes, disk=None):
+        self.max_bytes = max_bytes
+        self.disk      = disk
+        self.bytes     = 0
+        self.hits      = 0
+        self.misses    = 0
+        self._entries  = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return payload
+
+    def put(self, key, payload, persist=True):
+        if persist and self.disk is not None:
+            self.disk.put(key, payload)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = payload
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def lookup(self, key):
+        # get() that counts a miss; the caller builds and put()s on None
+        payload = self.get(key)
+        if payload is None and self.disk is not None:
+            payload = self.disk.get(key)
+            if payload is not None:
+                self.put(key, payload, persist=False)
+        if payload is None:
+            with self._lock:
+                self.misses += 1
+        return payload
+
+    def get_or_build(self, name, fingerprint, params, theme, build):
+        key = figure_key(name, fingerprint, params, theme)
+        payload = self.lookup(key)
+        if payload is None:
+            payload = build().to_json()
+            self.put(key, payload)
+        return payload
+
+    def stats(self):
+        with self._lock:
+            out = dict(entries=len(self._entries), bytes=self.bytes,
+                       max_bytes=self.max_bytes, hits=self.hits, misses=self.misses)
+        if self.disk is not None:
+            out["disk"] = self.disk.stats()
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+
+FIGURES = FigureCache(int(os.environ.get("EFI_FIGURE_CACHE_MB", "64")) * 2**20, disk=DiskCache("figures"))
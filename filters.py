@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+ALL = "All"
+
+
+class FilterEngine:
+    # Indexes are built once per dataset: a score-sorted permutation (range filters
+    # become two binary searches) and a per-region row index. Results are immutable
+    # row-position arrays kept in a bounded LRU keyed on the filter tuple.
+    def __init__(self, df, cache_size=64):
+        self.n_rows = len(df)
+        scores = df["score"].to_numpy(dtype="float64", na_value=np.nan)
+        self.score_order = np.argsort(scores, kind="stable")
+        self.sorted_scores = scores[self.score_order]
+        codes, uniques = pd.factorize(df["region"], sort=True)
+        self.region_codes = codes
+        self.regions = [str(r) for r in uniques]
+        self.region_rows = {r: np.flatnonzero(codes == i) for i, r in enumerate(self.regions)}
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(region, score_range):
+        return (region, float(score_range[0]), float(score_range[1]))
+
+    def _compute(self, region, lo, hi):
+        start = np.searchsorted(self.sorted_scores, lo, side="left")
+        stop  = np.searchsorted(self.sorted_scores, hi, side="right")
+        if region == ALL and start == 0 and stop == self.n_rows:
+            return np.arange(self.n_rows)
+        if region != ALL and start == 0 and stop == self.n_rows:
+            return self.region_rows.get(region, np.empty(0, dtype=np.intp))
+        idx = self.score_order[start:stop]
+        if region != ALL:
+            if region not in self.region_rows:
+                return np.empty(0, dtype=np.intp)
+            idx = idx[self.region_codes[idx] == self.regions.index(region)]
+        # Back to dataset order so downstream ties sort exactly as before
+        return np.sort(idx)
+
+    def select(self, region=ALL, score_range=(0, 100)):
+        key = self.key(region, score_range)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        idx = self._compute(*key)
+        idx.flags.writeable = False
+        with self._lock:
+            self._cache[key] = idx
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return idx
+
+    def view(self, df, idx):
+        # The unfiltered selection is the frame itself — no copy at all
+        if len(idx) == self.n_rows:
+            return df
+        return df.take(idx)
@@ -0,0 +1,154 @@
+import copy
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from theme import COLORBAR_STYLE, GEO_STYLE, LAYOUT_BASE
+
+# Shared geo layer for every choropleth. World geometry ships with plotly.js, so
+# a map's payload is its layout plus per-country arrays: the layout (GEO_STYLE,
+# no template) is built once per height and reused, leaving each map to send
+# only ISO codes, values and hover text. A fixed uirevision keeps the user's
+# zoom and pan while the values underneath change.
+UIREVISION = "efi-geo"
+
+
+@functools.lru_cache(maxsize=8)
+def _base_layout(height):
+    return go.Layout(
+        **LAYOUT_BASE, template="none", height=height,
+        margin=dict(l=0, r=0, t=10, b=10),
+        geo=dict(GEO_STYLE, uirevision=UIREVISION),
+        uirevision=UIREVISION,
+    ).to_plotly_json()
+
+
+def base_layout(height):
+    return copy.deepcopy(_base_layout(height))
+
+
+class GeoIndex:
+    # Map features of a frame or cube: one per ISO-3 code, over the located rows
+    # (those with a code). Sub-national rows share their country's feature and
+    # are aggregated into it, so a map sends one value per country however many
+    # rows are in view. Computed once per dataset: a map view is a gather, or a
+    # bincount over features, and region aggregates a bincount over regions.
+    def __init__(self, iso_codes, names, regions):
+        # Missing codes factorize to -1; the rest are numbered in order of first
+        # appearance, which is the feature order
+        codes, uniques = pd.factorize(pd.Series(iso_codes))
+        self.pos = np.flatnonzero(codes >= 0)
+        self.feature = codes[self.pos]
+        self.iso = [str(c) for c in uniques]
+        self.counts = np.bincount(self.feature, minlength=len(self.iso))
+        rows = self.pos[np.unique(self.feature, return_index=True)[1]]
+        self.aggregated = len(self.pos) > len(self.iso)
+        self.names = self._feature_names(pd.Series(names), rows)
+        codes, uniques = pd.factorize(pd.Series(regions).iloc[rows])
+        self.region_codes = codes
+        self.regions = [str(r) for r in uniques]
+        self.region_names = np.array(self.regions + [None], dtype=object)[self.region_codes]
+        for arr in (self.pos, self.feature, self.counts, self.region_codes):
+            arr.flags.writeable = False
+
+    def _feature_names(self, names, rows):
+        # A country's own name; for sub-national rows ("Kenya · 1", "Kenya · 2")
+        # the prefix they share, or the ISO code when they share none
+        out = names.iloc[rows].to_numpy(dtype=object)
+        multi = np.flatnonzero(self.counts > 1)
+        if len(multi):
+            grouped = names.iloc[self.pos].astype("string").groupby(self.feature)
+            lo, hi = grouped.min().to_numpy(), grouped.max().to_numpy()
+            for f in multi:
+                out[f] = os.path.commonprefix([lo[f], hi[f]]).rstrip(" ·-–,(") or self.iso[f]
+        return out
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df["iso_code"], df["Country"], df["region"])
+
+    @classmethod
+    def from_cube(cls, cube):
+        return cls(cube.iso_codes, cube.countries, cube.regions)
+
+    def __len__(self):
+        return len(self.iso)
+
+    def take(self, values, how="mean"):
+        # One value per feature: a country's own row, or over its sub-national
+        # rows their mean (how="min" / "max" for ranks and flags); NaN where no
+        # row has a value
+        values = values.to_numpy(dtype="float64", na_value=np.nan) if isinstance(values, pd.Series) else values
+        v = np.asarray(values, dtype="float64")[self.pos]
+        if not self.aggregated:
+            return v
+        k = len(self.iso)
+        ok = ~np.isnan(v)
+        if how == "mean":
+            n = np.bincount(self.feature[ok], minlength=k)
+            sums = np.bincount(self.feature[ok], weights=v[ok], minlength=k)
+            return np.divide(sums, n, out=np.full(k, np.nan), where=n > 0)
+        ufunc, empty = {"min": (np.fmin, np.inf), "max": (np.fmax, -np.inf)}[how]
+        out = np.full(k, empty)
+        ufunc.at(out, self.feature[ok], v[ok])
+        out[out == empty] = np.nan
+        return out
+
+    def region_stats(self, values):
+        # (per-region mean, per-region count) over features with a value, so a
+        # country counts once however many rows it has
+        v = self.take(values)
+        ok = ~np.isnan(v) & (self.region_codes >= 0)
+        n = len(self.regions)
+        counts = np.bincount(self.region_codes[ok], minlength=n)
+        sums = np.bincount(self.region_codes[ok], weights=v[ok], minlength=n)
+        means = np.divide(sums, counts, out=np.full(n, np.nan), where=counts > 0)
+        return means, counts
+
+    def by_region(self, per_region):
+        # Broadcast one value per region to every feature (NaN without a region)
+        return np.append(np.asarray(per_region, dtype="float64"), np.nan)[self.region_codes]
+
+    def units(self):
+        # Hover field with the rows behind each feature, when any has several
+        return {"Units": fmt(self.counts, "{:,.0f}")} if self.aggregated else {}
+
+
+def hover_text(names, **fields):
+    # "<b>name</b><br>label: value…" per row; fields map label → preformatted strings
+    lines = [[f"<b>{n}</b>" for n in names]] + [[f"{label}: {v}" for v in values]
+                                                for label, values in fields.items()]
+    return ["<br>".join(parts) for parts in zip(*lines)]
+
+
+def fmt(values, spec="{:.1f}", missing="n/a"):
+    return [missing if v is None or (isinstance(v, float) and np.isnan(v)) else spec.format(v) for v in values]
+
+
+def choropleth(index, z, text, colorscale, zrange=None, colorbar=None, height=420):
+    # One trace over the index's ISO codes on the shared base layout; colorbar
+    # None hides the scale (categorical highlight maps)
+    trace = go.Choropleth(
+        locations=index.iso, z=z, text=text, hovertemplate="%{text}<extra></extra>",
+        colorscale=colorscale, marker_line_color="#30363d", marker_line_width=0.5,
+        showscale=colorbar is not None,
+    )
+    if zrange is not None:
+        trace.update(zmin=zrange[0], zmax=zrange[1])
+    if colorbar is not None:
+        trace.update(colorbar=dict(title=colorbar, **COLORBAR_STYLE))
+    return go.Figure(dict(data=[trace.to_plotly_json()], layout=base_layout(height)), _validate=False)
+
+
+def year_change(cube, column, start, end, index=None):
+    # Long-run change map data from the cube: one row per located country with
+    # the column at both years and the difference
+    index = GeoIndex.from_cube(cube) if index is None else index
+    k = cube.indicators.index(column)
+    first = index.take(cube.year_slice(start)[:, k])
+    last  = index.take(cube.year_slice(end)[:, k])
+    return pd.DataFrame({"Country": index.names, "iso_code": index.iso, "region": index.region_names,
+                         "start": first, "end": last, "change": last - first})
@@ -0,0 +1,344 @@
+import ast
+import graphlib
+import hashlib
+import keyword
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_source import SCHEMA
+
+# Derived metrics: computed columns declared as expressions over the dataset's
+# columns (and over each other), one per line of a definitions text:
+#
+#     gdp_total = gdp_ppp * population / 1000          # GDP PPP (USD bn)
+#     score_z   = zscore(score, by=region)              # Score z (region)
+#
+# Expressions are a small arithmetic language parsed with ast — numbers, column
+# and metric names, + - * / // % **, comparisons, and/or/not, and FUNCTIONS —
+# and evaluate to whole float64 arrays. Metrics are ordered by their dependency
+# graph, and each result is cached on a key chained from its expression and the
+# content tokens of its inputs, so a change to one input (say, score under new
+# pillar weights) recomputes only the metrics downstream of it.
+EXAMPLES = """\
+gdp_total = gdp_ppp * population / 1000          # GDP PPP (USD bn)
+real_growth = gdp_growth_5yr - inflation         # Growth − inflation (pp)
+score_z = zscore(score, by=region)               # Score z (region)
+"""
+CACHE_BYTES = int(os.environ.get("EFI_METRIC_CACHE_MB", "32")) * 2**20
+# Definitions arrive from URLs and the HTTP API: bounded before anything recurses
+MAX_EXPRESSION = 500   # characters per expression
+MAX_DEPTH      = 100   # syntax-tree nesting; parsing and evaluation recurse this deep
+MAX_METRICS    = 32    # metrics per definitions text
+
+
+class MetricError(ValueError):
+    pass
+
+
+# ─── FUNCTIONS ──────────────────────────────────────────────────────────────────
+def _codes(by, n):
+    # Group codes of a grouping column (-1 = no group); one group without one
+    if by is None:
+        return np.zeros(n, dtype=np.intp), 1
+    codes, uniques = pd.factorize(by)
+    return codes, len(uniques)
+
+
+def _group_moments(x, by):
+    # (codes, per-group count, Σx, Σx²) over non-missing values
+    codes, k = _codes(by, len(x))
+    ok = ~np.isnan(x) & (codes >= 0)
+    n = np.bincount(codes[ok], minlength=k).astype("float64")
+    s = np.bincount(codes[ok], weights=x[ok], minlength=k)
+    ss = np.bincount(codes[ok], weights=x[ok] ** 2, minlength=k)
+    return codes, n, s, ss
+
+
+def _broadcast(per_group, codes):
+    return np.append(per_group, np.nan)[codes]
+
+
+def group_mean(x, by=None):
+    codes, n, s, _ = _group_moments(x, by)
+    return _broadcast(np.divide(s, n, out=np.full(len(n), np.nan), where=n > 0), codes)
+
+
+def zscore(x, by=None):
+    # (x − group mean) / group sample standard deviation; deviations are summed
+    # in a second pass, as sums of squares of large values (gdp_ppp) cancel badly
+    dev = x - group_mean(x, by)
+    codes, n, _, ss = _group_moments(dev, by)
+    var = np.divide(ss, n - 1, out=np.full(len(n), np.nan), where=n > 1)
+    std = np.where(var > 0, np.sqrt(var), np.nan)
+    return dev / _broadcast(std, codes)
+
+
+def pct_rank(x, by=None):
+    # Percentile rank 0–100 within the group (ties share their mean rank)
+    s = pd.Series(x)
+    ranked = s.rank(pct=True) if by is None else s.groupby(_codes(by, len(x))[0]).rank(pct=True)
+    return ranked.to_numpy(dtype="float64", na_value=np.nan) * 100
+
+
+FUNCTIONS = {
+    "log": np.log, "log10": np.log10, "log1p": np.log1p, "exp": np.exp, "sqrt": np.sqrt, "abs": np.abs,
+    "min": np.fmin, "max": np.fmax, "clip": np.clip, "where": np.where,
+    "mean": group_mean, "zscore": zscore, "pct_rank": pct_rank,
+}
+GROUPED = {"mean", "zscore", "pct_rank"}  # take by=<string column>
+
+_BINARY = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+           ast.FloorDiv: np.floor_divide, ast.Mod: np.mod, ast.Pow: np.power}
+_COMPARE = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+            ast.Eq: np.equal, ast.NotEq: np.not_equal}
+
+
+# ─── METRICS ────────────────────────────────────────────────────────────────────
+def _depth(tree):
+    # Nesting depth of a syntax tree, without recursion
+    deepest, stack = 0, [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+    return deepest
+
+
+class Metric:
+    # One parsed definition: its inputs are `deps` (numeric columns or metrics)
+    # and `groups` (columns named in by=)
+    def __init__(self, name, expression, label=None):
+        self.name = name
+        self.expression = expression.strip()
+        self.label = label or name
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise MetricError(f"{name!r} is not a valid metric name")
+        if name in SCHEMA or name in FUNCTIONS:
+            raise MetricError(f"metric {name!r} would shadow a column or function")
+        if len(self.expression) > MAX_EXPRESSION:
+            raise MetricError(f"{name}: expression is longer than {MAX_EXPRESSION} characters")
+        self.deps, self.groups = set(), set()
+        try:
+            self.tree = ast.parse(self.expression, mode="eval")
+            if _depth(self.tree) > MAX_DEPTH:
+                raise MetricError(f"{name}: expression is nested more than {MAX_DEPTH} levels deep")
+            self._check(self.tree.body)
+            # Canonical form: whitespace and redundant parentheses don't change the key
+            self.canonical = ast.dump(self.tree)
+        except SyntaxError as exc:
+            raise MetricError(f"{name}: {exc.msg}") from None
+        except (RecursionError, MemoryError):
+            raise MetricError(f"{name}: expression is too complex") from None
+
+    def _check(self, node):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise MetricError(f"{self.name}: only numeric constants are allowed")
+        elif isinstance(node, ast.Name):
+            self.deps.add(node.id)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+            self._check(node.operand)
+        elif isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+            for child in [node.left, *node.comparators]:
+                self._check(child)
+        elif isinstance(node, ast.BoolOp):
+            for child in node.values:
+                self._check(child)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+            for arg in node.args:
+                self._check(arg)
+            for kw in node.keywords:
+                if kw.arg != "by" or node.func.id not in GROUPED or not isinstance(kw.value, ast.Name):
+                    raise MetricError(f"{self.name}: only {', '.join(sorted(GROUPED))} take by=<column>")
+                self.groups.add(kw.value.id)
+        else:
+            what = node.func.id if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) else type(node).__name__
+            raise MetricError(f"{self.name}: {what} is not supported in metric expressions")
+
+    def evaluate(self, env, columns, n):
+        # env: name → float64 array of every dep; columns: name → values of every group
+        with np.errstate(all="ignore"):
+            out = np.broadcast_to(np.asarray(self._eval(self.tree.body, env, columns), dtype="float64"), (n,))
+        # inf from a division by zero or log(0) is as missing as NaN on a chart
+        return np.where(np.isfinite(out), out, np.nan)
+
+    def _eval(self, node, env, columns):
+        ev = lambda n: self._eval(n, env, columns)  # noqa: E731
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return env[node.id]
+        if isinstance(node, ast.BinOp):
+            return _BINARY[type(node.op)](ev(node.left), ev(node.right))
+        if isinstance(node, ast.UnaryOp):
+            v = ev(node.operand)
+            return np.logical_not(v) if isinstance(node.op, ast.Not) else (-v if isinstance(node.op, ast.USub) else v)
+        if isinstance(node, ast.Compare):
+            left, result = ev(node.left), True
+            for op, right in zip(node.ops, node.comparators):
+                right = ev(right)
+                result = np.logical_and(result, _COMPARE[type(op)](left, right))
+                left = right
+            return result
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            values = [ev(v) for v in node.values]
+            result = values[0]
+            for v in values[1:]:
+                result = combine(result, v)
+            return result
+        fn = FUNCTIONS[node.func.id]
+        args = [np.asarray(ev(a), dtype="float64") for a in node.args]
+        kwargs = {kw.arg: columns[kw.value.id] for kw in node.keywords}
+        try:
+            return fn(*args, **kwargs)
+        except (TypeError, ValueError) as exc:
+            raise MetricError(f"{self.name}: {node.func.id}(): {exc}") from None
+
+
+def parse(text):
+    # "name = expression  # label" per line; blank and comment lines are skipped
+    metrics = []
+    for line in (text or "").splitlines():
+        body, _, label = line.partition("#")
+        if not body.strip():
+            continue
+        if len(metrics) == MAX_METRICS:
+            raise MetricError(f"at most {MAX_METRICS} metrics")
+        name, eq, expression = body.partition("=")
+        if not eq or not expression.strip() or expression.lstrip().startswith("="):
+            raise MetricError(f"expected 'name = expression', got {line.strip()!r}")
+        metrics.append(Metric(name.strip(), expression, label.strip() or None))
+    return MetricSet(metrics)
+
+
+class MetricSet:
+    # Metrics in dependency order; cycles and duplicate names are errors
+    def __init__(self, metrics=()):
+        self.metrics = {}
+        for m in metrics:
+            if m.name in self.metrics:
+                raise MetricError(f"metric {m.name!r} is defined twice")
+            self.metrics[m.name] = m
+            if len(self.metrics) > MAX_METRICS:
+                raise MetricError(f"at most {MAX_METRICS} metrics")
+        graph = {name: m.deps & self.metrics.keys() for name, m in self.metrics.items()}
+        try:
+            self.order = list(graphlib.TopologicalSorter(graph).static_order())
+        except graphlib.CycleError as exc:
+            raise MetricError(f"metrics depend on each other in a cycle: {' → '.join(exc.args[1])}") from None
+
+    @classmethod
+    def from_definitions(cls, definitions):
+        return cls(Metric(*d) for d in definitions)
+
+    def __len__(self):
+        return len(self.metrics)
+
+    @property
+    def names(self):
+        return list(self.metrics)
+
+    @property
+    def labels(self):
+        return {name: m.label for name, m in self.metrics.items()}
+
+    def definitions(self):
+        # Hashable form, for cache keys
+        return tuple((m.name, m.expression, m.label) for m in self.metrics.values())
+
+    def dependents(self, name):
+        # Metrics that must be recomputed when `name` (a column or metric) changes
+        out, frontier = set(), {name}
+        while frontier:
+            frontier = {m for m, metric in self.metrics.items() if metric.deps & frontier} - out
+            out |= frontier
+        return [m for m in self.order if m in out]
+
+    def check(self, frame):
+        numeric = set(frame.select_dtypes("number").columns)
+        for m in self.metrics.values():
+            unknown = m.deps - numeric - self.metrics.keys()
+            if unknown:
+                raise MetricError(f"{m.name}: unknown column(s) {', '.join(sorted(unknown))}")
+            missing = m.groups - set(frame.columns)
+            if missing:
+                raise MetricError(f"{m.name}: cannot group by {', '.join(sorted(missing))}")
+
+    def evaluate(self, frame, token, cache=None):
+        # {name: float64 array} for every metric over frame; token(column) is a
+        # content hash of one input column (DatasetStore.column_token)
+        cache = RESULTS if cache is None else cache
+        self.check(frame)
+        keys, env, columns = {}, {}, {}
+
+        def key_of(name):
+            return keys[name] if name in keys else token(name)
+
+        values = {}
+        for name in self.order:
+            m = self.metrics[name]
+            inputs = sorted(m.deps | m.groups)
+            keys[name] = hashlib.sha1(repr((m.canonical, [(i, key_of(i)) for i in inputs])).encode()).hexdigest()
+            out = cache.get(keys[name])
+            if out is None:
+                for c in m.deps - env.keys():
+                    if c not in self.metrics:
+                        env[c] = frame[c].to_numpy(dtype="float64", na_value=np.nan)
+                for c in m.groups - columns.keys():
+                    columns[c] = frame[c].to_numpy(dtype=object)
+                out = m.evaluate(env, columns, len(frame))
+                out.flags.writeable = False
+                cache.put(keys[name], out)
+            env[name] = values[name] = out
+        return values
+
+
+# ─── RESULT CACHE ───────────────────────────────────────────────────────────────
+class ResultCache:
+    # Process-wide LRU of metric arrays keyed on (expression, input tokens),
+    # bounded by total bytes
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes     = 0
+        self.hits      = 0
+        self.misses    = 0
+        self._entries  = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            out = self._entries.get(key)
+            if out is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return out
+
+    def put(self, key, values):
+        if values.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self._entries[key] = values
+            self.bytes += values.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+
+    def stats(self):
+        with self._lock:
+            return dict(entries=len(self._entries), bytes=self.bytes, hits=self.hits, misses=self.misses)
+
+
+RESULTS = ResultCache(CACHE_BYTES)
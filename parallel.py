@@ -0,0 +1,113 @@
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import compaction
+
+# Figures of one rerun are independent of each other: build, compact and
+# serialize them on a worker pool while the script lays out the page, then
+# emit them in layout order. EFI_FIGURE_WORKERS=0 (or 1) builds serially at
+# emit time; EFI_FIGURE_POOL=process moves the work off the GIL at the cost of
+# pickling each chart's input frame to a worker process.
+WORKERS = int(os.environ.get("EFI_FIGURE_WORKERS", str(min(4, os.cpu_count() or 1))))
+POOL    = os.environ.get("EFI_FIGURE_POOL", "thread")
+
+_pools = {}
+_lock  = threading.Lock()
+
+
+def executor(kind=POOL, workers=WORKERS):
+    # One process-wide pool per (kind, size), shared by every session
+    if workers <= 1:
+        return None
+    with _lock:
+        pool = _pools.get((kind, workers))
+        if pool is None:
+            if kind == "process":
+                pool = ProcessPoolExecutor(max_workers=workers)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="efi-figure")
+            _pools[(kind, workers)] = pool
+        return pool
+
+
+def _discard(kind, workers):
+    with _lock:
+        pool = _pools.pop((kind, workers), None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_payload(build, data, params, compact_name=None, report=False):
+    # Runs on a worker: (figure JSON, build seconds, compaction report or None)
+    start = time.perf_counter()
+    fig = build(data, **params)
+    if compact_name is not None:
+        fig = compaction.compact(fig, compact_name, report=report)
+    payload = fig.to_json()
+    size = compaction.size_report().get(compact_name) if report and compact_name else None
+    return payload, time.perf_counter() - start, size
+
+
+class FigureBatch:
+    # Figures submitted during one rerun, keyed by name. submit() returns at
+    # once; take() blocks until that figure's JSON is ready. With no pool, or if
+    # the pool cannot run a job (a build that does not pickle, a dead worker
+    # process), the figure is built inline at take() time, so results never
+    # depend on the mode.
+    def __init__(self, workers=WORKERS, kind=POOL, compact=True, cache=None):
+        self.workers = workers
+        self.kind    = kind
+        self.compact = compact
+        self.cache   = cache
+        self._jobs   = {}
+
+    def submit(self, name, build, data, cache_key=None, report=False, **params):
+        if cache_key is not None and self.cache is not None:
+            payload = self.cache.lookup(cache_key)
+            if payload is not None:
+                self._jobs[name] = dict(done=(payload, 0.0, None), rows=len(data))
+                return
+        args = (build, data, params, name if self.compact else None, report)
+        job = dict(args=args, rows=len(data), cache_key=cache_key)
+        pool = executor(self.kind, self.workers)
+        if pool is not None:
+            try:
+                job["future"] = pool.submit(render_payload, *args)
+            except RuntimeError:
+                # Pool shut down (interpreter exit or a broken process pool)
+                _discard(self.kind, self.workers)
+        self._jobs[name] = job
+
+    def rows(self, name):
+        return self._jobs[name]["rows"]
+
+    def take(self, name):
+        # (payload, seconds spent building on the worker)
+        job = self._jobs.pop(name)
+        if "done" in job:
+            payload, seconds, _ = job["done"]
+            return payload, seconds
+        result = None
+        future = job.get("future")
+        if future is not None:
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                _discard(self.kind, self.workers)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                # Unpicklable build or data; the inline build below reports
+                # genuine errors from the build itself
+                if self.kind != "process":
+                    raise
+        if result is None:
+            result = render_payload(*job["args"])
+        payload, seconds, size = result
+        if size is not None and self.kind == "process":
+            compaction.record(name, size)
+        if job["cache_key"] is not None and self.cache is not None:
+            self.cache.put(job["cache_key"], payload)
+        return payload, seconds
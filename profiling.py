@@ -0,0 +1,223 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# Per-section spans for Dashboard.py reruns. A run is traced when EFI_PROFILE=1
+# (or enable() was called, as the benchmark harness does) or when the session
+# opted in via the sidebar Performance panel. Untraced runs pay one attribute
+# lookup per section.
+ENABLED = os.environ.get("EFI_PROFILE", "0") == "1"
+EXPORT_PATH = os.environ.get("EFI_PROFILE_EXPORT")
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+_lock = threading.Lock()
+RECENT_RUNS = deque(maxlen=200)
+# section name → dict(count, seconds, rows, bytes, buckets)
+METRICS = {}
+# Cold-start phases of this process (imports, first run), recorded once
+STARTUP = {}
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def active():
+    return getattr(_local, "spans", None) is not None
+
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+
+def begin_run(enabled=False, session=None):
+    if not (ENABLED or enabled):
+        _local.spans = None
+        _local.stack = ()
+        return
+    _local.spans = []
+    _local.stack = []
+    _local.run = dict(trace_id=_new_id(16), span_id=_new_id(8), session=session,
+                      start_ns=time.time_ns(), start=time.perf_counter())
+
+
+def end_run():
+    if not active():
+        return None
+    run = _local.run
+    run.update(total_s=time.perf_counter() - run.pop("start"), end_ns=time.time_ns(),
+               spans=_local.spans, finished=time.time())
+    _local.spans = None
+    _local.stack = ()
+    with _lock:
+        RECENT_RUNS.append(run)
+        for span in run["spans"]:
+            _observe(span)
+    if EXPORT_PATH:
+        write_export(EXPORT_PATH, run)
+    return run
+
+
+def last_run():
+    return RECENT_RUNS[-1] if RECENT_RUNS else None
+
+
+@contextmanager
+def section(name, rows=None):
+    if getattr(_local, "spans", None) is None:
+        yield
+        return
+    stack = _local.stack
+    parent = stack[-1] if stack else None
+    span = dict(name=name, parent=parent["name"] if parent else None,
+                span_id=_new_id(8), parent_id=parent["span_id"] if parent else _local.run["span_id"],
+                rows=rows or 0, bytes=0, start_ns=time.time_ns())
+    stack.append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span["seconds"] = time.perf_counter() - start
+        span["end_ns"] = span["start_ns"] + int(span["seconds"] * 1e9)
+        stack.pop()
+        _local.spans.append(span)
+
+
+def add_bytes(n):
+    # Attribute n bytes sent to the frontend to every open section
+    for span in getattr(_local, "stack", ()):
+        span["bytes"] += n
+
+
+def add_span(name, seconds, rows=0):
+    # A span timed elsewhere (e.g. a figure built on a worker thread), recorded
+    # as a child of the open section and ending now
+    if getattr(_local, "spans", None) is None:
+        return
+    stack = _local.stack
+    parent = stack[-1] if stack else None
+    end_ns = time.time_ns()
+    _local.spans.append(dict(name=name, parent=parent["name"] if parent else None,
+                             span_id=_new_id(8), parent_id=parent["span_id"] if parent else _local.run["span_id"],
+                             rows=rows, bytes=0, seconds=seconds,
+                             start_ns=end_ns - int(seconds * 1e9), end_ns=end_ns))
+
+
+def startup(phase, seconds):
+    # Records a phase only the first time; returns True if this call recorded it.
+    # Traced or not: a cold start happens once and is worth keeping either way.
+    with _lock:
+        if phase in STARTUP:
+            return False
+        STARTUP[phase] = seconds
+        return True
+
+
+def report_startup(stream=None):
+    # One stderr line with the cold-start phases, under EFI_PROFILE=1 only
+    if ENABLED:
+        print("efi: cold start " + " · ".join(f"{k} {v * 1000:.0f} ms" for k, v in STARTUP.items()),
+              file=stream or sys.stderr)
+
+
+def add_rows(n):
+    # Rows a section learns about only inside it (e.g. what a filter kept)
+    stack = getattr(_local, "stack", ())
+    if stack:
+        stack[-1]["rows"] += n
+
+
+# ─── AGGREGATES ─────────────────────────────────────────────────────────────────
+def _observe(span):
+    m = METRICS.setdefault(span["name"], dict(count=0, seconds=0.0, rows=0, bytes=0,
+                                              buckets=[0] * len(SECONDS_BUCKETS)))
+    m["count"]   += 1
+    m["seconds"] += span["seconds"]
+    m["rows"]    += span["rows"]
+    m["bytes"]   += span["bytes"]
+    for i, le in enumerate(SECONDS_BUCKETS):
+        if span["seconds"] <= le:
+            m["buckets"][i] += 1
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    with _lock:
+        metrics = {k: dict(v, buckets=list(v["buckets"])) for k, v in METRICS.items()}
+        reruns = len(RECENT_RUNS)
+        startup_items = list(STARTUP.items())
+    out = [
+        "# HELP efi_section_seconds Wall time spent in a dashboard section.",
+        "# TYPE efi_section_seconds histogram",
+    ]
+    for name, m in sorted(metrics.items()):
+        lbl = f'section="{_label(name)}"'
+        for le, count in zip(SECONDS_BUCKETS, m["buckets"]):
+            out.append(f'efi_section_seconds_bucket{{{lbl},le="{le}"}} {count}')
+        out.append(f'efi_section_seconds_bucket{{{lbl},le="+Inf"}} {m["count"]}')
+        out.append(f"efi_section_seconds_sum{{{lbl}}} {m['seconds']:.6f}")
+        out.append(f"efi_section_seconds_count{{{lbl}}} {m['count']}")
+    for metric, key, help_ in (("efi_section_rows_total", "rows", "Rows processed by a section."),
+                               ("efi_section_bytes_total", "bytes", "Bytes sent to the frontend by a section.")):
+        out += [f"# HELP {metric} {help_}", f"# TYPE {metric} counter"]
+        out += [f'{metric}{{section="{_label(n)}"}} {m[key]}' for n, m in sorted(metrics.items())]
+    out += ["# HELP efi_startup_seconds Cold-start phases of this process.", "# TYPE efi_startup_seconds gauge"]
+    out += [f'efi_startup_seconds{{phase="{_label(p)}"}} {s:.6f}' for p, s in startup_items]
+    out += ["# HELP efi_traced_reruns Traced reruns held in memory.", "# TYPE efi_traced_reruns gauge",
+            f"efi_traced_reruns {reruns}"]
+    return "\n".join(out) + "\n"
+
+
+def _attr(key, value):
+    kind = "intValue" if isinstance(value, int) else "stringValue"
+    return dict(key=key, value={kind: str(value)})
+
+
+def otel_json(runs=None):
+    # OTLP/JSON trace export: one trace per rerun, a root "rerun" span and one
+    # child span per section.
+    runs = list(RECENT_RUNS) if runs is None else runs
+    spans = []
+    for run in runs:
+        common = [_attr("efi.session", run["session"])] if run.get("session") else []
+        spans.append(dict(traceId=run["trace_id"], spanId=run["span_id"], name="rerun", kind=1,
+                          startTimeUnixNano=str(run["start_ns"]), endTimeUnixNano=str(run["end_ns"]),
+                          attributes=common))
+        for s in run["spans"]:
+            spans.append(dict(
+                traceId=run["trace_id"], spanId=s["span_id"], parentSpanId=s["parent_id"],
+                name=s["name"], kind=1,
+                startTimeUnixNano=str(s["start_ns"]), endTimeUnixNano=str(s["end_ns"]),
+                attributes=common + [_attr("efi.rows", s["rows"]), _attr("efi.bytes", s["bytes"])],
+            ))
+    return dict(resourceSpans=[dict(
+        resource=dict(attributes=[_attr("service.name", "efi-dashboard")]),
+        scopeSpans=[dict(scope=dict(name="efi.profiling"), spans=spans)],
+    )])
+
+
+def write_export(path, run=None):
+    # *.prom → overwrite with a Prometheus text snapshot (node-exporter textfile
+    # style); anything else → append one OTLP/JSON line per rerun.
+    path = Path(path)
+    try:
+        if path.suffix == ".prom":
+            tmp = path.with_suffix(".prom.tmp")
+            tmp.write_text(prometheus_text())
+            os.replace(tmp, path)
+        else:
+            with path.open("a") as f:
+                f.write(json.dumps(otel_json([run] if run else None)) + "\n")
+    except OSError:
+        pass
@@ -0,0 +1,345 @@
+"""Headless queries over the dashboard's data.
+
+The stores, filters, KPIs and correlation matrices behind Dashboard.py, without
+Streamlit. A query is a plain dict; every field is optional:
+
+    import query
+    query.run({"year": 2022, "region": "Europe", "score_range": [60, 100],
+               "weights": {"tax_burden": 2}, "method": "spearman", "scale": "robust_z",
+               "metrics": {"gdp_total": "gdp_ppp * population / 1000"},
+               "include": ["kpis", "correlation", "ranking", "similar"], "top_n": 10,
+               "country": "Chile", "k": 5})
+
+Stores are process-wide and keyed on the dataset version, so the dashboard, the
+HTTP API (api.py) and any script importing this module share one copy of each
+frame and its indexes.
+"""
+import functools
+import hashlib
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+import cube
+import data_source
+import metrics
+import transforms
+from correlation import spearman
+from data_source import CORR_COLUMNS
+from disk_cache import DiskCache
+from figure_cache import FigureCache
+from filters import ALL
+from similarity import SimilarityIndex
+from store import DatasetStore
+
+METHODS = ("pearson", "spearman")
+INCLUDE = ("kpis", "correlation", "ranking", "similar")
+DEFAULTS = dict(year=None, weights={}, metrics={}, region=ALL, score_range=[0, 100], method="pearson",
+                scale="raw", include=["kpis"], top_n=20, country=None, k=5, across_years=False)
+# Inclusive bounds of the count fields
+LIMITS = dict(top_n=(1, 1000), k=(1, 100))
+
+
+# KPI cards by view fingerprint: a few hundred bytes each
+KPIS = FigureCache(2**20, disk=DiskCache("kpis"))
+
+
+class QueryError(ValueError):
+    pass
+
+
+# ─── STORES ─────────────────────────────────────────────────────────────────────
+def shared(maxsize):
+    # lru_cache whose misses are built under a lock, so concurrent callers
+    # (dashboard sessions, API requests) never build the same store twice
+    def wrap(fn):
+        cached = functools.lru_cache(maxsize)(fn)
+        lock = threading.RLock()
+
+        @functools.wraps(fn)
+        def inner(*args):
+            with lock:
+                return cached(*args)
+        inner.cache_clear = cached.cache_clear
+        return inner
+    return wrap
+
+
+@shared(maxsize=2)
+def load_cube(version):
+    return cube.open_cube()
+
+
+@shared(maxsize=16)
+def artifact_table(version, name, year=None):
+    # Derived tables prebuilt by etl.py — None unless EFI_DATA_PATH is its output
+    source = data_source.open_source()
+    return source.table(name, year) if isinstance(source, data_source.ArtifactSource) else None
+
+
+@shared(maxsize=4)
+def base_store(version, year=None, columns=tuple(data_source.DASHBOARD_COLUMNS)):
+    if year is None:
+        df = data_source.load(list(columns))
+    else:
+        df = load_cube(version).frame(year, list(columns))
+    return DatasetStore(df, CORR_COLUMNS)
+
+
+@shared(maxsize=16)
+def weighted_store(version, year, multipliers):
+    # Score and rank under non-default pillar weights, ranked within the dataset
+    base = base_store(version, year)
+    score, rank = base.scorer.rescore(base.scorer.weights(multipliers))
+    return DatasetStore(base.frame.assign(score=score, rank=pd.array(rank, dtype="Int32")), CORR_COLUMNS)
+
+
+@shared(maxsize=16)
+def derived_store(version, year, multipliers, definitions):
+    # The year/weighting's store plus one column per derived metric (metrics.py),
+    # which join the correlation columns. Metric results are cached on their
+    # inputs' content, so a new weighting recomputes only score-dependent ones.
+    source = weighted_store(version, year, multipliers) if any(w != 1.0 for w in multipliers) \
+        else base_store(version, year)
+    defs = metrics.MetricSet.from_definitions(definitions)
+    values = defs.evaluate(source.frame, source.column_token)
+    return DatasetStore(source.frame.assign(**values), CORR_COLUMNS + defs.names)
+
+
+@shared(maxsize=2)
+def panel(version):
+    # (similarity index, long frame) over every country-year with a score; rows
+    # of one country skip each other, so matches come from other countries
+    cube = load_cube(version)
+    columns = [c for c in CORR_COLUMNS if c in cube.indicators]
+    frame = cube.long(columns)
+    labels = frame["Country"].astype(str) + " " + frame["year"].astype(str)
+    return SimilarityIndex.from_frame(frame, columns, labels=labels.to_numpy(dtype=object)), frame
+
+
+def years(version=None):
+    return load_cube(version or data_source.version()).years
+
+
+def resolve_year(year, version):
+    # None (single-year data) or one of the cube's years; the latest by default.
+    # A year the data doesn't have is an error even for single-year data, which
+    # would otherwise serve its one year under the requested one.
+    available = years(version)
+    if year is not None and int(year) not in available:
+        have = f"{available[0]}–{available[-1]}" if available else "none (no year column)"
+        raise QueryError(f"no data for year {year}; available: {have}")
+    if len(available) <= 1:
+        return None
+    return available[-1] if year is None else int(year)
+
+
+def multipliers(scorer, weights):
+    # Pillar → multiplier dict (missing pillars 1.0) as a tuple in scorer order
+    unknown = set(weights) - set(scorer.columns)
+    if unknown:
+        raise QueryError(f"unknown weight column(s): {', '.join(sorted(unknown))}")
+    return tuple(float(weights.get(c, 1.0)) for c in scorer.columns)
+
+
+def metric_set(definitions):
+    # {name: expression} (API) or a definitions text (dashboard) → MetricSet
+    try:
+        if isinstance(definitions, str):
+            return metrics.parse(definitions)
+        return metrics.MetricSet(metrics.Metric(str(k), str(v)) for k, v in dict(definitions or {}).items())
+    except metrics.MetricError as exc:
+        raise QueryError(f"bad metric: {exc}") from None
+
+
+def dataset(year=None, weights=None, version=None, metric_defs=None):
+    # (store, base store, year): the store for a year, pillar weighting and
+    # derived metrics (a MetricSet, {name: expression} or definitions text)
+    version = version or data_source.version()
+    year = resolve_year(year, version)
+    base = base_store(version, year)
+    m = multipliers(base.scorer, weights or {})
+    defs = metric_defs if isinstance(metric_defs, metrics.MetricSet) else metric_set(metric_defs)
+    if len(defs):
+        try:
+            store = derived_store(version, year, m, defs.definitions())
+        except metrics.MetricError as exc:
+            raise QueryError(f"bad metric: {exc}") from None
+    else:
+        store = weighted_store(version, year, m) if any(w != 1.0 for w in m) else base
+    return store, base, year
+
+
+# ─── AGGREGATES ─────────────────────────────────────────────────────────────────
+def _mean(values):
+    m = values.mean()
+    return None if pd.isna(m) else float(m)
+
+
+def kpis(store, filter_key, idx, view):
+    # The KPI cards: row count, mean score, top-ranked country, mean inflation
+    n = len(idx)
+    top = store.frame["Country"].iat[store.rankings.order(filter_key, idx, "rank")[0]] if n else None
+    return dict(countries=n, avg_score=_mean(view["score"]),
+                top_country=None if top is None else str(top),
+                avg_inflation=_mean(view["inflation"]))
+
+
+def cached_kpis(store, filter_key, idx, view, fingerprint):
+    # kpis() cached on a content fingerprint of the view (the store's plus the
+    # filter), in memory and on disk, so a restarted server answers a view it
+    # has seen without building the ranking index first
+    payload = KPIS.lookup(fingerprint)
+    if payload is None:
+        payload = json.dumps(kpis(store, filter_key, idx, view))
+        KPIS.put(fingerprint, payload)
+    return json.loads(payload)
+
+
+def correlation_matrix(store, base, region, score_range, method="pearson", version=None, year=None,
+                       scale="raw"):
+    # scale: the transforms.py scale the columns are correlated on
+    method = method.lower()
+    if method not in METHODS:
+        raise QueryError(f"unknown correlation method {method!r}")
+    if scale not in transforms.SCALES:
+        raise QueryError(f"unknown scale {scale!r}; choose from {list(transforms.SCALES)}")
+    if store is base and scale == "raw" and region == ALL and tuple(score_range) == (0, 100):
+        prebuilt = artifact_table(version or data_source.version(), "correlation", year)
+        if prebuilt is not None:
+            # Unfiltered matrix straight from the ETL artifacts
+            return (prebuilt[prebuilt["method"] == method]
+                    .drop(columns="method").set_index("column").rename_axis(None))
+    if method == "pearson":
+        return store.scaled_correlations(scale).pearson(region, score_range)
+    _, idx, view = store.select(region, score_range)
+    if scale != "raw":
+        view = store.scaled(scale).take(idx)
+    return spearman(view, store.corr_columns)
+
+
+def similar(store, country, k=5, idx=None, across_years=False, version=None, year=None):
+    # The k rows most like `country`: other countries of the store (only rows
+    # idx when given), or with across_years every year of those countries
+    if across_years and year is not None:
+        index, frame = panel(version or data_source.version())
+        pos = index.positions([f"{country} {year}"])
+        if idx is not None:
+            keep = frame["Country"].isin(store.frame["Country"].take(idx)).to_numpy()
+            idx = np.flatnonzero(keep)
+    else:
+        index, frame = store.similarity, store.frame
+        pos = index.positions([country])
+    if not len(pos):
+        raise QueryError(f"no data for {country!r}" + (f" in {year}" if year is not None else ""))
+    nn, dist = index.neighbours(pos, k, within=idx)
+    found = np.isfinite(dist[0])
+    nn, dist = nn[0][found], dist[0][found]
+    out = frame.take(nn)[[c for c in ("Country", "region", "year") if c in frame.columns] + index.columns]
+    return out.assign(similarity=index.similarity(dist).round(1), distance=dist.round(3))
+
+
+def ranking(store, filter_key, idx, n):
+    # Derived metric columns ride along after the fixed ones
+    pos = store.rankings.top(filter_key, idx, "rank", n, True)
+    extra = [c for c in store.corr_columns if c not in CORR_COLUMNS]
+    return store.frame.take(pos)[["Country", "region", "rank", "score"] + extra]
+
+
+# ─── QUERIES ────────────────────────────────────────────────────────────────────
+def normalize(spec):
+    # Fill defaults and validate; the result is the query's canonical form
+    spec = dict(spec or {})
+    unknown = set(spec) - set(DEFAULTS)
+    if unknown:
+        raise QueryError(f"unknown query field(s): {', '.join(sorted(unknown))}")
+    q = {k: spec.get(k, v) for k, v in DEFAULTS.items()}
+    try:
+        lo, hi = (float(v) for v in q["score_range"])
+        q["score_range"] = [lo, hi]
+        q["top_n"] = int(q["top_n"])
+        q["k"] = int(q["k"])
+        q["year"] = None if q["year"] is None else int(q["year"])
+        q["weights"] = {str(k): float(v) for k, v in dict(q["weights"]).items()}
+        q["metrics"] = {str(k): str(v) for k, v in dict(q["metrics"]).items()}
+    except (TypeError, ValueError) as exc:
+        raise QueryError(f"malformed query: {exc}") from None
+    for name, (lo_n, hi_n) in LIMITS.items():
+        if not lo_n <= q[name] <= hi_n:
+            raise QueryError(f"{name} must be between {lo_n} and {hi_n}, got {q[name]}")
+    include = [q["include"]] if isinstance(q["include"], str) else list(q["include"])
+    bad = [i for i in include if i not in INCLUDE]
+    if bad:
+        raise QueryError(f"unknown include {bad}; choose from {list(INCLUDE)}")
+    q["include"] = sorted(set(include))
+    q["method"] = str(q["method"]).lower()
+    if q["method"] not in METHODS:
+        raise QueryError(f"unknown correlation method {q['method']!r}; choose from {list(METHODS)}")
+    q["scale"] = str(q["scale"]).lower()
+    if q["scale"] not in transforms.SCALES:
+        raise QueryError(f"unknown scale {q['scale']!r}; choose from {list(transforms.SCALES)}")
+    q["region"] = str(q["region"])
+    q["country"] = None if q["country"] is None else str(q["country"])
+    q["across_years"] = str(q["across_years"]).lower() in ("true", "1", "yes")
+    if "similar" in q["include"] and q["country"] is None:
+        raise QueryError("include 'similar' needs a country")
+    return q
+
+
+def etag(spec, version=None):
+    # Identifies a query's result: the dataset version plus the canonical query
+    raw = json.dumps([version or data_source.version(), normalize(spec)], sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _records(frame):
+    return json.loads(frame.to_json(orient="records"))
+
+
+def _matrix(frame):
+    values = frame.to_numpy(dtype="float64")
+    return dict(columns=[str(c) for c in frame.columns],
+                matrix=[[None if np.isnan(v) else round(float(v), 4) for v in row] for row in values])
+
+
+def run(spec=None, version=None):
+    # One query → JSON-ready dict
+    q = normalize(spec)
+    version = version or data_source.version()
+    store, base, year = dataset(q["year"], q["weights"], version, q["metrics"])
+    filter_key, idx, view = store.select(q["region"], q["score_range"])
+    out = dict(query=q, year=year, rows=len(idx))
+    if "kpis" in q["include"]:
+        out["kpis"] = kpis(store, filter_key, idx, view)
+    if "correlation" in q["include"]:
+        matrix = correlation_matrix(store, base, q["region"], q["score_range"], q["method"], version, year,
+                                    q["scale"])
+        out["correlation"] = dict(method=q["method"], scale=q["scale"], **_matrix(matrix))
+    if "ranking" in q["include"]:
+        out["ranking"] = _records(ranking(store, filter_key, idx, q["top_n"]))
+    if "similar" in q["include"]:
+        out["similar"] = _records(similar(store, q["country"], q["k"], idx, q["across_years"], version, year))
+    return out
+
+
+def batch(specs, version=None):
+    # Queries of one batch share a dataset version even if the file changes midway;
+    # a malformed query yields {"error": ...} in its slot instead of failing the rest
+    version = version or data_source.version()
+    results = []
+    for spec in specs:
+        try:
+            results.append(run(spec, version))
+        except QueryError as exc:
+            results.append(dict(error=str(exc)))
+    return results
+
+
+def meta(version=None):
+    version = version or data_source.version()
+    store, _, year = dataset(version=version)
+    return dict(version=hashlib.sha1(version.encode()).hexdigest()[:12], years=years(version), latest_year=year,
+                regions=store.filters.regions, weights=store.scorer.columns,
+                methods=list(METHODS), scales=list(transforms.SCALES), include=list(INCLUDE))
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Subsets smaller than this fraction of the dataset are cheaper to sort directly
+# than to derive from the dataset-wide permutation.
+SMALL_SUBSET = 1 / 16
+
+
+class RankingIndex:
+    # One stable argsort per (indicator, direction) over the whole dataset, built
+    # on first use. A filtered ordering is derived from it with a single membership
+    # pass (no sort) and kept in a bounded LRU keyed on (filter key, column,
+    # direction), so sweeping Top N over an unchanged filter is a slice.
+    def __init__(self, df, columns, cache_size=128):
+        self.n_rows = len(df)
+        self.values = {c: df[c].to_numpy(dtype="float64", na_value=np.nan) for c in columns}
+        self.cache_size = cache_size
+        self._global = {}
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_key(self, column, values):
+        # Register a precomputed numeric sort key (e.g. a string column's collation rank)
+        with self._lock:
+            self.values[column] = np.asarray(values, dtype="float64")
+
+    def _sort_key(self, column, ascending, rows=None):
+        v = self.values[column] if rows is None else self.values[column][rows]
+        # NaN sorts last in both directions, like pandas' na_position="last"
+        return v if ascending else -v
+
+    def global_order(self, column, ascending):
+        key = (column, ascending)
+        order = self._global.get(key)
+        if order is None:
+            order = np.argsort(self._sort_key(column, ascending), kind="stable")
+            order.flags.writeable = False
+            self._global[key] = order
+        return order
+
+    def _derive(self, idx, column, ascending):
+        if len(idx) == self.n_rows:
+            return self.global_order(column, ascending)
+        if len(idx) < self.n_rows * SMALL_SUBSET:
+            return idx[np.argsort(self._sort_key(column, ascending, idx), kind="stable")]
+        member = np.zeros(self.n_rows, dtype=bool)
+        member[idx] = True
+        g = self.global_order(column, ascending)
+        return g[member[g]]
+
+    def order(self, filter_key, idx, column, ascending=True):
+        key = (filter_key, column, ascending)
+        with self._lock:
+            hit = self._orders.get(key)
+            if hit is not None:
+                self._orders.move_to_end(key)
+                return hit
+        order = self._derive(idx, column, ascending)
+        order.flags.writeable = False
+        with self._lock:
+            self._orders[key] = order
+            while len(self._orders) > self.cache_size:
+                self._orders.popitem(last=False)
+        return order
+
+    def top(self, filter_key, idx, column, n, ascending=True):
+        with self._lock:
+            hit = self._orders.get((filter_key, column, ascending))
+        if hit is not None or n >= len(idx) // 4:
+            return self.order(filter_key, idx, column, ascending)[:n]
+        return select_top(self._sort_key(column, ascending, idx), idx, n)
+
+
+def select_top(keys, idx, n):
+    # O(len) partial selection; ties at the cut-off resolve by position so the
+    # result equals a stable full sort followed by [:n].
+    if n <= 0:
+        return idx[:0]
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    kth  = np.partition(keys, n - 1)[n - 1]
+    less = np.flatnonzero(keys < kth)
+    tied = np.flatnonzero(keys == kth)[: n - len(less)]
+    pick = np.concatenate([less, tied])
+    pick = pick[np.lexsort((pick, keys[pick]))]
+    return idx[pick]
@@ -0,0 +1,194 @@
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+from theme import TEMPLATE
+
+# Scatter charts with more than MAX_POINTS points in view send 2-D bins instead of
+# one marker per row: hexagonal cells (or a rectangular density grid with
+# EFI_SCATTER_BINNING=grid), labels on the TOP_K most outlying points only, and a
+# trendline fitted from the per-cell moments. Binning is over the visible range,
+# so zooming in (a box selection in the dashboard) re-bins at finer resolution
+# until few enough points remain to draw them individually.
+MAX_POINTS = int(os.environ.get("EFI_SCATTER_MAX_POINTS", "5000"))
+BINNING    = os.environ.get("EFI_SCATTER_BINNING", "hex")
+GRID_SIZE  = 60
+TOP_K      = 12
+DENSITY_SCALE = [[0, "#161b22"], [0.15, "#1f6feb"], [0.5, "#3fb950"], [1.0, "#e3b341"]]
+
+
+def _floats(values):
+    return np.asarray(values, dtype="float64")
+
+
+def in_view(x, y, x_range=None, y_range=None):
+    # Positions of points with both coordinates present and inside the ranges
+    ok = ~np.isnan(x) & ~np.isnan(y)
+    for v, bounds in ((x, x_range), (y, y_range)):
+        if bounds is not None:
+            ok &= (v >= bounds[0]) & (v <= bounds[1])
+    return np.flatnonzero(ok)
+
+
+def extent(values, bounds=None):
+    lo, hi = (float(values.min()), float(values.max())) if bounds is None else map(float, bounds)
+    if hi <= lo:
+        lo, hi = lo - 0.5, hi + 0.5
+    return lo, hi
+
+
+def dense(df, x, y, x_range=None, y_range=None, max_points=None):
+    max_points = MAX_POINTS if max_points is None else max_points
+    if len(df) <= max_points:
+        return False
+    return len(in_view(_floats(df[x]), _floats(df[y]), x_range, y_range)) > max_points
+
+
+class Bins:
+    # Non-empty cells of a 2-D binning of (x, y) over [x0, x1] × [y0, y1], each
+    # with its count and first/second moments (about the view's centre, for
+    # conditioning). Totals of the cell moments are exact, so fits and
+    # covariances need no second pass over the points.
+    def __init__(self, x, y, x_range, y_range, nx=GRID_SIZE, ny=None, kind=BINNING):
+        (x0, x1), (y0, y1) = x_range, y_range
+        ny = ny or max(int(round(nx / np.sqrt(3))), 1)
+        sx, sy = (x1 - x0) / nx, (y1 - y0) / ny
+        ix, iy = (x - x0) / sx, (y - y0) / sy
+        if kind == "hex":
+            # Two offset rectangular lattices; each point joins the nearer centre
+            ix1, iy1 = np.rint(ix), np.rint(iy)
+            ix2 = np.clip(np.floor(ix), 0, nx - 1)
+            iy2 = np.clip(np.floor(iy), 0, ny - 1)
+            d1 = (ix - ix1) ** 2 + 3 * (iy - iy1) ** 2
+            d2 = (ix - ix2 - 0.5) ** 2 + 3 * (iy - iy2 - 0.5) ** 2
+            n1 = (nx + 1) * (ny + 1)
+            ids = np.where(d1 <= d2, ix1 * (ny + 1) + iy1, n1 + ix2 * ny + iy2).astype(np.intp)
+            a, b = np.divmod(np.arange(n1), ny + 1)
+            c, d = np.divmod(np.arange(nx * ny), ny)
+            cx = np.concatenate([x0 + a * sx, x0 + (c + 0.5) * sx])
+            cy = np.concatenate([y0 + b * sy, y0 + (d + 0.5) * sy])
+        else:
+            ids = (np.clip(np.floor(ix), 0, nx - 1) * ny + np.clip(np.floor(iy), 0, ny - 1)).astype(np.intp)
+            c, d = np.divmod(np.arange(nx * ny), ny)
+            cx, cy = x0 + (c + 0.5) * sx, y0 + (d + 0.5) * sy
+        self.kind, self.nx, self.ny, self.sx, self.sy = kind, nx, ny, sx, sy
+        self.shift = ((x0 + x1) / 2, (y0 + y1) / 2)
+        u, v = x - self.shift[0], y - self.shift[1]
+        size = len(cx)
+        count = np.bincount(ids, minlength=size)
+        keep = np.flatnonzero(count)
+        self.cells = keep
+        self.cx, self.cy, self.count = cx[keep], cy[keep], count[keep]
+        self.su, self.sv, self.suu, self.svv, self.suv = (
+            np.bincount(ids, weights=w, minlength=size)[keep] for w in (u, v, u * u, v * v, u * v)
+        )
+
+    def totals(self):
+        return (self.count.sum(), self.su.sum(), self.sv.sum(),
+                self.suu.sum(), self.svv.sum(), self.suv.sum())
+
+    def mean(self):
+        n, su, sv, *_ = self.totals()
+        return su / n + self.shift[0], sv / n + self.shift[1]
+
+    def covariance(self):
+        n, su, sv, suu, svv, suv = self.totals()
+        cuu, cvv, cuv = suu / n - (su / n) ** 2, svv / n - (sv / n) ** 2, suv / n - su * sv / n ** 2
+        return np.array([[cuu, cuv], [cuv, cvv]])
+
+    def fit(self):
+        # Least-squares y = slope·x + intercept from the cell moments, or None
+        n, su, sv, suu, _, suv = self.totals()
+        var = suu - su * su / n if n else 0.0
+        if n < 2 or var <= 0:
+            return None
+        slope = (suv - su * sv / n) / var
+        mean_x, mean_y = self.mean()
+        return slope, mean_y - slope * mean_x
+
+    def cell_means(self):
+        return self.su / self.count + self.shift[0], self.sv / self.count + self.shift[1]
+
+
+def outliers(x, y, bins, k=TOP_K):
+    # Positions of the k points farthest from the bulk (Mahalanobis distance from
+    # the binned mean and covariance), most extreme first
+    if k <= 0 or len(x) == 0:
+        return np.empty(0, dtype=np.intp)
+    mx, my = bins.mean()
+    d = np.column_stack([x - mx, y - my])
+    try:
+        inv = np.linalg.inv(bins.covariance())
+    except np.linalg.LinAlgError:
+        inv = np.diag(1 / np.maximum(np.diag(bins.covariance()), 1e-12))
+    dist = np.einsum("ij,jk,ik->i", d, inv, d)
+    k = min(k, len(dist))
+    top = np.argpartition(-dist, k - 1)[:k]
+    return top[np.argsort(-dist[top], kind="stable")]
+
+
+def density_figure(df, x, y, label="Country", x_range=None, y_range=None, titles=None,
+                   trend=True, height=420, width_px=900, kind=BINNING, nx=GRID_SIZE):
+    # Binned replacement for a scatter of df[x] vs df[y]: density cells, the top-k
+    # outliers as labelled markers and (optionally) the aggregate trendline
+    titles = titles or {}
+    X, Y = _floats(df[x]), _floats(df[y])
+    pos = in_view(X, Y, x_range, y_range)
+    X, Y = X[pos], Y[pos]
+    xr, yr = extent(X, x_range), extent(Y, y_range)
+    # Cells roughly regular on screen: rows per column follow the plot's aspect
+    ny = max(int(round(nx * height / width_px / (np.sqrt(3) if kind == "hex" else 1))), 1)
+    bins = Bins(X, Y, xr, yr, nx=nx, ny=ny, kind=kind)
+    mean_x, mean_y = bins.cell_means()
+    hover = "n = %{customdata[0]:,}<br>mean x %{customdata[1]:.3s}<br>mean y %{customdata[2]:.3s}<extra></extra>"
+
+    if kind == "hex":
+        cells = go.Scatter(
+            x=bins.cx, y=bins.cy, mode="markers", name="density", showlegend=False,
+            customdata=np.column_stack([bins.count, mean_x, mean_y]), hovertemplate=hover,
+            marker=dict(symbol="hexagon", size=max(width_px / nx * 1.1, 2), line_width=0,
+                        color=bins.count, colorscale=DENSITY_SCALE, cmin=1,
+                        colorbar=dict(title="Points")),
+        )
+    else:
+        grid = np.full((bins.ny, bins.nx), np.nan)
+        grid[bins.cells % bins.ny, bins.cells // bins.ny] = bins.count
+        cells = go.Heatmap(
+            x=xr[0] + (np.arange(bins.nx) + 0.5) * bins.sx, y=yr[0] + (np.arange(bins.ny) + 0.5) * bins.sy,
+            z=grid, colorscale=DENSITY_SCALE, zmin=1, name="density",
+            colorbar=dict(title="Points"),
+            hovertemplate="n = %{z:,}<extra></extra>",
+        )
+    traces = [cells]
+
+    # Label distinct names only (country-year points repeat a country)
+    top = outliers(X, Y, bins, TOP_K * 4)
+    names = df[label].to_numpy(dtype=object)[pos[top]]
+    _, first = np.unique(names.astype(str), return_index=True)
+    keep = np.sort(first)[:TOP_K]
+    top, names = top[keep], names[keep]
+    if len(top):
+        traces.append(go.Scatter(
+            x=X[top], y=Y[top], text=names, mode="markers+text", name="outliers", showlegend=False,
+            textposition="top center", textfont=dict(size=9, color="#8b949e"),
+            marker=dict(size=6, color="#f78166"),
+            hovertemplate="<b>%{text}</b><br>%{x}, %{y}<extra></extra>",
+        ))
+
+    fit = bins.fit() if trend else None
+    if fit is not None:
+        m, b = fit
+        traces.append(go.Scatter(
+            x=list(xr), y=[m * xr[0] + b, m * xr[1] + b], mode="lines", name="Trend",
+            line=dict(color="#e3b341", width=2, dash="dash"),
+        ))
+
+    fig = go.Figure(traces)
+    fig.update_layout(
+        template=TEMPLATE, height=height, margin=dict(l=10, r=10, t=20, b=20),
+        showlegend=False, dragmode="select", uirevision=f"{x}:{y}",
+    )
+    fig.update_xaxes(range=list(xr), title=titles.get(x, x))
+    fig.update_yaxes(range=list(yr), title=titles.get(y, y))
+    return fig
@@ -0,0 +1,92 @@
+from urllib.parse import urlencode
+
+import metrics
+from filters import ALL
+from transforms import SCALES
+
+# A scenario is the sidebar state of a view — region, score range, top N, year,
+# indicator scale, pillar weights and derived metrics — written into the page
+# URL as readable query parameters, only for fields off their default:
+#
+#     ?region=Europe&score=60-100&top=10&year=2020&scale=log&w.tax_burden=2
+#
+# so copying the address bar shares the view, and reopening it restores it
+# after the session (or the server) is gone. Everything the view computes is
+# cached on the content of its inputs (figure_cache.py with its disk tier), so
+# a shared or popular link is served from cache.
+#
+# Session-state key → URL parameter; pillar weights are "weight:<pillar>" ↔ "w.<pillar>"
+PARAMS = {"region": "region", "score_range": "score", "top_n": "top", "year": "year",
+          "scale": "scale", "metrics": "metrics"}
+DEFAULTS = {"region": ALL, "score_range": (0, 100), "top_n": 20, "scale": "raw", "metrics": ""}
+TOP_N_RANGE  = (5, 40)
+WEIGHT_RANGE = (0.0, 3.0)
+# Longest derived-metrics text a link may carry
+MAX_METRICS_TEXT = 4000
+
+
+def to_params(state, pillars=(), latest_year=None):
+    # Session state → {parameter: text}; the year is left out at latest_year so
+    # a link without one follows the newest data
+    params = {}
+    for key, name in PARAMS.items():
+        value = state.get(key, DEFAULTS.get(key, latest_year))
+        if key == "score_range":
+            value = tuple(int(v) for v in value)
+        if value == DEFAULTS.get(key, latest_year) or value is None:
+            continue
+        params[name] = f"{value[0]}-{value[1]}" if key == "score_range" else str(value)
+    for p in pillars:
+        w = float(state.get(f"weight:{p}", 1.0))
+        if w != 1.0:
+            params[f"w.{p}"] = f"{w:g}"
+    return params
+
+
+def from_params(params, years=(), regions=(), pillars=(), warnings=None):
+    # {parameter: text} → session-state values; unknown, malformed and
+    # out-of-range parameters are dropped, so any link opens some valid view.
+    # Derived metrics that don't parse (metrics.py) are dropped too, with a
+    # message appended to `warnings` when a list is given.
+    state = {}
+
+    def parse(name, convert):
+        try:
+            return convert(params[name]) if name in params else None
+        except (TypeError, ValueError):
+            return None
+
+    region = params.get("region")
+    if region == ALL or region in regions:
+        state["region"] = region
+    score = parse("score", lambda s: tuple(sorted(min(max(int(v), 0), 100) for v in s.split("-", 1))))
+    if score is not None and len(score) == 2:
+        state["score_range"] = score
+    top = parse("top", int)
+    if top is not None:
+        state["top_n"] = min(max(top, TOP_N_RANGE[0]), TOP_N_RANGE[1])
+    year = parse("year", int)
+    if year in years:
+        state["year"] = year
+    if params.get("scale") in SCALES:
+        state["scale"] = params["scale"]
+    if "metrics" in params:
+        text = str(params["metrics"])
+        try:
+            if len(text) > MAX_METRICS_TEXT:
+                raise metrics.MetricError(f"longer than {MAX_METRICS_TEXT} characters")
+            metrics.parse(text)
+            state["metrics"] = text
+        except metrics.MetricError as exc:
+            if warnings is not None:
+                warnings.append(f"The link's derived metrics were ignored: {exc}")
+    for p in pillars:
+        w = parse(f"w.{p}", float)
+        if w is not None and w == w:
+            state[f"weight:{p}"] = round(min(max(w, WEIGHT_RANGE[0]), WEIGHT_RANGE[1]), 1)
+    return state
+
+
+def link(params, base=""):
+    # Shareable URL (or query string, without a base) of a scenario
+    return f"{base.split('?', 1)[0]}?{urlencode(params)}" if params else base.split("?", 1)[0]
@@ -0,0 +1,107 @@
+import numpy as np
+
+from data_source import PILLARS
+
+OTHER = "other pillars"
+# Rows of the score matrix processed per block in batch mode: bounds the
+# (samples × countries) intermediates to a few MB whatever the dataset size
+BLOCK_ELEMENTS = 4_000_000
+
+
+def normalize(weights):
+    w = np.clip(np.asarray(weights, dtype="float64"), 0, None)
+    total = w.sum(axis=-1, keepdims=True)
+    return np.divide(w, total, out=np.zeros_like(w), where=total > 0)
+
+
+def ordinal_ranks(scores):
+    # 1 = highest score; rows of a 2-D input are ranked independently. Ties get
+    # consecutive ranks in row order (exact ties do not occur under random weights).
+    scores = np.atleast_2d(scores)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    ranks = np.empty_like(order, dtype=np.int32)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[1] + 1, dtype=np.int32)[None, :], axis=1)
+    return ranks
+
+
+def min_ranks(scores):
+    # Competition ranking ("1, 2, 2, 4") like the published index; NaN ranks last
+    s = np.where(np.isnan(scores), -np.inf, scores)
+    desc = np.sort(-s)
+    return np.searchsorted(desc, -s, side="left").astype(np.int32) + 1
+
+
+class ScoringEngine:
+    # The overall score is the weighted mean of the 12 pillar scores (equal
+    # weights in the published index), so any weighting is one matrix-vector
+    # product over an n × k pillar matrix and a batch of m weightings one
+    # (m × k) @ (k × n) product. Pillars missing from the file are folded into
+    # one OTHER column holding their mean, recovered from the published score,
+    # so default weights reproduce the official score exactly.
+    def __init__(self, df, pillars=PILLARS):
+        self.pillars = [p for p in pillars if p in df.columns]
+        score = df["score"].to_numpy(dtype="float64", na_value=np.nan)
+        P = df[self.pillars].to_numpy(dtype="float64", na_value=np.nan)
+        # A missing pillar value counts as the country's published score (neutral)
+        P = np.where(np.isnan(P), score[:, None], P)
+        n_missing = len(PILLARS) - len(self.pillars)
+        self.columns = list(self.pillars)
+        self.default = np.full(len(self.pillars), 1 / len(PILLARS))
+        if n_missing:
+            other = (len(PILLARS) * score - P.sum(axis=1)) / n_missing
+            P = np.column_stack([P, other])
+            self.columns.append(OTHER)
+            self.default = np.append(self.default, n_missing / len(PILLARS))
+        self.matrix = np.ascontiguousarray(P)
+        self.matrix.flags.writeable = False
+
+    def weights(self, multipliers=None):
+        # Normalized weights from per-column multipliers of the default weighting
+        if multipliers is None:
+            return self.default.copy()
+        return normalize(self.default * np.asarray(multipliers, dtype="float64"))
+
+    def scores(self, weights):
+        return self.matrix @ normalize(weights)
+
+    def rescore(self, weights):
+        # (score, rank) for one weighting, rank as published (ties share the best rank)
+        s = self.scores(weights)
+        return s, min_ranks(np.round(s, 1))
+
+    def sample_weights(self, m, around=None, concentration=50.0, seed=0):
+        # Dirichlet weightings centred on `around` (default: official weights);
+        # higher concentration keeps samples closer to it.
+        center = normalize(self.default if around is None else around)
+        alpha = np.maximum(center * concentration * len(center), 1e-3)
+        return np.random.default_rng(seed).dirichlet(alpha, size=m)
+
+    def batch_ranks(self, weights):
+        # Yields ordinal rank blocks (rows = weightings, columns = countries)
+        W = normalize(np.atleast_2d(weights))
+        step = max(BLOCK_ELEMENTS // max(len(self.matrix), 1), 1)
+        MT = self.matrix.T
+        for start in range(0, len(W), step):
+            S = W[start:start + step] @ MT
+            yield ordinal_ranks(np.where(np.isnan(S), -np.inf, S))
+
+    def rank_distribution(self, weights, bins=None):
+        # counts[i, b]: how many weightings put country i in rank bin b. With
+        # bins=None every rank is its own bin (n × n); pass bins to bound memory
+        # on large panels (rank r falls in bin (r - 1) * bins // n).
+        n = len(self.matrix)
+        bins = n if bins is None else min(int(bins), n)
+        counts = np.zeros(n * bins, dtype=np.int64)
+        rows = np.arange(n) * bins
+        for ranks in self.batch_ranks(weights):
+            b = (ranks.astype(np.int64) - 1) * bins // n
+            counts += np.bincount((rows[None, :] + b).ravel(), minlength=n * bins)
+        return counts.reshape(n, bins)
+
+
+def rank_percentiles(distribution, q=(0.05, 0.5, 0.95)):
+    # Per-country rank quantiles (1-based) from a rank distribution; with binned
+    # distributions each quantile is the first rank of its bin.
+    n, bins = distribution.shape
+    cdf = np.cumsum(distribution, axis=1) / np.maximum(distribution.sum(axis=1, keepdims=True), 1)
+    return np.stack([-(-(cdf < p).sum(axis=1) * n // bins) + 1 for p in q], axis=1)
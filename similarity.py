@@ -0,0 +1,203 @@
+import numpy as np
+
+from data_source import CORR_COLUMNS
+
+# Peer-group search: which rows look most like a given one across the indicator
+# columns. Features are standardized (z-scores; heavy-tailed GDP and population
+# on a log scale first), and distance is Euclidean over the features both rows
+# have, rescaled to the full feature count — missing values never count as 0.
+# All pairwise work is three matrix products per block of queries:
+#   Σ_both (a − b)² = a²·Mbᵀ + Ma·b²ᵀ − 2·a·bᵀ    (zeros where a value is missing)
+# so a k-NN pass over a whole panel is a few BLAS calls, no per-row loop.
+LOG_COLUMNS = ("gdp_ppp", "population")
+# A pair must share at least this share of the features to be compared at all
+MIN_OVERLAP = 0.5
+# Query rows × index rows per distance block: bounds the intermediates to a few
+# MB whatever the panel size
+BLOCK_ELEMENTS = 2_000_000
+# Rows sampled for the display scale (median pairwise distance among them)
+SCALE_SAMPLE = 256
+
+
+class SimilarityIndex:
+    # Standardized feature rows with a label (shown to users) and a group
+    # (country: rows of one country in a panel skip each other by default).
+    # Scaling is fitted once, at build time, and frozen: add() appends rows in
+    # the same units without touching existing ones, so updates are incremental.
+    def __init__(self, raw, labels, groups=None, columns=CORR_COLUMNS, center=None, scale=None):
+        self.columns = list(columns)
+        self._log = np.array([c in LOG_COLUMNS for c in self.columns])
+        raw = self._prepare(raw)
+        if center is None:
+            with np.errstate(invalid="ignore"):
+                center = np.nanmean(raw, axis=0) if len(raw) else np.zeros(len(self.columns))
+                scale = np.nanstd(raw, axis=0) if len(raw) else np.ones(len(self.columns))
+        self.center = np.nan_to_num(np.asarray(center, dtype="float64"))
+        self.scale = np.where(np.asarray(scale) > 0, scale, 1.0)
+        self.n = 0
+        k = len(self.columns)
+        self._Z = np.empty((0, k))
+        self._M = np.empty((0, k))
+        self._labels = np.empty(0, dtype=object)
+        self._groups = np.empty(0, dtype=np.intp)
+        self._group_ids = {}
+        self._positions = {}
+        self.add(raw, labels, groups, prepared=True)
+
+    @classmethod
+    def from_frame(cls, df, columns=CORR_COLUMNS, labels=None, groups=None):
+        # One row per frame row; labels and groups default to the Country column
+        columns = [c for c in columns if c in df.columns]
+        country = df["Country"].to_numpy(dtype=object)
+        return cls(df[columns].to_numpy(dtype="float64", na_value=np.nan),
+                   country if labels is None else labels, country if groups is None else groups, columns)
+
+    def _prepare(self, raw):
+        raw = np.array(raw, dtype="float64", ndmin=2).reshape(-1, len(self.columns))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            raw[:, self._log] = np.log(np.where(raw[:, self._log] > 0, raw[:, self._log], np.nan))
+        return raw
+
+    def transform(self, raw, prepared=False):
+        # (values with zeros at missing, presence mask) in the index's units
+        Z = ((raw if prepared else self._prepare(raw)) - self.center) / self.scale
+        M = ~np.isnan(Z)
+        return np.where(M, Z, 0.0), M.astype("float64")
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def labels(self):
+        return self._labels[:self.n]
+
+    def add(self, raw, labels, groups=None, prepared=False):
+        # Appends rows; storage grows geometrically, so n appends cost O(n) in total
+        Z, M = self.transform(raw, prepared)
+        m = len(Z)
+        if self.n + m > len(self._Z):
+            cap = max(2 * len(self._Z), self.n + m, 64)
+            for name in ("_Z", "_M"):
+                grown = np.zeros((cap, len(self.columns)))
+                grown[:self.n] = getattr(self, name)[:self.n]
+                setattr(self, name, grown)
+            for name, dtype in (("_labels", object), ("_groups", np.intp)):
+                grown = np.empty(cap, dtype=dtype)
+                grown[:self.n] = getattr(self, name)[:self.n]
+                setattr(self, name, grown)
+        groups = labels if groups is None else groups
+        sl = slice(self.n, self.n + m)
+        self._Z[sl], self._M[sl] = Z, M
+        self._labels[sl] = labels = list(labels)
+        self._positions.update(zip(labels, range(sl.start, sl.stop)))
+        self._groups[sl] = [self._group_ids.setdefault(g, len(self._group_ids)) for g in groups]
+        self.n += m
+        return np.arange(sl.start, sl.stop)
+
+    def distances(self, Zq, Mq):
+        # (m × n) distances from query rows to every indexed row; inf where the
+        # pair shares too few features
+        return np.sqrt(self._squared(Zq, Mq))
+
+    def _squared(self, Zq, Mq, rows=None):
+        # rows: index positions to measure against (default every row)
+        if rows is None:
+            Z, M, complete = self._Z[:self.n], self._M[:self.n], self._complete()
+        else:
+            Z, M = self._Z[rows], self._M[rows]
+            complete = bool(M.all())
+        k = len(self.columns)
+        S = Zq @ Z.T
+        S *= -2
+        if Mq.all() and complete:
+            # No missing values: the two masked terms are plain squared norms
+            S += (Zq * Zq).sum(axis=1)[:, None]
+            S += (Z * Z).sum(axis=1)[None, :]
+            return np.clip(S, 0, None, out=S)
+        S += (Zq * Zq) @ M.T
+        S += Mq @ (Z * Z).T
+        np.clip(S, 0, None, out=S)
+        C = Mq @ M.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            S *= k / C
+        S[C < max(MIN_OVERLAP * k, 1)] = np.inf
+        return S
+
+    def _complete(self):
+        # No missing feature anywhere in the index (cached per size)
+        if getattr(self, "_full", (None, -1))[1] != self.n:
+            self._full = (bool(self._M[:self.n].all()), self.n)
+        return self._full[0]
+
+    def _knn(self, Zq, Mq, k, q_groups=None, within=None):
+        # Ranks on squared distances; only the k kept per row get a square root.
+        # within: candidate row positions (default every row)
+        m = len(Zq)
+        allowed = None
+        if within is not None:
+            allowed = np.zeros(self.n, dtype=bool)
+            allowed[within] = True
+        k = max(min(k, self.n if allowed is None else int(allowed.sum())), 0)
+        pos = np.zeros((m, k), dtype=np.intp)
+        dist = np.full((m, k), np.inf)
+        if k == 0 or self.n == 0:
+            return pos, dist
+        step = max(BLOCK_ELEMENTS // self.n, 1)
+        groups = self._groups[:self.n]
+        for start in range(0, m, step):
+            stop = min(start + step, m)
+            D = self._squared(Zq[start:stop], Mq[start:stop])
+            if q_groups is not None:
+                D[groups[None, :] == q_groups[start:stop, None]] = np.inf
+            if allowed is not None:
+                D[:, ~allowed] = np.inf
+            top = np.argpartition(D, k - 1, axis=1)[:, :k] if k < self.n else np.tile(np.arange(self.n), (stop - start, 1))
+            d = np.take_along_axis(D, top, axis=1)
+            order = np.argsort(d, axis=1, kind="stable")
+            pos[start:stop] = np.take_along_axis(top, order, axis=1)
+            dist[start:stop] = np.sqrt(np.take_along_axis(d, order, axis=1))
+        return pos, dist
+
+    def query(self, raw, k=5, within=None):
+        # k nearest indexed rows to each raw feature vector: (positions, distances),
+        # inf distance where fewer than k rows are comparable
+        return self._knn(*self.transform(raw), k, within=within)
+
+    def neighbours(self, positions, k=5, same_group=False, within=None):
+        # k nearest rows to indexed rows, skipping the rows themselves and (unless
+        # same_group) every other row of their group
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.intp))
+        Zq, Mq = self._Z[positions], self._M[positions]
+        if same_group:
+            pos, dist = self._knn(Zq, Mq, k + 1, within=within)
+            keep = pos != positions[:, None]
+            # Drop the row itself (or the last extra when a duplicate outranks it)
+            order = np.argsort(~keep, axis=1, kind="stable")[:, :k]
+            return np.take_along_axis(pos, order, axis=1), np.take_along_axis(dist, order, axis=1)
+        return self._knn(Zq, Mq, k, self._groups[positions], within)
+
+    def knn_all(self, k=5, same_group=False):
+        # Batch query: the k nearest rows for every indexed row
+        return self.neighbours(np.arange(self.n), k, same_group)
+
+    def positions(self, labels):
+        # Last row with each label; unknown labels are skipped
+        lookup = self._positions
+        return np.array([lookup[label] for label in labels if label in lookup], dtype=np.intp)
+
+    def similarity(self, distances):
+        # Distance → 0–100 score for display: 100 identical, 50 at the median
+        # distance between two indexed rows
+        scale = self._median_distance()
+        return 100 / (1 + (np.asarray(distances) / scale) ** 2) if scale > 0 else np.zeros(np.shape(distances))
+
+    def _median_distance(self):
+        # Over pairs within an evenly spaced sample: a SCALE_SAMPLE² block, not
+        # sample × every row (cached per size)
+        if getattr(self, "_median", (None, 0))[1] != self.n:
+            sample = np.unique(np.linspace(0, self.n - 1, min(self.n, SCALE_SAMPLE)).astype(np.intp))
+            D = np.sqrt(self._squared(self._Z[sample], self._M[sample], sample))
+            # Off the diagonal: rounding leaves a row's distance to itself just above 0
+            finite = D[np.isfinite(D) & ~np.eye(len(sample), dtype=bool)]
+            self._median = (float(np.median(finite)) if len(finite) else 0.0, self.n)
+        return self._median[0]
@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from correlation import CorrelationEngine
+from figure_cache import frame_fingerprint
+from filters import FilterEngine
+from rankings import RankingIndex
+from scoring import ScoringEngine
+from similarity import SimilarityIndex
+from table import build_string_indexes
+from transforms import apply as rescale
+
+VIEW_CACHE_BYTES = int(os.environ.get("EFI_VIEW_CACHE_MB", "64")) * 2**20
+
+
+def _freeze(obj):
+    # Mark every ndarray attribute (and dict of ndarrays) read-only
+    for value in vars(obj).values():
+        arrays = value.values() if isinstance(value, dict) else [value]
+        for arr in arrays:
+            if isinstance(arr, np.ndarray):
+                arr.flags.writeable = False
+    return obj
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class DatasetStore:
+    # One immutable frame per dataset key, shared by every session of the
+    # process (Dashboard.py holds stores in st.cache_resource). Indexes are
+    # built on first use, and filtered frames are materialized once per filter
+    # and handed out by reference, so a session only holds references.
+    # Under pandas copy-on-write a session that modifies what it was given gets
+    # its own copy; the shared frame cannot change.
+    def __init__(self, df, corr_columns=(), view_bytes=VIEW_CACHE_BYTES):
+        self.frame = df
+        self.n_rows = len(df)
+        self.corr_columns = list(corr_columns)
+        self.view_bytes = view_bytes
+        self._views = OrderedDict()
+        self._views_size = 0
+        self._lazy = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name, build):
+        with self._lock:
+            if name not in self._lazy:
+                self._lazy[name] = build()
+            return self._lazy[name]
+
+    @property
+    def filters(self):
+        return self._get("filters", lambda: _freeze(FilterEngine(self.frame)))
+
+    @property
+    def rankings(self):
+        return self._get("rankings", lambda: RankingIndex(self.frame, self.frame.select_dtypes("number").columns))
+
+    @property
+    def correlations(self):
+        return self._get("correlations", lambda: _freeze(CorrelationEngine(self.frame, self.corr_columns)))
+
+    def scaled(self, scale):
+        # The correlation columns under a transforms.py scale, aligned with frame;
+        # each scale is computed once per store and shared like the frame
+        if scale == "raw":
+            return self.frame[self.corr_columns]
+        def build():
+            X = self.frame[self.corr_columns].to_numpy(dtype="float64", na_value=np.nan)
+            return pd.DataFrame(rescale(X, scale), index=self.frame.index, columns=self.corr_columns)
+        return self._get(f"scaled:{scale}", build)
+
+    def scaled_correlations(self, scale):
+        # Correlation engine over scaled values; filters still bucket on the raw score
+        if scale == "raw":
+            return self.correlations
+        return self._get(f"correlations:{scale}", lambda: _freeze(CorrelationEngine(
+            self.frame, self.corr_columns, values=self.scaled(scale).to_numpy())))
+
+    @property
+    def similarity(self):
+        return self._get("similarity", lambda: SimilarityIndex.from_frame(self.frame, self.corr_columns))
+
+    @property
+    def scorer(self):
+        return self._get("scorer", lambda: ScoringEngine(self.frame))
+
+    @property
+    def strings(self):
+        # Country/region search indexes; their collation ranks double as sort keys
+        def build():
+            indexes = build_string_indexes(self.frame)
+            for column, index in indexes.items():
+                self.rankings.add_key(column, index.sort_key)
+            return indexes
+        return self._get("strings", build)
+
+    @property
+    def fingerprint(self):
+        return self._get("fingerprint", lambda: frame_fingerprint(self.frame))
+
+    def column_token(self, column):
+        # Content hash of one column: derived metrics key their cached results on it
+        return self._get(f"token:{column}", lambda: frame_fingerprint(self.frame[[column]]))
+
+    def select(self, region, score_range):
+        # (filter key, row positions, frame) — the frame is shared across sessions
+        key = FilterEngine.key(region, score_range)
+        with self._lock:
+            hit = self._views.get(key)
+            if hit is not None:
+                self._views.move_to_end(key)
+                return (key,) + hit
+        idx = self.filters.select(region, score_range)
+        view = self.filters.view(self.frame, idx)
+        size = 0 if view is self.frame else frame_bytes(view)
+        with self._lock:
+            if key not in self._views and size <= self.view_bytes:
+                self._views[key] = (idx, view)
+                self._views_size += size
+                while self._views_size > self.view_bytes:
+                    _, (_, old) = self._views.popitem(last=False)
+                    self._views_size -= 0 if old is self.frame else frame_bytes(old)
+        return key, idx, view
+
+    def shared_ids(self):
+        with self._lock:
+            ids = {id(self.frame)} | {id(v) for v in self._lazy.values()}
+            for idx, view in self._views.values():
+                ids.update((id(idx), id(view)))
+        return ids
+
+    def stats(self):
+        with self._lock:
+            views = len(self._views)
+            view_size = self._views_size
+            engines = sum(_object_bytes(v) for v in self._lazy.values())
+        return dict(frame=frame_bytes(self.frame), views=views, view_bytes=view_size, engine_bytes=engines)
+
+
+def _object_bytes(obj):
+    # ndarray payload of an engine object (its dicts/lists of arrays included)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return frame_bytes(obj)
+    if isinstance(obj, dict):
+        return sum(_object_bytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_object_bytes(v) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return sum(_object_bytes(v) for v in vars(obj).values())
+    return 0
+
+
+def session_bytes(state, shared=frozenset()):
+    # Memory held by one session's state beyond the shared stores: objects whose
+    # id is in `shared` (and arrays viewing them) count as zero.
+    seen = set()
+
+    def size(obj):
+        if id(obj) in shared or id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        if isinstance(obj, pd.DataFrame):
+            return frame_bytes(obj)
+        if isinstance(obj, np.ndarray):
+            return 0 if obj.base is not None and id(obj.base) in shared else obj.nbytes
+        if isinstance(obj, dict):
+            return sys.getsizeof(obj) + sum(size(k) + size(v) for k, v in obj.items())
+        if isinstance(obj, (list, tuple, set, frozenset)):
+            return sys.getsizeof(obj) + sum(size(v) for v in obj)
+        return sys.getsizeof(obj)
+
+    return sum(size(v) for v in state.values())
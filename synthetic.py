@@ -0,0 +1,179 @@
+"""Synthetic Economic Freedom panels in the dashboard's schema.
+
+    python synthetic.py --rows 1000000 -o efi_1m.parquet
+    python synthetic.py --countries 176 --years 30 --subregions 20 -o panel.arrow
+    EFI_DATA_PATH=efi_1m.parquet streamlit run Dashboard.py
+
+Sizes are countries × years × sub-national units, from 10² to 10⁷ rows. The
+shipped countries come first, under their real names and ISO codes, so maps
+draw; further countries are synthetic. Output format follows the suffix
+(.csv, .parquet, .arrow).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import data_source
+from data_source import PILLARS
+
+# The shape of the real index, so scaling work sees realistic data:
+#   - one latent "institutions" factor per country, centred on its region's
+#     mean, drives all twelve pillars through the loadings below, so pillars
+#     correlate the way the published ones do; the score is their mean
+#   - GDP per capita is log-normal and rises with the factor; population is
+#     heavy-tailed (a few giants); unemployment is log-normal; inflation is
+#     log-normal with a small share of hyperinflation episodes
+#   - years are AR(1) around each country's level, so panels are persistent
+#   - sub-national units scatter around their country and split its population
+#   - a few percent of indicator values are missing, as in the source files
+# Region: (share of synthetic countries, mean institutions factor)
+REGIONS = {
+    "Europe":                   (0.26, 0.8),
+    "Asia Pacific":             (0.24, 0.1),
+    "Americas":                 (0.18, -0.1),
+    "Middle East/North Africa": (0.10, -0.5),
+    "Sub-Saharan Africa":       (0.22, -0.9),
+}
+# Pillar: (mean, loading on the institutions factor, idiosyncratic sd), 0–100 scale
+PILLAR_PARAMS = {
+    "property_rights":        (55, 20, 8),
+    "judicial_effectiveness": (48, 20, 9),
+    "government_integrity":   (46, 21, 9),
+    "tax_burden":             (77, -4, 10),
+    "government_spending":    (66, -8, 16),
+    "fiscal_health":          (68, 6, 22),
+    "business_freedom":       (63, 13, 9),
+    "labor_freedom":          (56, 8, 11),
+    "monetary_freedom":       (72, 9, 8),
+    "trade_freedom":          (70, 10, 9),
+    "investment_freedom":     (56, 17, 12),
+    "financial_freedom":      (48, 18, 11),
+}
+COUNTRIES   = 176
+LAST_YEAR   = 2022
+PERSISTENCE = 0.9     # AR(1) coefficient of the yearly deviation from a country's level
+HYPER_SHARE = 0.02    # country-years in a hyperinflation episode
+MISSING     = 0.03    # share of missing values per indicator column
+
+
+def _countries(n, rng):
+    # (names, ISO codes, regions, institutions levels): the shipped countries
+    # first, at the level their published score implies, then synthetic ones
+    shipped = data_source.load(["Country", "iso_code", "region", "score"], path=data_source.DEFAULT_PATH)[:n]
+    extra = max(n - len(shipped), 0)
+    regions = list(REGIONS)
+    shares = np.array([REGIONS[r][0] for r in regions])
+    names = list(shipped["Country"].astype(str)) + [f"Country {i:04d}" for i in range(len(shipped), n)]
+    iso = list(shipped["iso_code"].astype(str)) + [f"X{i:04d}" for i in range(len(shipped), n)]
+    region = list(shipped["region"].astype(str)) + list(rng.choice(regions, extra, p=shares / shares.sum()))
+    # The score is about mean(pillar means) + mean(loadings) × level
+    means, loadings, _ = np.array(list(PILLAR_PARAMS.values()), dtype="float64").T
+    published = ((shipped["score"].to_numpy(dtype="float64") - means.mean()) / loadings.mean()).clip(-3, 3)
+    synthetic = np.array([REGIONS[r][1] for r in region[len(shipped):]]) + rng.normal(0, 0.7, extra)
+    level = np.concatenate([published, synthetic])
+    return (np.array(names, dtype=object), np.array(iso, dtype=object), np.array(region, dtype=object), level)
+
+
+def generate(countries=COUNTRIES, years=1, subregions=1, seed=0, missing=MISSING):
+    # Rows are year-major, then country, then sub-national unit (as Cube.long)
+    rng = np.random.default_rng(seed)
+    names, iso, region, level = _countries(countries, rng)
+    n_y, n_c, n_s = years, countries, subregions
+    shape = (n_y, n_c, n_s)
+
+    dev = np.empty((n_y, n_c))
+    dev[0] = rng.normal(0, 0.3, n_c)
+    for t in range(1, n_y):
+        dev[t] = PERSISTENCE * dev[t - 1] + np.sqrt(1 - PERSISTENCE**2) * rng.normal(0, 0.3, n_c)
+    factor = level[None, :] + dev                                   # (years, countries)
+    unit = rng.normal(0, 0.25, (n_c, n_s)) if n_s > 1 else np.zeros((n_c, 1))
+    q = (factor[:, :, None] + unit[None]).ravel()                   # every row
+    n = q.size
+    t = np.repeat(np.arange(n_y), n_c * n_s)
+
+    out = {}
+    for p in PILLARS:
+        mean, loading, sd = PILLAR_PARAMS[p]
+        out[p] = np.clip(mean + loading * q + rng.normal(0, sd, n), 0, 100).round(1)
+    score = np.mean([out[p] for p in PILLARS], axis=0).round(1)
+
+    out["gdp_ppp"] = np.exp(np.log(15_000) + 0.85 * q + 0.02 * (t - n_y + 1) + rng.normal(0, 0.45, n)).round(0)
+    # Population (millions): a country's total, split across its units
+    total = np.clip(rng.lognormal(np.log(10), 1.5, n_c), 0.05, 1_500)
+    share = rng.gamma(2.0, size=(n_c, n_s))
+    share /= share.sum(axis=1, keepdims=True)
+    growth = 1.01 ** (np.arange(n_y) - n_y + 1)
+    out["population"] = (growth[:, None, None] * (total[:, None] * share)[None]).ravel().round(2)
+    out["unemployment"] = np.clip(rng.lognormal(np.log(6) - 0.15 * q, 0.55), 0.1, 40).round(1)
+    # Inflation is national: one draw per country-year, shared by its units
+    cq = factor.ravel()
+    inflation = rng.lognormal(np.log(4) - 0.3 * cq, 0.7)
+    hyper = rng.random(cq.size) < HYPER_SHARE * np.where(cq < -0.5, 3, 0.5)
+    inflation[hyper] = np.minimum(25 * (1 + rng.pareto(1.1, hyper.sum())), 5_000)
+    out["inflation"] = np.repeat(inflation, n_s).round(1)
+    out["gdp_growth_5yr"] = rng.normal(1.2 + 1.1 * np.repeat(cq, n_s), 2.5).round(1)
+
+    for column in ["gdp_ppp", "population", "unemployment", "inflation", "gdp_growth_5yr"] + PILLARS:
+        out[column][rng.random(n) < missing] = np.nan
+
+    country = np.broadcast_to(names[None, :, None], shape).ravel()
+    if n_s > 1:
+        suffix = np.broadcast_to(np.array([f" · {k + 1}" for k in range(n_s)], dtype=object), shape).ravel()
+        country = country + suffix
+    df = pd.DataFrame({
+        "Country":  country,
+        "iso_code": np.broadcast_to(iso[None, :, None], shape).ravel(),
+        "region":   np.broadcast_to(region[None, :, None], shape).ravel(),
+        "year":     LAST_YEAR - n_y + 1 + t,
+        "score":    score,
+        **{c: out[c] for c in ["gdp_ppp", "population", "unemployment", "inflation", "gdp_growth_5yr"]},
+        **{p: out[p] for p in PILLARS},
+    })
+    df.insert(4, "rank", df.groupby("year")["score"].rank(ascending=False, method="min"))
+    return data_source.coerce(df)
+
+
+def sized(rows, years=1, seed=0):
+    # Exactly `rows` rows: up to COUNTRIES countries a year, then sub-national
+    # units; the last country's units are cut to fit
+    countries = max(min(rows // years, COUNTRIES), 1)
+    subregions = -(-rows // (countries * years))
+    return generate(countries, years, subregions, seed).iloc[:rows].reset_index(drop=True)
+
+
+def write(df, path):
+    path = Path(path)
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    elif path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path, compression="uncompressed")
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, help="total rows (picks countries and sub-national units)")
+    ap.add_argument("--countries", type=int, default=COUNTRIES)
+    ap.add_argument("--years", type=int, default=1)
+    ap.add_argument("--subregions", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", required=True)
+    args = ap.parse_args(argv)
+    if args.rows:
+        df = sized(args.rows, args.years, args.seed)
+    else:
+        df = generate(args.countries, args.years, args.subregions, args.seed)
+    write(df, args.output)
+    print(f"{len(df):,} rows → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
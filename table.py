@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100, 250]
+SEARCH_COLUMNS = ["Country", "region"]
+
+
+class StringIndex:
+    # Prebuilt search/sort index over one string column. Matching runs over the
+    # distinct values (a few hundred countries or regions, whatever the row
+    # count) and maps back to rows through a code-sorted permutation, so a
+    # search never scans the rows themselves.
+    def __init__(self, values, cache_size=256):
+        codes, uniques = pd.factorize(pd.Series(values).astype("string"), sort=True)
+        self.codes   = codes
+        self.uniques = [str(u) for u in uniques]
+        self.folded  = [u.casefold() for u in self.uniques]
+        # Rows grouped by code: rows of code c are by_code[start[c]:start[c + 1]]
+        self.by_code = np.argsort(codes, kind="stable")
+        self.start   = np.searchsorted(codes[self.by_code], np.arange(len(self.uniques) + 1))
+        # Sort key: position of each row's value in case-folded order (missing last)
+        order = np.argsort(self.folded, kind="stable")
+        rank = np.empty(len(self.uniques) + 1, dtype="float64")
+        rank[order] = np.arange(len(order))
+        rank[-1] = np.nan
+        self.sort_key = rank[codes]  # code -1 (missing) picks rank[-1]
+        for arr in (self.codes, self.by_code, self.start, self.sort_key):
+            arr.flags.writeable = False
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def matching_codes(self, query):
+        q = query.strip().casefold()
+        return [c for c, u in enumerate(self.folded) if q in u]
+
+    def search(self, query):
+        # Sorted row positions whose value contains query (case-insensitive)
+        q = query.strip().casefold()
+        with self._lock:
+            hit = self._cache.get(q)
+            if hit is not None:
+                self._cache.move_to_end(q)
+                return hit
+        codes = self.matching_codes(q)
+        parts = [self.by_code[self.start[c]:self.start[c + 1]] for c in codes]
+        rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+        rows.flags.writeable = False
+        with self._lock:
+            self._cache[q] = rows
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rows
+
+
+def build_string_indexes(df, columns=SEARCH_COLUMNS):
+    return {c: StringIndex(df[c]) for c in columns if c in df.columns}
+
+
+def apply_search(idx, indexes, queries):
+    # Narrow sorted positions idx to rows matching every non-empty column query
+    for column, query in queries.items():
+        if query and query.strip():
+            idx = np.intersect1d(idx, indexes[column].search(query), assume_unique=True)
+    return idx
+
+
+def page_bounds(total, page, page_size):
+    pages = max(-(-total // page_size), 1)
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total)
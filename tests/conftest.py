@@ -0,0 +1,31 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# No persistent result cache under test: every result is computed
+os.environ.setdefault("EFI_DISK_CACHE_MB", "0")
+
+import data_source  # noqa: E402
+
+
+@pytest.fixture
+def shipped_csv(tmp_path):
+    # A copy of the shipped dataset, so Arrow sidecars land in tmp_path
+    return Path(shutil.copy(data_source.DEFAULT_PATH, tmp_path / data_source.DEFAULT_PATH.name))
+
+
+@pytest.fixture
+def shipped(shipped_csv):
+    return data_source.load(path=shipped_csv)
+
+
+@pytest.fixture(scope="session")
+def panel():
+    # Synthetic, with sub-national units and missing values (synthetic.py)
+    import synthetic
+    return synthetic.sized(5000)
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+import api
+import query
+
+
+@pytest.fixture(autouse=True)
+def data(monkeypatch, shipped_csv):
+    monkeypatch.setenv("EFI_DATA_PATH", str(shipped_csv))
+
+
+def test_spec_from_query_string():
+    spec = api.spec_from_params({"region": "Europe", "score_min": "60", "include": "kpis,ranking",
+                                 "weight.tax_burden": "2", "metric.gdp_total": "gdp_ppp * population"})
+    assert spec == {"region": "Europe", "score_range": ["60", 100], "include": ["kpis", "ranking"],
+                    "weights": {"tax_burden": "2"}, "metrics": {"gdp_total": "gdp_ppp * population"}}
+    assert query.normalize(spec)["score_range"] == [60.0, 100.0]
+
+
+def test_batch_body_keeps_errors_in_their_slots():
+    version = query.data_source.version()
+    body = json.loads(api.batch_body([{"region": "Europe"}, {"top_n": -5}], version))
+    first, second = body["results"]
+    assert first["rows"] > 0 and "top_n" in second["error"]
+
+
+def test_batch_tag_follows_the_queries():
+    version = query.data_source.version()
+    assert api.batch_tag([{"top_n": 5}], version) == api.batch_tag([{"top_n": "5"}], version)
+    assert api.batch_tag([{"top_n": 5}], version) != api.batch_tag([{"top_n": 6}], version)
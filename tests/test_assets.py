@@ -0,0 +1,24 @@
+import assets
+
+
+def test_unbundled_fonts_fall_back_to_system_fonts(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "FONTS_DIR", tmp_path)
+    assert assets.font_css() == ""
+
+
+def test_bundled_fonts_come_first(tmp_path, monkeypatch):
+    face = "@font-face { font-family: 'DM Sans'; src: url(app/static/fonts/a.woff2); }"
+    (tmp_path / "fonts.css").write_text(face)
+    monkeypatch.setattr(assets, "FONTS_DIR", tmp_path)
+    assets.page_css.cache_clear()
+    try:
+        css = assets.page_css()
+    finally:
+        assets.page_css.cache_clear()
+    assert css.startswith("@font-face{")
+    assert "googleapis" not in css and "@import" not in css
+
+
+def test_page_css_never_reaches_a_third_party():
+    assets.page_css.cache_clear()
+    assert "http" not in assets.page_css()
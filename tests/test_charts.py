@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import charts
+
+
+def test_small_views_keep_a_leaf_per_row(shipped):
+    leaves = charts.treemap_leaves(shipped)
+    assert len(leaves) == len(shipped) and not leaves["Country"].str.startswith("Other").any()
+
+
+def test_large_views_keep_the_largest_and_merge_the_rest(panel):
+    leaves = charts.treemap_leaves(panel, max_leaves=50)
+    regions = panel["region"].nunique()
+    assert len(leaves) == 50
+    other = leaves[leaves["Country"].str.startswith("Other (")]
+    assert len(other) == regions
+    kept = leaves.drop(other.index)
+    size = panel["financial_freedom"] + 10
+    assert kept["size"].min() >= size.nlargest(50 - regions).min()
+    assert np.isclose(leaves["size"].sum(), size.sum())
+    # Each Other leaf is colored by its rows' size-weighted mean
+    rest = panel.drop(panel.index[size.rank(method="first", ascending=False) <= 50 - regions])
+    w = rest["financial_freedom"] * (rest["financial_freedom"] + 10)
+    expected = w.groupby(rest["region"], observed=True).sum() / (rest["financial_freedom"] + 10).groupby(
+        rest["region"], observed=True).sum()
+    got = pd.Series(other["financial_freedom"].to_numpy(), index=other["region"].to_numpy())
+    assert np.allclose(got.sort_index(), expected.sort_index())
+
+
+def test_capped_treemap_draws(panel):
+    fig = charts.financial_treemap(panel)
+    assert len(fig.data[0].ids) <= charts.MAX_LEAVES + 1 + panel["region"].nunique()
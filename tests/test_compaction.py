@@ -0,0 +1,72 @@
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+import compaction
+from compaction import compact, decode, encode
+
+
+def values(trace, key):
+    v = trace[key]
+    arr = decode(v) if isinstance(v, dict) else None
+    return arr if arr is not None else np.asarray(v)
+
+
+@pytest.mark.parametrize("arr,dtype", [
+    (np.array([1.0, 2.0, 300.0]), "i2"),
+    (np.array([0, 1, 255]), "u1"),
+    (np.array([-3, 1, 100]), "i1"),
+    (np.array([True, False]), "u1"),
+    (np.array([0.5, np.nan]), "f8"),
+    (np.arange(6.0).reshape(2, 3), "i1"),
+])
+def test_encode_round_trips_in_narrowest_dtype(arr, dtype):
+    spec = encode(arr)
+    assert spec["dtype"] == dtype
+    np.testing.assert_array_equal(decode(spec), arr)
+
+
+def test_small_figure_is_unchanged():
+    fig = go.Figure(go.Scatter(x=["a", "b"], y=[1.5, 2.5], mode="lines"))
+    out = compact(fig, max_points=100).data[0]
+    assert list(out.x) == ["a", "b"] and list(out.y) == [1.5, 2.5]
+
+
+def test_traces_on_a_shared_category_axis_keep_the_same_categories():
+    rng = np.random.default_rng(0)
+    countries = [f"C{i}" for i in range(5000)]
+    fig = go.Figure([go.Scatter(x=countries, y=rng.lognormal(size=5000), mode="lines+markers"),
+                     go.Scatter(x=countries, y=rng.normal(size=5000), mode="lines+markers")])
+    a, b = compact(fig, max_points=400, gl_threshold=10**6).to_dict()["data"]
+    assert list(a["x"]) == list(b["x"])
+    assert len(a["x"]) <= 400
+    # Each line's extremes survive
+    for trace, source in zip((a, b), fig.data):
+        kept = values(trace, "y")
+        assert kept.max() == max(source.y) and kept.min() == min(source.y)
+
+
+def test_marker_trace_keeps_arrays_aligned():
+    x = np.arange(10_000.0)
+    fig = go.Figure(go.Scatter(x=x, y=2 * x, mode="markers", text=[str(v) for v in x]))
+    trace = compact(fig, max_points=500, gl_threshold=1000).to_dict()["data"][0]
+    kept_x = values(trace, "x")
+    assert len(kept_x) == 500 and trace["type"] == "scattergl"
+    np.testing.assert_array_equal(values(trace, "y"), 2 * kept_x)
+    assert list(trace["text"]) == [str(float(v)) for v in kept_x]
+
+
+def test_unreferenced_customdata_is_dropped():
+    fig = go.Figure(go.Scatter(x=[1, 2], y=[3, 4], customdata=[[1, "a"], [2, "b"]],
+                               hovertemplate="%{customdata[1]}"))
+    trace = compact(fig).to_dict()["data"][0]
+    assert list(map(list, trace["customdata"])) == [["a"], ["b"]]
+    assert trace["hovertemplate"] == "%{customdata[0]}"
+
+
+def test_report_counts_points():
+    fig = go.Figure(go.Scatter(x=np.arange(3000), y=np.arange(3000), mode="markers"))
+    compact(fig, name="t", report=True, max_points=1000)
+    report = compaction.size_report()["t"]
+    assert (report["points_in"], report["points_out"]) == (3000, 1000)
+    assert report["after"] < report["before"]
@@ -0,0 +1,64 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import CorrelationEngine, spearman
+from data_source import CORR_COLUMNS
+from filters import ALL
+
+RANGES = [(0, 100), (3, 31), (40, 70), (55.5, 60.25), (69.9, 70.1), (80, 90)]
+
+
+def expected(df, region, score_range, method="pearson"):
+    mask = df["score"].between(*score_range)
+    if region != ALL:
+        mask &= df["region"] == region
+    return df.loc[mask, CORR_COLUMNS].corr(method=method)
+
+
+def sweep(df):
+    return list(itertools.product([ALL] + sorted(df["region"].unique()), RANGES))
+
+
+def test_pearson_matches_dataframe_corr_shipped(shipped):
+    engine = CorrelationEngine(shipped, CORR_COLUMNS)
+    for region, score_range in sweep(shipped):
+        got = engine.pearson(region, score_range)
+        pd.testing.assert_frame_equal(got, expected(shipped, region, score_range), atol=1e-9,
+                                      obj=f"{region} {score_range}")
+
+
+def test_pearson_matches_dataframe_corr_panel(panel):
+    engine = CorrelationEngine(panel, CORR_COLUMNS)
+    for region, score_range in sweep(panel):
+        pd.testing.assert_frame_equal(engine.pearson(region, score_range), expected(panel, region, score_range),
+                                      atol=1e-9, obj=f"{region} {score_range}")
+
+
+def test_constant_column_is_nan_not_one(shipped):
+    # Two rows, both with financial_freedom 10
+    r = CorrelationEngine(shipped, CORR_COLUMNS).pearson(ALL, (3, 31))
+    assert r["financial_freedom"].isna().all()
+
+
+def test_spearman_matches_dataframe_corr(panel):
+    view = panel[panel["region"] == "Europe"]
+    pd.testing.assert_frame_equal(spearman(view, CORR_COLUMNS), view[CORR_COLUMNS].corr(method="spearman"),
+                                  atol=1e-9)
+
+
+@pytest.mark.parametrize("region,score_range", [(ALL, (0, 100)), ("Europe", (50, 80))])
+def test_ols_matches_polyfit(panel, region, score_range):
+    engine = CorrelationEngine(panel, CORR_COLUMNS)
+    slope, intercept, lo, hi = engine.ols("score", "gdp_ppp", region, score_range)
+    mask = panel["score"].between(*score_range) & (True if region == ALL else panel["region"] == region)
+    rows = panel.loc[mask, ["score", "gdp_ppp"]].dropna()
+    np.testing.assert_allclose([slope, intercept], np.polyfit(rows["score"], rows["gdp_ppp"], 1), rtol=1e-7)
+    assert (lo, hi) == (rows["score"].min(), rows["score"].max())
+
+
+def test_ols_constant_x_is_undetermined():
+    df = pd.DataFrame({"region": "Europe", "score": [70.3] * 5, "gdp_ppp": [1.0, 2, 3, 4, 5]})
+    assert CorrelationEngine(df, ["score", "gdp_ppp"]).ols("score", "gdp_ppp") is None
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+from cube import Cube
+
+
+@pytest.fixture
+def long_frame():
+    # Three countries over three years; C has no 2021 row, B no 2020 GDP
+    rows = [("A", "AAA", "X", 2020, 60.0, 10.0, 1.0), ("A", "AAA", "X", 2021, 62.0, 11.0, 1.0),
+            ("A", "AAA", "X", 2022, 64.0, 12.1, 1.0), ("B", "BBB", "Y", 2020, 50.0, np.nan, 2.0),
+            ("B", "BBB", "Y", 2021, 51.0, 5.0, 2.0), ("B", "BBB", "Y", 2022, 49.0, 5.5, 2.0),
+            ("C", None, "Y", 2020, 70.0, 20.0, 3.0), ("C", None, "Y", 2022, 72.0, 22.0, 3.0)]
+    return pd.DataFrame(rows, columns=["Country", "iso_code", "region", "year", "score", "gdp_ppp", "population"])
+
+
+@pytest.fixture
+def small(long_frame):
+    return Cube.from_frame(long_frame, ["score", "gdp_ppp", "population"])
+
+
+def test_year_slices_match_the_long_frame(small, long_frame):
+    assert small.values.shape == (3, 3, 3) and small.years == [2020, 2021, 2022]
+    for year in small.years:
+        expected = (long_frame[long_frame["year"] == year].set_index("Country")
+                    .reindex(["A", "B", "C"])[["score", "gdp_ppp", "population"]].to_numpy())
+        np.testing.assert_array_equal(small.year_slice(year), expected)
+    assert np.shares_memory(small.year_slice(2021), small.values)
+    np.testing.assert_array_equal(small.trajectory("B")[:, 0], [50, 51, 49])
+    assert small.positions(["C", "nowhere", "A"]).tolist() == [2, 0]
+
+
+def test_year_frame_ranks_and_drops_unscored(small):
+    df = small.frame(2021)
+    assert df["Country"].tolist() == ["A", "B"] and (df["year"] == 2021).all()
+    assert df["rank"].tolist() == [1, 2]
+    assert df["iso_code"].tolist() == ["AAA", "BBB"]
+
+
+def test_growth_needs_both_ends(small):
+    growth = small.growth(2022, span=2)
+    assert growth[0] == pytest.approx(((12.1 * 1.0) / (10.0 * 1.0)) ** 0.5 * 100 - 100)
+    assert np.isnan(growth[1]) and not np.isnan(growth[2])
+    assert np.isnan(small.growth(2020, span=2)).all()
+
+
+def test_long_is_year_major_and_drops_missing(small, long_frame):
+    out = small.long(["score", "gdp_ppp"])
+    expected = long_frame.sort_values(["year", "Country"], kind="stable")[
+        ["Country", "region", "year", "score", "gdp_ppp"]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+    only = small.long(["gdp_ppp"], countries=["B"])
+    assert only["year"].tolist() == [2021, 2022] and set(only["Country"]) == {"B"}
+
+
+def test_save_and_open_memory_map(small, tmp_path):
+    small.save(tmp_path / "c", "v1")
+    opened = Cube.open(tmp_path / "c")
+    assert isinstance(opened.values, np.memmap)
+    np.testing.assert_array_equal(opened.values, small.values)
+    assert opened.iso_codes.tolist() == ["AAA", "BBB", None] and opened.years == small.years
+
+
+def test_open_cube_rebuilds_when_the_file_changes(shipped_csv):
+    first = cube.open_cube(shipped_csv)
+    assert isinstance(first.values, np.memmap) and first.years == [2022]
+    again = cube.open_cube(shipped_csv)
+    np.testing.assert_array_equal(again.values, first.values)
+    df = pd.read_csv(shipped_csv).iloc[:10]
+    df.to_csv(shipped_csv, index=False)
+    st = os.stat(shipped_csv)
+    os.utime(shipped_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert len(cube.open_cube(shipped_csv).countries) == 10
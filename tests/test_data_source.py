@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+import data_source
+from data_source import DASHBOARD_COLUMNS, SCHEMA, SchemaError
+
+
+def test_csv_load_matches_pandas(shipped_csv):
+    df = data_source.load(path=shipped_csv)
+    raw = pd.read_csv(shipped_csv)
+    assert len(df) == len(raw)
+    assert list(df.columns) == [c for c in DASHBOARD_COLUMNS + ["year"] if c in raw.columns]
+    pd.testing.assert_series_equal(df["score"], raw["score"].astype("float64"), check_names=False)
+    for col in df.columns:
+        assert str(df[col].dtype) == SCHEMA[col]
+
+
+def test_csv_builds_arrow_sidecar_once(shipped_csv):
+    source = data_source.CsvSource(shipped_csv)
+    first = source.load(["Country", "score"])
+    assert source.sidecar.exists()
+    mtime = source.sidecar.stat().st_mtime_ns
+    pd.testing.assert_frame_equal(data_source.CsvSource(shipped_csv).load(["Country", "score"]), first)
+    assert source.sidecar.stat().st_mtime_ns == mtime
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_columnar_formats_round_trip(tmp_path, shipped, suffix):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    path = tmp_path / f"efi{suffix}"
+    if suffix == ".parquet":
+        shipped.to_parquet(path, index=False)
+    else:
+        feather.write_feather(pa.Table.from_pandas(shipped, preserve_index=False), path)
+    pd.testing.assert_frame_equal(data_source.load(path=path), shipped)
+
+
+def test_projection_keeps_year(tmp_path, shipped):
+    path = tmp_path / "panel.parquet"
+    pd.concat([shipped.assign(year=2021), shipped.assign(year=2022)]).to_parquet(path, index=False)
+    df = data_source.load(["Country", "score"], path=path)
+    assert list(df.columns) == ["Country", "score", "year", "rank"]
+    assert (df["year"] == 2022).all() and len(df) == len(shipped)
+
+
+def test_missing_required_column(tmp_path, shipped):
+    path = tmp_path / "bad.parquet"
+    shipped.drop(columns=["score"]).to_parquet(path, index=False)
+    with pytest.raises(SchemaError, match="score"):
+        data_source.load(path=path)
+
+
+def test_unsupported_file(tmp_path):
+    with pytest.raises(SchemaError):
+        data_source.open_source(tmp_path / "efi.xlsx")
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+import disk_cache
+import query
+from disk_cache import DiskCache
+from figure_cache import FigureCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "results.sqlite"
+
+
+def cache(namespace, path, max_bytes=2**20, **kw):
+    # conftest turns the default budget off (EFI_DISK_CACHE_MB=0)
+    return DiskCache(namespace, path, max_bytes=max_bytes, **kw)
+
+
+def test_entries_outlive_the_instance(path):
+    cache("figures", path).put("k", "payload")
+    other = cache("figures", path)
+    assert other.get("k") == "payload" and other.stats()["hits"] == 1
+    assert cache("api", path).get("k") is None
+
+
+def test_expired_entries_are_not_served(path, monkeypatch):
+    c = cache("figures", path, ttl=60)
+    c.put("k", "payload")
+    now = disk_cache.time.time()
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now + 61)
+    assert c.get("k") is None
+
+
+def test_least_recently_read_are_evicted_past_max_bytes(path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "EVICT_EVERY", 1)
+    c = cache("figures", path, max_bytes=1000)
+    clock = iter(range(10**6))
+    monkeypatch.setattr(disk_cache.time, "time", lambda: 1e9 + next(clock))
+    payload = os.urandom(700).hex()  # ~700 bytes compressed: two don't fit
+    c.put("a", payload)
+    c.put("b", payload)
+    assert c.get("a") is None and c.get("b") == payload
+
+
+def test_unusable_file_is_a_no_op(tmp_path):
+    (tmp_path / "file").write_text("")
+    c = cache("figures", tmp_path / "file" / "results.sqlite")
+    c.put("k", "payload")
+    assert c.get("k") is None and c.stats()["entries"] == 0
+    assert cache("figures", tmp_path / "x.sqlite", max_bytes=0).get("k") is None
+
+
+def test_memory_misses_fall_back_to_disk(path):
+    FigureCache(2**20, disk=cache("figures", path)).put("k", "payload")
+    fresh = FigureCache(2**20, disk=cache("figures", path))
+    assert fresh.lookup("k") == "payload" and fresh.get("k") == "payload"
+
+
+def test_kpis_are_cached_on_the_view_fingerprint(monkeypatch, shipped_csv, path):
+    monkeypatch.setenv("EFI_DATA_PATH", str(shipped_csv))
+    monkeypatch.setattr(query, "KPIS", FigureCache(2**20, disk=cache("kpis", path)))
+    store, _, _ = query.dataset()
+    key, idx, view = store.select("Europe", (60, 100))
+    first = query.cached_kpis(store, key, idx, view, "fp")
+    assert first == query.kpis(store, key, idx, view)
+    assert json.loads(cache("kpis", path).get("fp")) == first
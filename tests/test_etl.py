@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+import data_source
+import etl
+import query
+
+
+def test_build_writes_only_tables_the_dashboard_reads(shipped_csv, tmp_path):
+    out = tmp_path / "artifacts"
+    manifest = etl.run([shipped_csv], out, year=2022, workers=1, log=lambda *_: None)
+    assert manifest["years"]["2022"]["tables"] == ["correlation", "frame"]
+    source = data_source.open_source(out)
+    assert isinstance(source, data_source.ArtifactSource)
+    assert len(source.load()) == len(pd.read_csv(shipped_csv))
+    corr = source.table("correlation", 2022)
+    assert set(corr["method"]) == {"pearson", "spearman"}
+    assert source.table("highlights", 2022) is None
+
+
+def test_unchanged_inputs_are_not_rebuilt(shipped_csv, tmp_path):
+    out, logged = tmp_path / "artifacts", []
+    etl.run([shipped_csv], out, year=2022, workers=1, log=lambda *_: None)
+    etl.run([shipped_csv], out, year=2022, workers=1, log=logged.append)
+    assert logged == ["up to date"]
+
+
+def test_dashboard_reads_the_prebuilt_matrix(shipped_csv, tmp_path, monkeypatch):
+    out = tmp_path / "artifacts"
+    etl.run([shipped_csv], out, year=2022, workers=1, log=lambda *_: None)
+    monkeypatch.setenv("EFI_DATA_PATH", str(out))
+    query.artifact_table.cache_clear()
+    try:
+        table = query.artifact_table(data_source.version(), "correlation", 2022)
+    finally:
+        query.artifact_table.cache_clear()
+    pearson = table[table["method"] == "pearson"].drop(columns="method").set_index("column")
+    frame = data_source.open_source(out).load()
+    np.testing.assert_allclose(pearson.to_numpy(dtype="float64"),
+                               frame[list(pearson.columns)].corr().to_numpy(), equal_nan=True)
@@ -0,0 +1,57 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+import export
+from export import FORMATS, ExportCache
+
+
+def read_back(data, fmt):
+    ext = FORMATS[fmt][0]
+    if ext == "csv":
+        return pd.read_csv(io.BytesIO(data))
+    if ext == "csv.gz":
+        return pd.read_csv(io.BytesIO(gzip.decompress(data)))
+    if ext == "parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    import pyarrow as pa
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
+
+
+@pytest.fixture
+def frame(panel):
+    return panel[["Country", "region", "score", "gdp_ppp", "inflation"]].head(1234)
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+@pytest.mark.parametrize("chunk_rows", [100, export.CHUNK_ROWS])
+def test_round_trip(frame, fmt, chunk_rows):
+    data = b"".join(export.iter_export(frame, fmt, chunk_rows))
+    back = read_back(data, fmt)
+    if FORMATS[fmt][0].startswith("csv"):
+        back = back.astype({"Country": "string", "region": "string"})
+    pd.testing.assert_frame_equal(back, frame.reset_index(drop=True), check_dtype=False)
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_empty_frame(frame, fmt):
+    back = read_back(b"".join(export.iter_export(frame.iloc[:0], fmt)), fmt)
+    assert len(back) == 0 and list(back.columns) == list(frame.columns)
+
+
+def test_cache_builds_once_and_stays_bounded(frame):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return frame
+
+    cache = ExportCache(max_bytes=10**9)
+    first = cache.lazy(("v", "filter"), build, "CSV")()
+    assert cache.lazy(("v", "filter"), build, "CSV")() is first and len(calls) == 1
+    small = ExportCache(max_bytes=len(first) + 1)
+    small.get_or_build(("a",), build, "CSV")
+    small.get_or_build(("b",), build, "CSV")
+    assert small.bytes == len(first)
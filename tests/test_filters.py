@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from filters import ALL, FilterEngine
+
+CASES = [(ALL, (0, 100)), (ALL, (40, 70)), ("Europe", (0, 100)), ("Europe", (55.5, 80)),
+         ("Sub-Saharan Africa", (70, 71)), (ALL, (101, 200)), ("Atlantis", (0, 100))]
+
+
+def expected(df, region, score_range):
+    mask = df["score"].between(*score_range)
+    if region != ALL:
+        mask &= df["region"] == region
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.mark.parametrize("region,score_range", CASES)
+def test_select_matches_pandas_mask(panel, region, score_range):
+    idx = FilterEngine(panel).select(region, score_range)
+    np.testing.assert_array_equal(idx, expected(panel, region, score_range))
+
+
+def test_results_are_cached_read_only(panel):
+    engine = FilterEngine(panel, cache_size=2)
+    first = engine.select("Europe", (40, 70))
+    assert engine.select("Europe", (40.0, 70.0)) is first
+    assert not first.flags.writeable
+    engine.select(ALL, (1, 2))
+    engine.select(ALL, (3, 4))
+    assert engine.select("Europe", (40, 70)) is not first
+
+
+def test_unfiltered_view_is_the_frame(panel):
+    engine = FilterEngine(panel)
+    assert engine.view(panel, engine.select()) is panel
+    view = engine.view(panel, engine.select("Europe"))
+    assert (view["region"] == "Europe").all()
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import charts
+import geo
+from cube import Cube
+from geo import GeoIndex
+
+
+def test_one_row_per_country_is_a_gather(shipped):
+    index = GeoIndex.from_frame(shipped)
+    located = shipped["iso_code"].notna().to_numpy()
+    assert not index.aggregated and len(index) == located.sum()
+    assert list(index.names) == shipped["Country"][located].tolist()
+    np.testing.assert_array_equal(index.take(shipped["score"]), shipped["score"][located])
+    assert index.units() == {}
+
+
+def test_rows_without_a_code_are_not_drawn():
+    index = GeoIndex(["AAA", None, "BBB"], ["a", "nowhere", "b"], ["X", "X", "Y"])
+    assert index.iso == ["AAA", "BBB"] and index.take([1.0, 2.0, 3.0]).tolist() == [1.0, 3.0]
+
+
+def test_sub_national_rows_aggregate_to_their_country(panel):
+    index = GeoIndex.from_frame(panel)
+    grouped = panel.groupby("iso_code", sort=False)
+    assert index.aggregated and index.iso == list(grouped.groups)
+    np.testing.assert_allclose(index.take(panel["score"]), grouped["score"].mean().to_numpy())
+    np.testing.assert_array_equal(index.take(panel["rank"], "min"), grouped["rank"].min().to_numpy())
+    np.testing.assert_array_equal(index.counts, grouped.size().to_numpy())
+    # "Singapore · 1" … "Singapore · n" draw as Singapore
+    assert list(index.names) == [n.split(" · ")[0] for n in grouped["Country"].first()]
+    assert list(index.region_names) == grouped["region"].first().tolist()
+
+
+def test_aggregates_skip_missing_values():
+    index = GeoIndex(["AAA", "AAA", "BBB"], ["A · 1", "A · 2", "B"], ["X", "X", "Y"])
+    assert index.names.tolist() == ["A", "B"]
+    np.testing.assert_array_equal(index.take([np.nan, 4.0, np.nan]), [4.0, np.nan])
+    np.testing.assert_array_equal(index.take([np.nan, 4.0, np.nan], "max"), [4.0, np.nan])
+
+
+def test_region_stats_count_countries_not_rows(panel):
+    index = GeoIndex.from_frame(panel)
+    means, counts = index.region_stats(panel["score"])
+    per_country = panel.groupby("iso_code", sort=False).agg(region=("region", "first"), score=("score", "mean"))
+    expected = per_country.groupby("region")["score"].agg(["mean", "size"]).reindex(index.regions)
+    np.testing.assert_allclose(means, expected["mean"])
+    np.testing.assert_array_equal(counts, expected["size"])
+
+
+@pytest.mark.parametrize("build", [charts.world_map, charts.top_map, charts.bottom_map, charts.region_map])
+def test_map_payload_is_one_feature_per_country(panel, build):
+    trace = build(panel).data[0]
+    assert len(trace.locations) == len(trace.z) == len(trace.text) == panel["iso_code"].nunique()
+    assert len(build(panel).to_json()) < 50_000
+
+
+def test_highlight_marks_a_country_when_any_row_is(panel):
+    mask = np.zeros(len(panel), dtype=bool)
+    mask[1] = True
+    trace = charts.highlight_map(panel, mask, "Chosen", "#fff").data[0]
+    marked = [iso for iso, z in zip(trace.locations, trace.z) if z]
+    assert marked == [panel["iso_code"].iloc[1]]
+    assert "Chosen: yes" in trace.text[list(trace.locations).index(marked[0])]
+
+
+def test_year_change_has_one_row_per_country(panel):
+    frames = pd.concat([panel.assign(year=2021), panel.assign(year=2022, score=panel["score"] + 1)])
+    change = geo.year_change(Cube.from_frame(frames), "score", 2021, 2022)
+    assert change["iso_code"].tolist() == list(dict.fromkeys(panel["iso_code"]))
+    np.testing.assert_allclose(change["change"], 1.0)
+    assert len(charts.change_map(change, 2021, 2022).data[0].text) == len(change)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import metrics
+from metrics import Metric, MetricError, MetricSet, ResultCache, parse
+
+
+def evaluate(text, frame, cache=None):
+    return parse(text).evaluate(frame, token=lambda column: column, cache=cache or ResultCache(2**24))
+
+
+def test_arithmetic_matches_pandas(panel):
+    out = evaluate("gdp_total = gdp_ppp * population / 1000\nreal = gdp_growth_5yr - inflation", panel)
+    np.testing.assert_allclose(out["gdp_total"], panel["gdp_ppp"] * panel["population"] / 1000)
+    np.testing.assert_allclose(out["real"], panel["gdp_growth_5yr"] - panel["inflation"])
+
+
+def test_grouped_functions_match_groupby(panel):
+    out = evaluate("z = zscore(score, by=region)\np = pct_rank(gdp_ppp, by=region)\nm = mean(inflation)", panel)
+    by = panel.groupby("region")
+    np.testing.assert_allclose(out["z"], (panel["score"] - by["score"].transform("mean"))
+                               / by["score"].transform("std"))
+    np.testing.assert_allclose(out["p"], by["gdp_ppp"].rank(pct=True) * 100)
+    np.testing.assert_allclose(out["m"], np.full(len(panel), panel["inflation"].mean()))
+
+
+def test_division_by_zero_is_missing():
+    frame = pd.DataFrame({"score": [1.0, 2.0], "inflation": [0.0, 4.0]})
+    np.testing.assert_array_equal(evaluate("r = score / inflation", frame)["r"], [np.nan, 0.5])
+
+
+def test_metrics_build_on_each_other_in_dependency_order(panel):
+    out = evaluate("b = a * 2\na = score + 1", panel)
+    np.testing.assert_allclose(out["b"], (panel["score"] + 1) * 2)
+    assert parse("b = a * 2\na = score + 1").order == ["a", "b"]
+
+
+def test_results_are_cached_on_inputs(panel):
+    cache = ResultCache(2**24)
+    evaluate("a = score + 1\nb = gdp_ppp * 2", panel, cache)
+    misses = cache.misses
+    evaluate("a = score + 1\nb = gdp_ppp * 2", panel, cache)
+    assert cache.misses == misses
+
+
+@pytest.mark.parametrize("text,message", [
+    ("a = score +", "a:"),
+    ("score = gdp_ppp", "shadow"),
+    ("a = __import__('os')", "not supported"),
+    ("a = score.real", "not supported"),
+    ("a = 'x'", "numeric constants"),
+    ("a = b\nb = a", "cycle"),
+    ("a = 1\na = 2", "defined twice"),
+    ("a = log(score, by=region)", "take by="),
+    ("just text", "expected 'name = expression'"),
+    ("a = " + "score+" * 1500 + "score", "longer than"),
+    ("a = " + "-" * 400 + "score", "nested more than"),
+    ("\n".join(f"m{i} = score" for i in range(metrics.MAX_METRICS + 1)), "at most"),
+])
+def test_bad_definitions_raise_metric_error(text, message):
+    with pytest.raises(MetricError, match=message):
+        parse(text)
+
+
+def test_deep_nesting_is_a_metric_error_even_without_the_caps(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_EXPRESSION", 10**6)
+    monkeypatch.setattr(metrics, "MAX_DEPTH", 10**6)
+    with pytest.raises(MetricError, match="too complex"):
+        Metric("a", "score+" * 5000 + "score")
+
+
+def test_unknown_columns_are_reported(panel):
+    with pytest.raises(MetricError, match="unknown column"):
+        MetricSet([Metric("a", "nope * 2")]).evaluate(panel, token=lambda c: c)
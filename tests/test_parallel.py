@@ -0,0 +1,80 @@
+import json
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+import parallel
+from figure_cache import FigureCache
+from parallel import FigureBatch
+
+
+def bar(data, delay=0.0):
+    time.sleep(delay)
+    return go.Figure(go.Bar(x=list(range(len(data))), y=list(data)))
+
+
+def broken(data):
+    raise ValueError("bad chart input")
+
+
+def values(payload):
+    return json.loads(payload)["data"][0]["y"]
+
+
+@pytest.mark.parametrize("workers", [0, 4])
+def test_figures_come_back_by_name_whatever_finishes_first(workers):
+    batch = FigureBatch(workers=workers, kind="thread", compact=False)
+    # The first submitted finishes last
+    for i, delay in enumerate([0.2, 0.1, 0.0]):
+        batch.submit(f"chart {i}", bar, [i, i + 1], delay=delay)
+    assert batch.rows("chart 0") == 2
+    assert [values(batch.take(f"chart {i}")[0]) for i in range(3)] == [[0, 1], [1, 2], [2, 3]]
+
+
+def test_pool_and_serial_payloads_are_identical():
+    payloads = []
+    for workers in (0, 4):
+        batch = FigureBatch(workers=workers, kind="thread")
+        batch.submit("bars", bar, list(range(50)))
+        payloads.append(batch.take("bars")[0])
+    assert payloads[0] == payloads[1]
+
+
+@pytest.mark.parametrize("workers,kind", [(0, "thread"), (4, "thread"), (2, "process")])
+def test_build_errors_surface_at_take(workers, kind):
+    batch = FigureBatch(workers=workers, kind=kind, compact=False)
+    batch.submit("broken", broken, [1])
+    batch.submit("fine", bar, [1])
+    with pytest.raises(ValueError, match="bad chart input"):
+        batch.take("broken")
+    assert values(batch.take("fine")[0]) == [1]
+
+
+def test_unpicklable_builds_fall_back_to_inline():
+    batch = FigureBatch(workers=2, kind="process", compact=False)
+    batch.submit("lambda", lambda d: bar(d), [3, 4])
+    assert values(batch.take("lambda")[0]) == [3, 4]
+
+
+def test_cached_figures_are_not_rebuilt():
+    calls = []
+
+    def counted(data):
+        calls.append(1)
+        return bar(data)
+
+    cache = FigureCache(2**20)
+    for _ in range(2):
+        batch = FigureBatch(workers=0, compact=False, cache=cache)
+        batch.submit("bars", counted, [5], cache_key="k")
+        assert values(batch.take("bars")[0]) == [5]
+    assert len(calls) == 1
+
+
+def test_a_shut_down_pool_builds_inline():
+    batch = FigureBatch(workers=3, kind="thread", compact=False)
+    parallel.executor("thread", 3).shutdown()
+    batch.submit("bars", bar, [7])
+    assert values(batch.take("bars")[0]) == [7]
+    assert parallel.executor("thread", 3) is not None
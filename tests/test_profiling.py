@@ -0,0 +1,42 @@
+import io
+
+import profiling
+
+
+def test_untraced_run_records_nothing():
+    profiling.begin_run()
+    with profiling.section("chart", rows=10):
+        pass
+    assert profiling.end_run() is None
+
+
+def test_traced_run_nests_spans():
+    profiling.begin_run(enabled=True)
+    with profiling.section("tab"):
+        with profiling.section("chart", rows=10):
+            pass
+    run = profiling.end_run()
+    spans = {s["name"]: s for s in run["spans"]}
+    assert spans["chart"]["parent"] == "tab" and spans["chart"]["rows"] == 10
+    assert "efi_section_seconds" in profiling.prometheus_text()
+
+
+def test_cold_start_is_reported_only_when_enabled(monkeypatch):
+    monkeypatch.setattr(profiling, "STARTUP", {})
+    assert profiling.startup("imports", 0.25)
+    assert not profiling.startup("imports", 0.5)
+    out = io.StringIO()
+    monkeypatch.setattr(profiling, "ENABLED", False)
+    profiling.report_startup(out)
+    assert out.getvalue() == ""
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    profiling.report_startup(out)
+    assert out.getvalue() == "efi: cold start imports 250 ms\n"
+
+
+def test_rows_added_inside_a_section_count_toward_it():
+    profiling.add_rows(5)  # untraced: a no-op
+    profiling.begin_run(enabled=True)
+    with profiling.section("sidebar filtering"):
+        profiling.add_rows(7)
+    assert profiling.end_run()["spans"][0]["rows"] == 7
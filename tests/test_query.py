@@ -0,0 +1,62 @@
+import pytest
+
+import query
+from query import QueryError
+
+
+@pytest.fixture(autouse=True)
+def data(monkeypatch, shipped_csv):
+    monkeypatch.setenv("EFI_DATA_PATH", str(shipped_csv))
+
+
+def test_kpis_match_pandas(shipped):
+    out = query.run({"region": "Europe", "score_range": [60, 100]})
+    view = shipped[(shipped["region"] == "Europe") & shipped["score"].between(60, 100)]
+    assert out["rows"] == len(view)
+    assert out["kpis"]["avg_score"] == pytest.approx(view["score"].mean())
+    assert out["kpis"]["top_country"] == view.sort_values("rank")["Country"].iloc[0]
+
+
+def test_ranking_is_top_n_by_rank(shipped):
+    out = query.run({"include": "ranking", "top_n": 5})
+    assert [r["Country"] for r in out["ranking"]] == list(shipped.sort_values("rank")["Country"].head(5))
+
+
+def test_correlation_matches_dataframe_corr(shipped):
+    out = query.run({"include": ["correlation"], "method": "spearman", "region": "Europe"})
+    view = shipped[shipped["region"] == "Europe"]
+    expected = view[out["correlation"]["columns"]].corr(method="spearman").round(4)
+    got = out["correlation"]["matrix"]
+    for i, row in enumerate(expected.to_numpy()):
+        assert [None if v != v else v for v in row] == pytest.approx(got[i], nan_ok=True)
+
+
+@pytest.mark.parametrize("spec,message", [
+    ({"top_n": -1}, "top_n must be between"),
+    ({"top_n": 0}, "top_n must be between"),
+    ({"k": -3, "include": "similar", "country": "Chile"}, "k must be between"),
+    ({"k": 10**6}, "k must be between"),
+    ({"year": 1999}, "no data for year 1999"),
+    ({"method": "kendall"}, "unknown correlation method"),
+    ({"scale": "cube"}, "unknown scale"),
+    ({"include": "maps"}, "unknown include"),
+    ({"bogus": 1}, "unknown query field"),
+    ({"score_range": "high"}, "malformed query"),
+    ({"weights": {"nope": 2}}, "unknown weight"),
+    ({"include": "similar"}, "needs a country"),
+    ({"include": "similar", "country": "Atlantis"}, "no data for 'Atlantis'"),
+])
+def test_bad_queries_raise_query_error(spec, message):
+    with pytest.raises(QueryError, match=message):
+        query.run(spec)
+
+
+def test_batch_isolates_bad_queries():
+    out = query.batch([{"top_n": -1}, {"region": "Europe"}, {"metrics": {"x": "score +"}}])
+    assert "error" in out[0] and "error" in out[2]
+    assert out[1]["rows"] > 0
+
+
+def test_etag_is_canonical():
+    assert query.etag({"include": ["kpis"]}) == query.etag({"include": "kpis", "top_n": "20"})
+    assert query.etag({"top_n": 5}) != query.etag({"top_n": 6})
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from filters import ALL, FilterEngine
+from rankings import RankingIndex, select_top
+
+COLUMNS = ["score", "unemployment", "inflation"]
+
+
+def expected(df, idx, column, ascending):
+    # Stable, NaN last in both directions
+    return df.iloc[idx].sort_values(column, ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+@pytest.mark.parametrize("column", COLUMNS)
+@pytest.mark.parametrize("ascending", [True, False])
+@pytest.mark.parametrize("flt", [(ALL, (0, 100)), (ALL, (30, 90)), ("Europe", (60, 100)), ("Americas", (50, 51))])
+def test_order_matches_pandas_sort(panel, column, ascending, flt):
+    engine, index = FilterEngine(panel), RankingIndex(panel, COLUMNS)
+    idx = engine.select(*flt)
+    order = index.order(engine.key(*flt), idx, column, ascending)
+    np.testing.assert_array_equal(order, expected(panel, idx, column, ascending))
+
+
+@pytest.mark.parametrize("n", [0, 1, 10, 100])
+def test_top_matches_full_sort(panel, n):
+    engine, index = FilterEngine(panel), RankingIndex(panel, COLUMNS)
+    idx = engine.select(ALL, (20, 95))
+    top = index.top(engine.key(ALL, (20, 95)), idx, "unemployment", n, False)
+    np.testing.assert_array_equal(top, expected(panel, idx, "unemployment", False)[:n])
+
+
+def test_select_top_breaks_ties_by_position():
+    keys = np.array([3.0, 1.0, 3.0, 2.0, 3.0, np.nan])
+    idx = np.arange(6)
+    np.testing.assert_array_equal(select_top(-keys, idx, 2), [0, 2])
+    np.testing.assert_array_equal(select_top(keys, idx, 3), [1, 3, 0])
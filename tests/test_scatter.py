@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import charts
+import scatter
+from scatter import Bins
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(3)
+    x = rng.normal(50, 10, 20_000)
+    y = 2.5 * x + 7 + rng.normal(0, 4, x.size)
+    x[:3], y[:3] = [120, -30, 55], [0, 400, 900]
+    return pd.DataFrame({"x": x, "y": y, "Country": [f"C{i % 4000}" for i in range(x.size)]})
+
+
+def in_view_list(x, y, **ranges):
+    return scatter.in_view(x, y, **ranges).tolist()
+
+
+def test_in_view_drops_missing_and_out_of_range():
+    x = np.array([1.0, np.nan, 3.0, 4.0, 5.0])
+    y = np.array([1.0, 2.0, np.nan, 4.0, 50.0])
+    assert in_view_list(x, y) == [0, 3, 4]
+    assert in_view_list(x, y, x_range=(2, 5), y_range=(0, 10)) == [3]
+
+
+def test_dense_counts_points_in_view_only(points):
+    assert not scatter.dense(points, "x", "y", max_points=len(points))
+    assert scatter.dense(points, "x", "y", max_points=1000)
+    # Zooming in to fewer points than the limit draws them individually
+    assert not scatter.dense(points, "x", "y", x_range=(0, 25), max_points=1000)
+
+
+def test_extent_widens_a_single_value():
+    assert scatter.extent(np.array([3.0, 3.0])) == (2.5, 3.5)
+    assert scatter.extent(np.array([1.0, 9.0]), bounds=(0, 10)) == (0.0, 10.0)
+
+
+@pytest.mark.parametrize("kind", ["hex", "grid"])
+def test_every_point_in_view_lands_in_one_cell(points, kind):
+    x, y = points["x"].to_numpy(), points["y"].to_numpy()
+    bins = Bins(x, y, scatter.extent(x), scatter.extent(y), nx=40, kind=kind)
+    assert bins.count.sum() == len(points)
+    assert (bins.count > 0).all()
+    assert len(bins.cells) == len(np.unique(bins.cells))
+
+
+@pytest.mark.parametrize("kind", ["hex", "grid"])
+def test_cell_moments_give_exact_mean_covariance_and_fit(points, kind):
+    x, y = points["x"].to_numpy(), points["y"].to_numpy()
+    bins = Bins(x, y, scatter.extent(x), scatter.extent(y), kind=kind)
+    assert np.allclose(bins.mean(), (x.mean(), y.mean()))
+    assert np.allclose(bins.covariance(), np.cov(x, y, bias=True))
+    assert np.allclose(bins.fit(), np.polyfit(x, y, 1))
+
+
+def test_no_fit_without_spread_in_x():
+    x, y = np.full(10, 4.0), np.arange(10.0)
+    assert Bins(x, y, scatter.extent(x), scatter.extent(y)).fit() is None
+
+
+def test_outliers_come_most_extreme_first(points):
+    x, y = points["x"].to_numpy(), points["y"].to_numpy()
+    bins = Bins(x, y, scatter.extent(x), scatter.extent(y))
+    top = scatter.outliers(x, y, bins, k=3)
+    assert sorted(top.tolist()) == [0, 1, 2]
+    assert top[0] == 2
+    assert len(scatter.outliers(x, y, bins, k=0)) == 0
+
+
+@pytest.mark.parametrize("kind", ["hex", "grid"])
+def test_density_figure_bins_the_view(points, kind):
+    fig = scatter.density_figure(points, "x", "y", x_range=(20, 80), kind=kind)
+    cells, labels, trend = fig.data
+    visible = len(scatter.in_view(points["x"].to_numpy(), points["y"].to_numpy(), (20, 80)))
+    counts = cells.marker.color if kind == "hex" else cells.z
+    assert np.nansum(np.asarray(counts, dtype=float)) == visible
+    assert len(labels.x) <= scatter.TOP_K
+    assert len(set(labels.text)) == len(labels.text)
+    assert list(fig.layout.xaxis.range) == [20, 80]
+    assert trend.name == "Trend"
+
+
+def test_charts_switch_to_bins_above_the_limit(panel, monkeypatch):
+    df = panel.dropna(subset=["score", "gdp_ppp"])
+    monkeypatch.setattr(scatter, "MAX_POINTS", len(df) - 1)
+    assert [t.name for t in charts.gdp_bubble(df).data][0] == "density"
+    monkeypatch.setattr(scatter, "MAX_POINTS", len(df))
+    assert "density" not in [t.name for t in charts.gdp_bubble(df).data]
@@ -0,0 +1,59 @@
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+import scenarios
+
+PILLARS = ["tax_burden", "trade_freedom"]
+YEARS = [2020, 2021, 2022]
+REGIONS = {"Europe", "Americas"}
+
+
+def round_trip(state, latest_year=2022):
+    params = scenarios.to_params(state, PILLARS, latest_year)
+    link = scenarios.link(params, "http://host/app?old=1")
+    parsed = dict(parse_qsl(urlsplit(link).query))
+    return params, scenarios.from_params(parsed, YEARS, REGIONS, PILLARS)
+
+
+def test_defaults_give_a_bare_link():
+    params, state = round_trip({"region": "All", "score_range": (0, 100), "top_n": 20, "year": 2022})
+    assert params == {} and state == {}
+    assert scenarios.link({}, "http://host/app?x=1") == "http://host/app"
+
+
+def test_a_view_survives_the_url():
+    view = {"region": "Europe", "score_range": (60, 90), "top_n": 10, "year": 2020, "scale": "log",
+            "metrics": "gdp_total = gdp_ppp * population", "weight:tax_burden": 2.0}
+    params, state = round_trip(view)
+    assert params["score"] == "60-90" and params["w.tax_burden"] == "2"
+    assert state == view
+
+
+@pytest.mark.parametrize("params,expected", [
+    ({"region": "Atlantis"}, {}),
+    ({"score": "90-60"}, {"score_range": (60, 90)}),
+    ({"score": "-5-500"}, {}),
+    ({"score": "x-y"}, {}),
+    ({"top": "1000"}, {"top_n": 40}),
+    ({"top": "ten"}, {}),
+    ({"year": "1999"}, {}),
+    ({"scale": "cube"}, {}),
+    ({"w.tax_burden": "99"}, {"weight:tax_burden": 3.0}),
+    ({"w.tax_burden": "nan"}, {}),
+    ({"w.unknown": "2"}, {}),
+])
+def test_malformed_parameters_are_dropped_or_clamped(params, expected):
+    assert scenarios.from_params(params, YEARS, REGIONS, PILLARS) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "m = " + "score+" * 1200 + "score",
+    "m = score +",
+    "m = __import__('os')",
+    "x" * (scenarios.MAX_METRICS_TEXT + 1),
+])
+def test_bad_metrics_are_dropped_with_a_warning(text):
+    warnings = []
+    assert scenarios.from_params({"metrics": text, "top": "10"}, warnings=warnings) == {"top_n": 10}
+    assert len(warnings) == 1 and "derived metrics were ignored" in warnings[0]
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import scoring
+from scoring import ScoringEngine, min_ranks, rank_percentiles
+
+
+def brute_ranks(scores):
+    # 1 + how many score strictly higher; NaN below everything
+    s = np.where(np.isnan(scores), -np.inf, scores)
+    return np.array([1 + (s > v).sum() for v in s])
+
+
+def test_default_weights_reproduce_the_published_index(shipped):
+    engine = ScoringEngine(shipped)
+    score, rank = engine.rescore(engine.weights())
+    published = shipped["score"].to_numpy(dtype="float64", na_value=np.nan)
+    np.testing.assert_allclose(score, published, atol=1e-9)
+    # Ranked among the file's countries, ties at one decimal sharing the best
+    np.testing.assert_array_equal(rank, brute_ranks(np.round(published, 1)))
+
+
+def test_missing_pillars_fold_into_other(shipped):
+    engine = ScoringEngine(shipped, pillars=scoring.PILLARS[:5])
+    assert engine.columns[-1] == scoring.OTHER and engine.default.sum() == pytest.approx(1)
+    score, _ = engine.rescore(engine.weights())
+    np.testing.assert_allclose(score, shipped["score"], atol=1e-9)
+
+
+@pytest.mark.parametrize("values", [
+    [3.0, 1.0, 2.0],
+    [2.0, 2.0, 1.0, 2.0],
+    [np.nan, 5.0, np.nan, 5.0, 4.0],
+    [],
+])
+def test_min_ranks_match_brute_force(values):
+    values = np.array(values, dtype="float64")
+    np.testing.assert_array_equal(min_ranks(values), brute_ranks(values))
+
+
+@pytest.fixture
+def engine(panel):
+    return ScoringEngine(panel.iloc[:60].reset_index(drop=True))
+
+
+def brute_distribution(engine, weights):
+    # Ordinal ranks per weighting, ties broken by row order
+    n = len(engine.matrix)
+    counts = np.zeros((n, n), dtype=np.int64)
+    for w in weights:
+        s = engine.scores(w)
+        for i in range(n):
+            counts[i, (s > s[i]).sum() + (s[:i] == s[i]).sum()] += 1
+    return counts
+
+
+def test_rank_distribution_matches_brute_force(engine, monkeypatch):
+    monkeypatch.setattr(scoring, "BLOCK_ELEMENTS", 7 * len(engine.matrix))  # several blocks
+    weights = engine.sample_weights(50, seed=1)
+    counts = engine.rank_distribution(weights)
+    np.testing.assert_array_equal(counts, brute_distribution(engine, weights))
+    assert (counts.sum(axis=1) == 50).all()
+    binned = engine.rank_distribution(weights, bins=7)
+    n = len(engine.matrix)
+    expected = np.zeros((n, 7), dtype=np.int64)
+    for r in range(n):
+        expected[:, r * 7 // n] += counts[:, r]
+    np.testing.assert_array_equal(binned, expected)
+
+
+def test_rank_percentiles_match_brute_force(engine):
+    weights = engine.sample_weights(200, seed=2, concentration=5.0)
+    counts = engine.rank_distribution(weights)
+    got = rank_percentiles(counts, q=(0.05, 0.5, 0.95))
+    ranks = np.arange(1, counts.shape[1] + 1)
+    for i, row in enumerate(counts):
+        cdf = np.cumsum(row) / row.sum()
+        # Smallest rank with at least a share q of the weightings at or above it
+        expected = [ranks[np.argmax(cdf >= q)] for q in (0.05, 0.5, 0.95)]
+        np.testing.assert_array_equal(got[i], expected)
+    assert (got[:, 0] <= got[:, 1]).all() and (got[:, 1] <= got[:, 2]).all()
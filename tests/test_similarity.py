@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from data_source import CORR_COLUMNS
+from similarity import LOG_COLUMNS, MIN_OVERLAP, SimilarityIndex
+
+
+def brute_force(df, columns):
+    # Distances the slow way: log, z-score, then Euclidean over shared features
+    # rescaled to the full feature count
+    X = df[columns].to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    for i, c in enumerate(columns):
+        if c in LOG_COLUMNS:
+            X[:, i] = np.log(np.where(X[:, i] > 0, X[:, i], np.nan))
+    Z = (X - np.nanmean(X, axis=0)) / np.nanstd(X, axis=0)
+    n, k = Z.shape
+    D = np.full((n, n), np.inf)
+    for a in range(n):
+        for b in range(n):
+            both = ~np.isnan(Z[a]) & ~np.isnan(Z[b])
+            if both.sum() >= max(MIN_OVERLAP * k, 1):
+                D[a, b] = np.sqrt(((Z[a, both] - Z[b, both]) ** 2).sum() * k / both.sum())
+    return D
+
+
+@pytest.fixture
+def small(panel):
+    # A hundred-odd rows with missing values, several units per country
+    return panel.iloc[:120].reset_index(drop=True)
+
+
+def test_distances_match_brute_force(small):
+    columns = [c for c in CORR_COLUMNS if c in small.columns]
+    index = SimilarityIndex.from_frame(small, columns)
+    raw = small[columns].to_numpy(dtype="float64", na_value=np.nan)
+    np.testing.assert_allclose(index.distances(*index.transform(raw)),
+                               brute_force(small, columns), rtol=1e-7, atol=1e-7)
+
+
+def test_neighbours_skip_the_rows_own_group(small):
+    columns = [c for c in CORR_COLUMNS if c in small.columns]
+    index = SimilarityIndex.from_frame(small, columns)
+    D = brute_force(small, columns)
+    country = small["Country"].str.split(" · ").str[0].to_numpy()
+    groups = SimilarityIndex.from_frame(small, columns, groups=country)
+    pos, dist = groups.neighbours([0, 17], k=5)
+    for row, found, d in zip([0, 17], pos, dist):
+        allowed = D[row].copy()
+        allowed[country == country[row]] = np.inf
+        np.testing.assert_allclose(d, np.sort(allowed)[:5], rtol=1e-7)
+        assert not (country[found] == country[row]).any()
+    pos, _ = index.neighbours([0], k=3, same_group=True)
+    assert 0 not in pos[0]
+
+
+def test_within_restricts_candidates(small):
+    index = SimilarityIndex.from_frame(small)
+    within = np.flatnonzero((small["region"] == "Europe").to_numpy())
+    pos, dist = index.neighbours([0], k=10, within=within)
+    assert set(pos[0][np.isfinite(dist[0])]) <= set(within)
+
+
+def test_incremental_add_equals_a_single_build(small):
+    columns = [c for c in CORR_COLUMNS if c in small.columns]
+    whole = SimilarityIndex.from_frame(small, columns)
+    X = small[columns].to_numpy(dtype="float64", na_value=np.nan)
+    grown = SimilarityIndex(X[:50], small["Country"][:50], columns=columns, center=whole.center,
+                            scale=whole.scale)
+    grown.add(X[50:], small["Country"][50:])
+    np.testing.assert_array_equal(grown.knn_all(4)[0], whole.knn_all(4)[0])
+
+
+def test_similarity_score(small):
+    index = SimilarityIndex.from_frame(small)
+    median = index._median_distance()
+    np.testing.assert_allclose(index.similarity([0.0, median, np.inf]), [100, 50, 0])
+
+
+def test_display_scale_is_the_median_over_sampled_pairs(small, monkeypatch):
+    import similarity
+    monkeypatch.setattr(similarity, "SCALE_SAMPLE", 40)
+    columns = [c for c in CORR_COLUMNS if c in small.columns]
+    index = SimilarityIndex.from_frame(small, columns)
+    sample = np.unique(np.linspace(0, len(small) - 1, 40).astype(np.intp))
+    D = brute_force(small, columns)[np.ix_(sample, sample)]
+    pairs = np.isfinite(D) & ~np.eye(len(sample), dtype=bool)
+    assert index._median_distance() == pytest.approx(np.median(D[pairs]))
+
+
+def test_positions_follow_added_rows(small):
+    columns = [c for c in CORR_COLUMNS if c in small.columns]
+    X = small[columns].to_numpy(dtype="float64", na_value=np.nan)
+    index = SimilarityIndex(X[:50], [f"r{i}" for i in range(50)], columns=columns)
+    assert index.positions(["r3", "missing", "r49"]).tolist() == [3, 49]
+    index.add(X[50:60], [f"r{i}" for i in range(50, 60)])
+    assert index.positions(["r55"]).tolist() == [55]
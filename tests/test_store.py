@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_source
+import query
+import store
+from data_source import CORR_COLUMNS
+from filters import ALL
+from store import DatasetStore
+
+
+@pytest.fixture
+def base(shipped):
+    return DatasetStore(shipped, CORR_COLUMNS)
+
+
+def test_views_are_materialized_once_and_shared(base, shipped):
+    key, idx, view = base.select("Europe", (60, 100))
+    mask = (shipped["region"] == "Europe") & shipped["score"].between(60, 100)
+    pd.testing.assert_frame_equal(view.sort_values("Country"), shipped[mask].sort_values("Country"))
+    again = base.select("Europe", (60.0, 100.0))
+    assert again[0] == key and again[1] is idx and again[2] is view
+    assert base.select(ALL, (0, 100))[2] is base.frame
+
+
+def test_view_cache_evicts_least_recent_past_its_budget(shipped):
+    filters = [(region, (0, 100)) for region in ("Europe", "Americas", "Asia Pacific")]
+    sizes = [store.frame_bytes(DatasetStore(shipped).select(*f)[2]) for f in filters]
+    s = DatasetStore(shipped, CORR_COLUMNS, view_bytes=2 * max(sizes))
+    views = [s.select(*f)[2] for f in filters]
+    assert s.stats()["views"] == 2 and s.stats()["view_bytes"] <= s.view_bytes
+    assert s.select(*filters[-1])[2] is views[-1]
+    assert s.select(*filters[0])[2] is not views[0]
+
+
+def test_engines_are_built_once_and_read_only(base):
+    assert base.filters is base.filters and base.correlations is base.correlations
+    assert not base.filters.sorted_scores.flags.writeable
+    assert base.scaled("log") is base.scaled("log") and base.scaled("raw").columns.tolist() == CORR_COLUMNS
+    assert base.stats()["engine_bytes"] > 0
+
+
+def test_fingerprints_follow_content(shipped):
+    a, b = DatasetStore(shipped, CORR_COLUMNS), DatasetStore(shipped.copy(), CORR_COLUMNS)
+    assert a.fingerprint == b.fingerprint
+    edited = shipped.copy()
+    edited.loc[0, "inflation"] += 1
+    c = DatasetStore(edited, CORR_COLUMNS)
+    assert c.fingerprint != a.fingerprint
+    assert c.column_token("score") == a.column_token("score")
+    assert c.column_token("inflation") != a.column_token("inflation")
+
+
+def test_session_bytes_skip_shared_objects(base):
+    _, idx, view = base.select("Europe", (0, 100))
+    shared = base.shared_ids()
+    assert store.session_bytes({"view": view, "idx": idx}, shared) == store.session_bytes({}, shared)
+    assert store.session_bytes({"copy": view.copy()}, shared) > 0
+
+
+@pytest.fixture
+def version(monkeypatch, shipped_csv):
+    monkeypatch.setenv("EFI_DATA_PATH", str(shipped_csv))
+    return data_source.version()
+
+
+def test_weighted_store_rescores_a_copy(version):
+    base = query.base_store(version)
+    weights = (2.0,) + (1.0,) * (len(base.scorer.columns) - 1)
+    weighted = query.weighted_store(version, None, weights)
+    score, rank = base.scorer.rescore(base.scorer.weights(weights))
+    np.testing.assert_allclose(weighted.frame["score"], score)
+    np.testing.assert_array_equal(weighted.frame["rank"], rank)
+    assert weighted.fingerprint != base.fingerprint
+    pd.testing.assert_frame_equal(base.frame, query.base_store(version).frame)
+    assert (weighted.frame["inflation"].to_numpy() == base.frame["inflation"].to_numpy()).all()
+
+
+def test_derived_store_adds_metric_columns(version):
+    ones = (1.0,) * len(query.base_store(version).scorer.columns)
+    derived = query.derived_store(version, None, ones, (("double", "score * 2"),))
+    np.testing.assert_allclose(derived.frame["double"], derived.frame["score"] * 2)
+    assert derived.corr_columns == CORR_COLUMNS + ["double"]
+    assert derived.column_token("score") == query.base_store(version).column_token("score")
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import table
+from store import DatasetStore
+from table import StringIndex
+
+
+def test_search_matches_pandas_contains(panel):
+    index = StringIndex(panel["Country"])
+    for q in ("sing", "  LAND ", "· 1", "zzz"):
+        expected = np.flatnonzero(panel["Country"].str.casefold().str.contains(q.strip().casefold(), regex=False))
+        rows = index.search(q)
+        np.testing.assert_array_equal(rows, expected)
+        assert not rows.flags.writeable
+    assert index.search("sing") is index.search("SING")
+
+
+def test_sort_key_is_case_folded_with_missing_last():
+    index = StringIndex(pd.Series(["b", None, "A", "c", "a"], dtype="string"))
+    order = np.argsort(index.sort_key, kind="stable")
+    assert order.tolist() == [2, 4, 0, 3, 1] and np.isnan(index.sort_key[1])
+
+
+def test_apply_search_narrows_by_every_query(panel):
+    indexes = table.build_string_indexes(panel)
+    idx = np.flatnonzero(panel["score"].to_numpy() > 60)
+    rows = table.apply_search(idx, indexes, {"Country": "a", "region": "europe", "iso_code": ""})
+    mask = ((panel["score"] > 60) & panel["Country"].str.casefold().str.contains("a")
+            & panel["region"].str.casefold().str.contains("europe"))
+    np.testing.assert_array_equal(rows, np.flatnonzero(mask))
+    assert table.apply_search(idx, indexes, {"Country": "  "}) is idx
+
+
+@pytest.mark.parametrize("column,ascending", [("Country", True), ("Country", False), ("score", False),
+                                              ("region", True)])
+def test_table_order_matches_a_pandas_sort(panel, column, ascending):
+    # The Data Table's path: search, then sort through the store's ranking index
+    s = DatasetStore(panel)
+    rows = table.apply_search(np.arange(len(panel)), s.strings, {"Country": "e", "region": ""})
+    order = s.rankings.order(("all", "e", ""), rows, column, ascending)
+    sub = panel.iloc[rows]
+    key = sub[column] if column == "score" else sub[column].str.casefold()
+    expected = sub.assign(_k=key).sort_values("_k", ascending=ascending, kind="stable").index
+    np.testing.assert_array_equal(panel.index[order], expected)
+
+
+@pytest.mark.parametrize("total,page,size,expected", [
+    (0, 1, 25, (1, 1, 0, 0)),
+    (100, 1, 25, (1, 4, 0, 25)),
+    (101, 5, 25, (5, 5, 100, 101)),
+    (101, 9, 25, (5, 5, 100, 101)),
+    (101, 0, 25, (1, 5, 0, 25)),
+])
+def test_page_bounds_clamp(total, page, size, expected):
+    assert table.page_bounds(total, page, size) == expected
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import transforms
+from transforms import MAD_SCALE, SCALES, WINSOR_LIMITS
+
+
+@pytest.fixture
+def matrix(panel):
+    return panel[["inflation", "population", "score"]].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def test_percentile_matches_pandas_rank(matrix):
+    frame = pd.DataFrame(matrix)
+    expected = ((frame.rank() - 1) / (frame.count() - 1) * 100).to_numpy()
+    np.testing.assert_allclose(transforms.apply(matrix, "percentile"), expected, atol=1e-9)
+
+
+def test_percentile_ties_and_edge_cases():
+    np.testing.assert_allclose(transforms.apply([3.0, 1.0, 3.0, np.nan], "percentile"), [75, 0, 75, np.nan])
+    np.testing.assert_allclose(transforms.apply([5.0], "percentile"), [50])
+    assert transforms.apply(np.empty(0), "percentile").shape == (0,)
+
+
+def test_winsorize_clips_to_quantiles(matrix):
+    out = transforms.apply(matrix, "winsorized")
+    lo, hi = np.nanquantile(matrix, WINSOR_LIMITS, axis=0)
+    np.testing.assert_allclose(out, np.clip(matrix, lo, hi))
+
+
+def test_robust_z(matrix):
+    out = transforms.apply(matrix, "robust_z")
+    frame = pd.DataFrame(matrix)
+    med = frame.median()
+    mad = (frame - med).abs().median() * MAD_SCALE
+    np.testing.assert_allclose(out, ((frame - med) / mad).to_numpy())
+
+
+def test_robust_z_falls_back_when_mad_is_zero():
+    np.testing.assert_allclose(transforms.apply([1.0, 1, 1, 1, 5], "robust_z"), [0, 0, 0, 0, 4 / 1.6])
+    np.testing.assert_array_equal(transforms.apply([2.0, 2, 2], "robust_z"), [0, 0, 0])
+
+
+def test_signed_log():
+    np.testing.assert_allclose(transforms.apply([-9.0, 0, 9], "log"), [-np.log(10), 0, np.log(10)])
+
+
+@pytest.mark.parametrize("scale", list(SCALES))
+def test_scales_are_monotone_and_keep_missing(matrix, scale):
+    out = transforms.apply(matrix, scale)
+    np.testing.assert_array_equal(np.isnan(out), np.isnan(matrix))
+    for j in range(matrix.shape[1]):
+        present = ~np.isnan(matrix[:, j])
+        order = np.argsort(matrix[present, j], kind="stable")
+        assert (np.diff(out[present, j][order]) >= -1e-12).all()
+
+
+def test_unknown_scale():
+    with pytest.raises(ValueError, match="unknown scale"):
+        transforms.apply([1.0], "cube")
@@ -0,0 +1,72 @@
+import hashlib
+import json
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# ─── THEME CONSTANTS ─────────────────────────────────────────────────────────────
+# NOTE: LAYOUT_BASE intentionally contains NO xaxis/yaxis keys.
+# Figures do not take these as kwargs: they are compiled once into the
+# TEMPLATE below, which every chart names.
+LAYOUT_BASE = dict(
+    plot_bgcolor="#0d1117",
+    paper_bgcolor="#0d1117",
+    font=dict(color="#8b949e", family="DM Sans, system-ui, -apple-system, Segoe UI, Roboto, sans-serif"),
+)
+AXIS_STYLE = dict(
+    gridcolor="#21262d",
+    linecolor="#30363d",
+    zerolinecolor="#30363d",
+)
+COLORBAR_STYLE = dict(
+    tickfont=dict(color="#8b949e"),
+    title_font=dict(color="#8b949e"),
+    bgcolor="#161b22",
+    bordercolor="#30363d",
+)
+LEGEND_STYLE = dict(
+    bgcolor="#161b22",
+    bordercolor="#30363d",
+    font=dict(color="#8b949e"),
+)
+COLOR_SEQ   = ["#58a6ff","#3fb950","#f78166","#e3b341","#bc8cff","#39d353"]
+SCORE_SCALE = [[0,"#da3633"],[0.5,"#e3b341"],[1.0,"#3fb950"]]
+GEO_STYLE   = dict(
+    bgcolor="#0d1117", showframe=False,
+    showcoastlines=True, coastlinecolor="#30363d",
+    showland=True, landcolor="#161b22",
+    showocean=True, oceancolor="#0d1117",
+    showlakes=False,
+)
+
+
+# ─── PLOTLY TEMPLATE ─────────────────────────────────────────────────────────────
+# Built and registered once at import; figures pass template=TEMPLATE instead of
+# re-applying the style dicts, and st.plotly_chart(theme=None) leaves it as is.
+TEMPLATE = "efi_dark"
+
+
+def _template():
+    colorbar = dict(colorbar=COLORBAR_STYLE)
+    return go.layout.Template(
+        layout=dict(
+            LAYOUT_BASE,
+            xaxis=AXIS_STYLE, yaxis=AXIS_STYLE,
+            coloraxis=colorbar, legend=LEGEND_STYLE,
+            colorway=COLOR_SEQ, geo=GEO_STYLE,
+        ),
+        data=dict(
+            bar=[dict(marker=colorbar)], scatter=[dict(marker=colorbar)],
+            heatmap=[colorbar], choropleth=[colorbar],
+        ),
+    )
+
+
+pio.templates[TEMPLATE] = _template()
+
+# Part of every cached figure's key: editing any style above invalidates them all
+FINGERPRINT = hashlib.sha1(json.dumps(
+    [LAYOUT_BASE, AXIS_STYLE, COLORBAR_STYLE, LEGEND_STYLE, COLOR_SEQ, SCORE_SCALE, GEO_STYLE,
+     pio.templates[TEMPLATE].to_plotly_json()],
+    sort_keys=True,
+).encode()).hexdigest()[:12]
@@ -0,0 +1,99 @@
+import warnings
+
+import numpy as np
+
+# Robust scales for skewed indicators: one hyperinflation (Venezuela at 2665%)
+# or two giant populations otherwise set the range of a chart and dominate a
+# Pearson correlation. Each scale is a single vectorized pass over a rows ×
+# columns float matrix, column by column statistics, NaN-aware: missing values
+# stay missing and never move a column's quantiles or ranks.
+#   winsorized  clipped to the column's WINSOR_LIMITS quantiles
+#   log         sign(x)·log(1 + |x|), so zero and deflation stay defined
+#   percentile  average rank as 0–100; ties share a rank
+#   robust_z    (x − median) / (1.4826·MAD), a z-score outliers cannot inflate
+# All are monotone, so orderings (rankings, top-N lists) are unchanged.
+SCALES = {
+    "raw":        "Raw values",
+    "winsorized": "Winsorized",
+    "log":        "Log",
+    "percentile": "Percentile",
+    "robust_z":   "Robust z-score",
+}
+WINSOR_LIMITS = (0.05, 0.95)
+# MAD of a normal sample × 1.4826 estimates its standard deviation
+MAD_SCALE = 1.4826
+
+
+def _column_stat(fn, X, *args):
+    # nan-aware column statistic; an all-missing column gives NaN, silently
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return fn(X, *args, axis=0)
+
+
+def winsorize(X, limits=WINSOR_LIMITS):
+    lo, hi = _column_stat(np.nanquantile, X, list(limits))
+    return np.clip(X, lo, hi)
+
+
+def signed_log(X):
+    return np.sign(X) * np.log1p(np.abs(X))
+
+
+def percentile(X):
+    # One sort per column; a tie group's rank is the mean of its first and last
+    # sorted position, found with running max/min over group boundaries
+    X = np.asarray(X, dtype="float64")
+    m = len(X)
+    if m == 0:
+        return X.copy()
+    order = np.argsort(X, axis=0, kind="stable")
+    s = np.take_along_axis(X, order, axis=0)
+    step = np.ones(s.shape, dtype=bool)
+    step[1:] = s[1:] != s[:-1]
+    pos = np.arange(m)[:, None]
+    first = np.maximum.accumulate(np.where(step, pos, 0), axis=0)
+    last_step = np.ones(s.shape, dtype=bool)
+    last_step[:-1] = step[1:]
+    last = np.minimum.accumulate(np.where(last_step, pos, m)[::-1], axis=0)[::-1]
+    present = (~np.isnan(X)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.where(present > 1, 100 * (first + last) / 2 / (present - 1), 50.0)
+    out = np.empty_like(X)
+    np.put_along_axis(out, order, pct, axis=0)
+    out[np.isnan(X)] = np.nan
+    return out
+
+
+def robust_z(X):
+    # Columns where over half the values are equal have MAD 0: their standard
+    # deviation stands in, and a constant column maps to 0
+    med = _column_stat(np.nanmedian, X)
+    mad = _column_stat(np.nanmedian, np.abs(X - med)) * MAD_SCALE
+    std = _column_stat(np.nanstd, X)
+    scale = np.where(mad > 0, mad, np.where(std > 0, std, 1.0))
+    return (X - med) / scale
+
+
+TRANSFORMS = {
+    "raw":        np.array,
+    "winsorized": winsorize,
+    "log":        signed_log,
+    "percentile": percentile,
+    "robust_z":   robust_z,
+}
+
+
+def apply(X, scale):
+    # X (a matrix, or one column as a 1-D array) under a scale, as new float64
+    if scale not in TRANSFORMS:
+        raise ValueError(f"unknown scale {scale!r}; choose from {list(SCALES)}")
+    X = np.array(X, dtype="float64")
+    if X.ndim == 1:
+        return TRANSFORMS[scale](X[:, None])[:, 0]
+    return TRANSFORMS[scale](X)
+
+
+def axis_title(title, scale):
+    # Chart axis / legend title for a column shown under a scale
+    return title if scale == "raw" else f"{title} · {SCALES[scale].lower()}"